@@ -23,6 +23,7 @@ import logging
 VCAP_SERVICES = "VCAP_SERVICES"
 LOG_LEVEL = "LOG_LEVEL"
 VCAP_APP_PORT = "VCAP_APP_PORT"
+DEBUG = "DEBUG"
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +66,7 @@ class Config(object):
         self.log_level = os.environ.get(LOG_LEVEL, "DEBUG")
         self.app_port = int(os.environ.get(VCAP_APP_PORT, "5000"))
         self.app_host = "0.0.0.0"
+        self.debug = os.environ.get(DEBUG, "false").lower() == "true"
         logger.info("DB name: {}, DB username: {}, DB password: {}, DB hostname: {}, DB port: {}"
                     .format(self.db_name, self.db_username, self.db_password, self.db_hostname, self.db_port))
 
@@ -13,7 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from pymongo import MongoClient
+import time
+
+from pymongo import ASCENDING, DeleteOne, InsertOne, MongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
 
 from config import Config
@@ -36,14 +40,96 @@ class DatabaseClient(object):
     def delete_collection(self, collection_name):
         self._database.drop_collection(collection_name)
 
-    def get_documents(self, collection_name):
-        result = self._database[collection_name].find({})
-        return list(result)
+    def get_documents(self, collection_name, query_filter=None, projection=None, skip=0, limit=0, after=None):
+        """
+        Return cursor over documents matching query_filter, in _id order.
+        Pass _id of the last document from the previous page as after to get the next page without skipping.
+        """
+        query_filter = dict(query_filter or {})
+        if after is not None:
+            query_filter = {"$and": [query_filter, {"_id": {"$gt": after}}]}
+        return self._database[collection_name].find(query_filter, projection=projection, skip=skip, limit=limit,
+                                                    sort=[("_id", ASCENDING)])
 
     def add_document(self, collection_name, new_data):
         result = self._database[collection_name].insert_one(new_data)
         return str(result.inserted_id)
 
+    @staticmethod
+    def _get_operation_results(operation_count, ordered, write_errors):
+        """Status of each operation: ok, error, or skipped - when an ordered bulk stopped at an earlier error."""
+        results = [{"index": index, "status": "ok"} for index in range(operation_count)]
+        for error in write_errors:
+            results[error["index"]].update(status="error", message=error["errmsg"])
+        if ordered and len(write_errors) > 0:
+            for result in results[write_errors[0]["index"] + 1:]:
+                result["status"] = "skipped"
+        return results
+
+    def add_documents(self, collection_name, documents, ordered=True):
+        """
+        Insert documents with a single insert_many call.
+        Return result of each insert, with id of inserted document, and duration of the call.
+        """
+        write_errors = []
+        start_time = time.time()
+        try:
+            self._database[collection_name].insert_many(documents, ordered=ordered)
+        except BulkWriteError as e:
+            write_errors = e.details["writeErrors"]
+        duration = time.time() - start_time
+        results = self._get_operation_results(len(documents), ordered, write_errors)
+        for document, result in zip(documents, results):
+            if result["status"] == "ok":
+                result["document_id"] = str(document["_id"])
+        return {"results": results, "inserted": sum(r["status"] == "ok" for r in results), "duration": duration}
+
+    @staticmethod
+    def _get_write_model(operation):
+        name = operation.get("operation")
+        try:
+            if name == "insert":
+                # set id in advance, to return it in the results
+                operation["data"].setdefault("_id", ObjectId())
+                return InsertOne(operation["data"])
+            if name == "replace":
+                return ReplaceOne({"_id": ObjectId(operation["document_id"])}, operation["new_data"])
+            if name == "delete":
+                return DeleteOne({"_id": ObjectId(operation["document_id"])})
+        except (AttributeError, KeyError, TypeError, InvalidId) as e:
+            raise ValueError("Incorrect {} operation: {}".format(name, e))
+        raise ValueError("Unknown operation {}".format(name))
+
+    def bulk_write(self, collection_name, operations, ordered=True):
+        """
+        Execute operations with a single bulk_write call. Each operation is one of:
+        {"operation": "insert", "data": {...}}, {"operation": "replace", "document_id": <id>, "new_data": {...}},
+        {"operation": "delete", "document_id": <id>}
+        Raise ValueError if any operation is incorrect - then nothing is executed.
+        Return status of each operation, counts of affected documents and duration of the call.
+        """
+        requests = [self._get_write_model(operation) for operation in operations]
+        write_errors = []
+        start_time = time.time()
+        try:
+            counts = self._database[collection_name].bulk_write(requests, ordered=ordered).bulk_api_result
+        except BulkWriteError as e:
+            counts = e.details
+            write_errors = counts["writeErrors"]
+        duration = time.time() - start_time
+        results = self._get_operation_results(len(operations), ordered, write_errors)
+        for operation, result in zip(operations, results):
+            if operation["operation"] == "insert" and result["status"] == "ok":
+                result["document_id"] = str(operation["data"]["_id"])
+        return {
+            "results": results,
+            "inserted": counts["nInserted"],
+            "matched": counts["nMatched"],
+            "modified": counts["nModified"],
+            "deleted": counts["nRemoved"],
+            "duration": duration
+        }
+
     def replace_document(self, collection_name, document_id, new_data):
         self._database[collection_name].replace_one({"_id": ObjectId(document_id)}, new_data)
 
@@ -15,11 +15,16 @@
 # limitations under the License.
 #
 
+import itertools
+
 import flask
 from werkzeug.exceptions import default_exceptions, InternalServerError
 from pymongo import errors
-from bson.json_util import dumps
+from bson.errors import InvalidId
+from bson.json_util import dumps, loads
+from bson.objectid import ObjectId
 
+import app_metrics
 from db_utils import DatabaseClient
 from config import Config
 
@@ -40,11 +45,81 @@ def _get_request_json(request):
     return {}
 
 
+def _get_request_items(request):
+    """
+    Return list of items from request body: a json array, or one json per line when
+    Content-Type is application/x-ndjson. Abort with 400 if the body is incorrect.
+    """
+    body = request.get_data(as_text=True)
+    try:
+        if request.mimetype == "application/x-ndjson":
+            items = [loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = loads(body)
+    except ValueError:
+        flask.abort(400)
+    if not isinstance(items, list) or len(items) == 0 or not all(isinstance(i, dict) for i in items):
+        flask.abort(400)
+    return items
+
+
+def _is_ordered(args):
+    return args.get("ordered", "true").lower() != "false"
+
+
+def _get_documents_query(args):
+    """
+    Parse query parameters of documents listing: filter (json), fields (comma-separated), limit, skip and after
+    (id of the last document from the previous page). Abort with 400 on incorrect values.
+    """
+    try:
+        query = {
+            "query_filter": loads(args["filter"]) if "filter" in args else None,
+            "projection": args["fields"].split(",") if "fields" in args else None,
+            "skip": int(args.get("skip", 0)),
+            "limit": int(args.get("limit", 0)),
+            "after": ObjectId(args["after"]) if "after" in args else None
+        }
+    except (ValueError, InvalidId):
+        flask.abort(400)
+    if not isinstance(query["query_filter"], (dict, type(None))) or query["skip"] < 0 or query["limit"] < 0:
+        flask.abort(400)
+    return query
+
+
+def _prime(cursor):
+    """
+    Return iterator over documents of the cursor. The first batch is fetched here, before the response is started, so
+    that a query rejected by the database ends with 400 and other database errors with 500, not a truncated body.
+    """
+    documents = iter(cursor)
+    try:
+        first_documents = [next(documents)]
+    except StopIteration:
+        first_documents = []
+    except errors.OperationFailure:
+        flask.abort(400)
+    return itertools.chain(first_documents, documents)
+
+
+def _stream_rows(cursor):
+    yield "{\"rows\": ["
+    for index, document in enumerate(cursor):
+        yield (", " if index > 0 else "") + dumps(document)
+    yield "]}"
+
+
+def _stream_ndjson(cursor):
+    for document in cursor:
+        yield dumps(document) + "\n"
+
+
 def create_app():
     app = flask.Flask(__name__)
     for code, exception in default_exceptions.items():
         app.errorhandler(code)(_handle_http_exception)
     app.errorhandler(Exception)(_handle_http_exception)  # to handle all exceptions in debug mode
+    app_metrics.install(app)
     return app
 
 
@@ -96,11 +171,20 @@ def delete_collection(collection_name):
 @app.route("/collections/<collection_name>/documents", methods=["GET"])
 def get_documents(collection_name):
     """
-    Retrieve all documents from the <collection_name>.
+    Retrieve documents from the <collection_name>, streamed directly from the database cursor.
+    Optional query parameters:
+        filter: query in MongoDB extended json, e.g. {"name": "abc"}
+        fields: comma-separated names of returned fields
+        limit, skip: number of returned and skipped documents
+        after: id of the last document from the previous page - documents are returned in id order
+        format: "ndjson" to return one document per line instead of a single json
     :param collection_name: Name of the collection we want to retrieve rows from
-    :return: Json with list of rows. {"rows": <rows_list>}
+    :return: Json with list of rows. {"rows": <rows_list>}, or newline-delimited documents
     """
-    return dumps({"rows": db.get_documents(collection_name)})
+    cursor = _prime(db.get_documents(collection_name, **_get_documents_query(flask.request.args)))
+    if flask.request.args.get("format") == "ndjson":
+        return flask.Response(_stream_ndjson(cursor), mimetype="application/x-ndjson")
+    return flask.Response(_stream_rows(cursor), mimetype="application/json")
 
 
 @app.route("/collections/<collection_name>/documents", methods=["POST"])
@@ -116,6 +200,39 @@ def add_documents(collection_name):
     return flask.Response("Bad request.", status=400)
 
 
+@app.route("/collections/<collection_name>/documents/bulk_insert", methods=["POST"])
+def add_documents_bulk(collection_name):
+    """
+    Add many documents at once. Expected request body: json array of documents, or newline-delimited documents
+    with Content-Type application/x-ndjson. Pass ordered=false query parameter to continue after a failed insert.
+    :param collection_name: Modified collection
+    :return: {"results": [{"index": <i>, "status": "ok"|"error"|"skipped", "document_id": <id>}],
+              "inserted": <count>, "duration": <seconds>}
+    """
+    documents = _get_request_items(flask.request)
+    return dumps(db.add_documents(collection_name, documents, ordered=_is_ordered(flask.request.args)))
+
+
+@app.route("/collections/<collection_name>/documents/bulk", methods=["POST"])
+def bulk_write(collection_name):
+    """
+    Execute many inserts, replaces and deletes at once. Expected request body: json array (or newline-delimited
+    with Content-Type application/x-ndjson) of operations:
+        {"operation": "insert", "data": {<property>: <value>}}
+        {"operation": "replace", "document_id": <id>, "new_data": {<property>: <value>}}
+        {"operation": "delete", "document_id": <id>}
+    Pass ordered=false query parameter to continue after a failed operation.
+    :param collection_name: Modified collection
+    :return: {"results": [{"index": <i>, "status": "ok"|"error"|"skipped"}], "inserted": <count>,
+              "matched": <count>, "modified": <count>, "deleted": <count>, "duration": <seconds>}
+    """
+    operations = _get_request_items(flask.request)
+    try:
+        return dumps(db.bulk_write(collection_name, operations, ordered=_is_ordered(flask.request.args)))
+    except ValueError as e:
+        return flask.Response(str(e), status=400)
+
+
 @app.route("/collections/<collection_name>/documents/<document_id>", methods=["POST"])
 def replace_document(collection_name, document_id):
     """
@@ -145,6 +262,6 @@ def delete_document(collection_name, document_id):
 
 
 if __name__ == "__main__":
+    # development server, see gunicorn_config.py for production settings
     config = Config()
-    app.debug = True
-    app.run(host=config.app_host, port=config.app_port)
+    app.run(host=config.app_host, port=config.app_port, debug=config.debug)
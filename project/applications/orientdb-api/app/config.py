@@ -22,6 +22,9 @@ class Config(object):
     """Main package configuration."""
 
     SERVICES = "VCAP_SERVICES"
+    POOL_SIZE = "POOL_SIZE"
+    POOL_IDLE_TIMEOUT = "POOL_IDLE_TIMEOUT"
+    EXISTS_CACHE_TTL = "EXISTS_CACHE_TTL"
 
     def __init__(self):
         """
@@ -42,6 +45,10 @@ class Config(object):
                 }
             ]
         }
+        Optional environment variables:
+            POOL_SIZE - maximum number of open sessions of one database (default 4)
+            POOL_IDLE_TIMEOUT - seconds after which unused session is closed (default 300)
+            EXISTS_CACHE_TTL - seconds for which a database found by existence check is not checked again (default 5)
         """
         credentials = self._get_credentials()
         self.db_username = credentials.get("username", "root")
@@ -49,6 +56,9 @@ class Config(object):
         self.db_hostname = credentials.get("hostname", "localhost")
         ports = credentials.get("ports")
         self.db_port = int(ports["2424/tcp"])
+        self.pool_size = int(os.environ.get(self.POOL_SIZE, 4))
+        self.pool_idle_timeout = int(os.environ.get(self.POOL_IDLE_TIMEOUT, 300))
+        self.exists_cache_ttl = int(os.environ.get(self.EXISTS_CACHE_TTL, 5))
 
     @classmethod
     def _get_credentials(cls):
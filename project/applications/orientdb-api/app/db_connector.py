@@ -14,71 +14,161 @@
 # limitations under the License.
 #
 
+import contextlib
+import json
+import re
+import threading
+import time
+
 import flask_restful
 import pyorient
 
 from config import Config
+from session_pool import OpenSessionError, SessionPool
 
 
 class DBConnector(object):
     """OrientDB database connector."""
 
+    # maximum number of statements in one batch script
+    BATCH_SIZE = 500
+    CLASS_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
     def __init__(self):
         self._config = Config()
+        # server client is used for database management only and is shared by all requests
+        self._client_lock = threading.Lock()
         self._client = pyorient.OrientDB(self._config.db_hostname, self._config.db_port)
         self._client.connect(self._config.db_username, self._config.db_password)
+        self._pool = SessionPool(self._config.db_hostname, self._config.db_port, self._config.db_username,
+                                 self._config.db_password, size=self._config.pool_size,
+                                 idle_timeout=self._config.pool_idle_timeout)
+        # time of the last check which found each database, so that requests do not all wait for the server client
+        self._exists_cache = {}
 
-    def db_exists(self, database_name):
-        """Check if given database exists."""
-        return self._client.db_exists(database_name, pyorient.STORAGE_TYPE_MEMORY)
+    def db_exists(self, database_name, use_cache=False):
+        """
+        Check if given database exists. With use_cache, a database found less than exists_cache_ttl seconds ago is
+        not checked again. Other workers can drop it in the meantime - opening its session then fails.
+        """
+        checked_at = self._exists_cache.get(database_name)
+        if use_cache and checked_at is not None and time.time() - checked_at < self._config.exists_cache_ttl:
+            return True
+        with self._client_lock:
+            exists = self._client.db_exists(database_name, pyorient.STORAGE_TYPE_MEMORY)
+        if exists:
+            self._exists_cache[database_name] = time.time()
+        else:
+            self._exists_cache.pop(database_name, None)
+        return exists
 
-    def db_open(self, database_name):
-        """Open database connection."""
-        if not self.db_exists(database_name):
+    @contextlib.contextmanager
+    def db_session(self, database_name):
+        """Yield client with open database session from the pool."""
+        if not self.db_exists(database_name, use_cache=True):
             flask_restful.abort(404, message="Database '{}' not found".format(database_name))
-        return self._client.db_open(
-            database_name, self._config.db_username, self._config.db_password, pyorient.DB_TYPE_GRAPH)
+        try:
+            with self._pool.session(database_name) as client:
+                yield client
+        except OpenSessionError:
+            self._exists_cache.pop(database_name, None)
+            if not self.db_exists(database_name):
+                flask_restful.abort(404, message="Database '{}' not found".format(database_name))
+            raise
+        except pyorient.PyOrientException:
+            # e.g. the database was dropped by another worker while its pooled session was idle
+            self._exists_cache.pop(database_name, None)
+            raise
+
+    def db_open(self, database_name):
+        """Open database connection, return database clusters."""
+        with self.db_session(database_name) as client:
+            return client.db_reload()
 
     def db_create(self, database_name):
         """Create new database."""
         if self.db_exists(database_name):
             flask_restful.abort(400, message="Database '{}' already exists".format(database_name))
-        self._client.db_create(database_name, pyorient.DB_TYPE_GRAPH, pyorient.STORAGE_TYPE_MEMORY)
+        with self._client_lock:
+            self._client.db_create(database_name, pyorient.DB_TYPE_GRAPH, pyorient.STORAGE_TYPE_MEMORY)
+        self._exists_cache[database_name] = time.time()
 
     def db_drop(self, database_name):
         """Drop database."""
-        self.db_open(database_name)
-        self._client.db_drop(database_name)
+        if not self.db_exists(database_name):
+            flask_restful.abort(404, message="Database '{}' not found".format(database_name))
+        self._pool.close_all(database_name)
+        self._exists_cache.pop(database_name, None)
+        with self._client_lock:
+            self._client.db_drop(database_name)
+
+    @classmethod
+    def _validate_class_name(cls, class_name):
+        if cls.CLASS_NAME_PATTERN.match(class_name) is None:
+            flask_restful.abort(400, message="Incorrect class name '{}'".format(class_name))
 
     def class_create(self, database_name, class_name):
         """Create new class."""
-        self.db_open(database_name)
-        self._client.command("CREATE CLASS {} EXTENDS V".format(class_name))
+        with self.db_session(database_name) as client:
+            client.command("CREATE CLASS {} EXTENDS V".format(class_name))
 
     def class_drop(self, database_name, class_name):
         """Drop class."""
-        self.db_open(database_name)
-        try:
-            self._client.command("DROP CLASS {}".format(class_name))
-        except pyorient.PyOrientCommandException:
-            flask_restful.abort(400, message="Cannot drop class '{}' because it contains records".format(class_name))
+        with self.db_session(database_name) as client:
+            try:
+                client.command("DROP CLASS {}".format(class_name))
+            except pyorient.PyOrientCommandException:
+                flask_restful.abort(400, message="Cannot drop class '{}' because it contains records".format(
+                    class_name))
 
-    def record_get_all(self, database_name, class_name):
-        """Get all records"""
-        self.db_open(database_name)
-        return self._client.query("SELECT * FROM {}".format(class_name))
+    def record_get_all(self, database_name, class_name, skip=0, limit=None, page_size=1000):
+        """
+        Get records, querying the database in pages of page_size records.
+        Return iterator over records. The first page is queried right away, so that errors are raised here.
+        """
+        self._validate_class_name(class_name)
+        if limit == 0:
+            return iter([])
+        page_limit = page_size if limit is None else min(page_size, limit)
+        first_page = self._record_get_page(database_name, class_name, skip, page_limit)
+        return self._iter_records(database_name, class_name, first_page, skip, limit, page_size)
+
+    def _record_get_page(self, database_name, class_name, skip, limit):
+        with self.db_session(database_name) as client:
+            return client.query("SELECT * FROM {} SKIP {} LIMIT {}".format(class_name, skip, limit), limit)
+
+    def _iter_records(self, database_name, class_name, page, skip, limit, page_size):
+        returned_count = 0
+        while True:
+            for record in page:
+                yield record
+            returned_count += len(page)
+            page_limit = page_size if limit is None else min(page_size, limit - returned_count)
+            if len(page) < page_size or page_limit == 0:
+                break
+            page = self._record_get_page(database_name, class_name, skip + returned_count, page_limit)
 
     def record_get_one(self, database_name, class_name, record_id):
         """Get one record"""
-        self.db_open(database_name)
-        return self._client.query("SELECT * FROM {} WHERE id='{}'".format(class_name, record_id))
+        with self.db_session(database_name) as client:
+            return client.query("SELECT * FROM {} WHERE id='{}'".format(class_name, record_id))
+
+    def record_create(self, database_name, class_name, content):
+        """Create new record with content dict."""
+        self._validate_class_name(class_name)
+        with self.db_session(database_name) as client:
+            client.command("INSERT INTO {} CONTENT {}".format(class_name, json.dumps(content)))
 
-    def record_create(self, database_name, class_name, values):
-        """Create new record."""
-        self.db_open(database_name)
-        self._client.command("INSERT INTO {} SET {}".format(class_name, ", ".join(values)))
+    def record_create_many(self, database_name, class_name, contents):
+        """Create records with content dicts, in batch scripts of up to BATCH_SIZE inserts, each in a transaction."""
+        self._validate_class_name(class_name)
+        with self.db_session(database_name) as client:
+            for start in range(0, len(contents), self.BATCH_SIZE):
+                statements = ["INSERT INTO {} CONTENT {};".format(class_name, json.dumps(content))
+                              for content in contents[start:start + self.BATCH_SIZE]]
+                client.batch("\n".join(["begin;"] + statements + ["commit retry 10;"]))
 
     def record_drop(self, database_name, class_name, record_id):
         """Drop record."""
-        self.db_open(database_name)
-        self._client.command("DELETE VERTEX FROM {} WHERE id='{}'".format(class_name, record_id))
+        with self.db_session(database_name) as client:
+            client.command("DELETE VERTEX FROM {} WHERE id='{}'".format(class_name, record_id))
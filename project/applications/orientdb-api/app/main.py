@@ -15,14 +15,16 @@
 #
 
 import json
-from datetime import datetime
+import uuid
 
 import flask
 import flask_restful
 
+import app_metrics
 from db_connector import DBConnector
 
 app = flask.Flask(__name__)
+app_metrics.install(app)
 api = flask_restful.Api(app)
 db_connector = DBConnector()
 
@@ -77,22 +79,64 @@ class ClassResource(flask_restful.Resource):
         return flask.Response("OK")
 
 
+def _get_request_json(request):
+    try:
+        return json.loads(request.data.decode())
+    except ValueError:
+        flask_restful.abort(400, message="Incorrect json")
+
+
+def _get_non_negative_int_arg(name, default=None):
+    value = flask.request.args.get(name, default, type=int)
+    if value is not None and value < 0:
+        flask_restful.abort(400, message="Incorrect value of '{}'".format(name))
+    return value
+
+
+def _new_record(values):
+    """Record content with unique id."""
+    record = dict(values)
+    record["id"] = uuid.uuid4().hex
+    return record
+
+
 class RecordsResource(flask_restful.Resource):
     """API /databases/<database_name>/classes/<class_name>/records endpoint."""
 
     def get(self, database_name, class_name):
-        """Get all records from class."""
-        results = db_connector.record_get_all(database_name, class_name)
-        records = [str(r) for r in results]
-        return flask.make_response(flask.jsonify({'Records': records}), 200)
+        """Get records from class, streamed. Optional query parameters: skip, limit."""
+        records = db_connector.record_get_all(database_name, class_name, skip=_get_non_negative_int_arg("skip", 0),
+                                              limit=_get_non_negative_int_arg("limit"))
+        return flask.Response(self._stream_records(records), mimetype="application/json")
+
+    @staticmethod
+    def _stream_records(records):
+        yield '{"Records": ['
+        for index, record in enumerate(records):
+            yield (", " if index > 0 else "") + json.dumps(str(record))
+        yield "]}"
 
     def post(self, database_name, class_name):
-        """Create new record. Expected request json: {"key": <value>}."""
-        request_body = json.loads(flask.request.data.decode())
-        values = ["{}='{}'".format(k, v) for k, v in request_body.items()]
-        values.extend(["id={}".format(datetime.now().strftime("%s"))])
-        db_connector.record_create(database_name, class_name, values)
-        return flask.Response("OK")
+        """Create new record. Expected request json: {"key": <value>}. Return id of the record."""
+        request_body = _get_request_json(flask.request)
+        if not isinstance(request_body, dict):
+            flask_restful.abort(400, message="Expected json object")
+        record = _new_record(request_body)
+        db_connector.record_create(database_name, class_name, record)
+        return flask.jsonify({"id": record["id"]})
+
+
+class RecordsBatchResource(flask_restful.Resource):
+    """API /databases/<database_name>/classes/<class_name>/records/batch endpoint."""
+
+    def post(self, database_name, class_name):
+        """Create many records. Expected request json: [{"key": <value>}, ...]. Return ids of the records."""
+        request_body = _get_request_json(flask.request)
+        if not isinstance(request_body, list) or not all(isinstance(r, dict) for r in request_body):
+            flask_restful.abort(400, message="Expected list of json objects")
+        records = [_new_record(values) for values in request_body]
+        db_connector.record_create_many(database_name, class_name, records)
+        return flask.jsonify({"ids": [r["id"] for r in records]})
 
 
 class RecordResource(flask_restful.Resource):
@@ -115,6 +159,7 @@ api.add_resource(DatabaseResource, "/rest/databases/<database_name>")
 api.add_resource(ClassesResource, "/rest/databases/<database_name>/classes")
 api.add_resource(ClassResource, "/rest/databases/<database_name>/classes/<class_name>")
 api.add_resource(RecordsResource, "/rest/databases/<database_name>/classes/<class_name>/records")
+api.add_resource(RecordsBatchResource, "/rest/databases/<database_name>/classes/<class_name>/records/batch")
 api.add_resource(RecordResource, "/rest/databases/<database_name>/classes/<class_name>/records/<record_id>")
 
 if __name__ == '__main__':
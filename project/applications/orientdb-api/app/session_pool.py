@@ -0,0 +1,120 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import contextlib
+import threading
+import time
+
+import pyorient
+
+
+class OpenSessionError(Exception):
+    """Session of a database could not be opened, e.g. because the database was dropped."""
+
+
+class _Session(object):
+    """Client with an open database session."""
+
+    def __init__(self, client):
+        self.client = client
+        self.last_used = time.time()
+
+
+class SessionPool(object):
+    """
+    Database sessions reused across requests. At most size sessions are open for each database, requests wait for
+    a free one. Sessions unused for idle_timeout seconds are closed.
+    """
+
+    def __init__(self, hostname, port, username, password, size, idle_timeout):
+        self._hostname = hostname
+        self._port = port
+        self._username = username
+        self._password = password
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle_sessions = {}
+        self._semaphores = {}
+
+    def _get_semaphore(self, database_name):
+        with self._lock:
+            if database_name not in self._semaphores:
+                self._semaphores[database_name] = threading.BoundedSemaphore(self._size)
+            return self._semaphores[database_name]
+
+    def _open(self, database_name):
+        client = pyorient.OrientDB(self._hostname, self._port)
+        client.db_open(database_name, self._username, self._password, pyorient.DB_TYPE_GRAPH)
+        return _Session(client)
+
+    @staticmethod
+    def _close(session):
+        try:
+            session.client.db_close()
+        except pyorient.PyOrientException:
+            pass
+
+    def _take_idle(self, database_name):
+        with self._lock:
+            idle_sessions = self._idle_sessions.get(database_name, [])
+            return idle_sessions.pop() if len(idle_sessions) > 0 else None
+
+    def evict_idle(self):
+        """Close sessions unused for longer than idle_timeout."""
+        expired = []
+        with self._lock:
+            for database_name, sessions in self._idle_sessions.items():
+                expired.extend(s for s in sessions if time.time() - s.last_used > self._idle_timeout)
+                sessions[:] = [s for s in sessions if s not in expired]
+        for session in expired:
+            self._close(session)
+
+    def close_all(self, database_name):
+        """Close idle sessions of a database, e.g. before it is dropped."""
+        with self._lock:
+            sessions = self._idle_sessions.pop(database_name, [])
+        for session in sessions:
+            self._close(session)
+
+    @contextlib.contextmanager
+    def session(self, database_name):
+        """Yield client with open session of the database. Session broken by a connection error is not reused."""
+        self.evict_idle()
+        semaphore = self._get_semaphore(database_name)
+        with semaphore:
+            session = self._take_idle(database_name)
+            if session is None:
+                try:
+                    session = self._open(database_name)
+                except pyorient.PyOrientException as e:
+                    raise OpenSessionError(str(e))
+            is_broken = False
+            try:
+                yield session.client
+            except pyorient.PyOrientConnectionException:
+                is_broken = True
+                raise
+            finally:
+                if is_broken:
+                    self._close(session)
+                else:
+                    self._release(database_name, session)
+
+    def _release(self, database_name, session):
+        session.last_used = time.time()
+        with self._lock:
+            self._idle_sessions.setdefault(database_name, []).append(session)
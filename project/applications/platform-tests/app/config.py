@@ -109,20 +109,31 @@ class RunnerConfig(_BaseConfig):
     required:
         CORE_ORG_NAME=<core_org_name>
         CORE_SPACE_NAME=<core_space_name>
+    optional:
+        MAX_CONCURRENT_SUITES=<number of suites run at the same time, capped by available cpus and memory>
+        MAX_QUEUE_LENGTH=<number of suites waiting for a free slot, above which new requests are rejected>
+        SUITE_MEMORY_MB=<memory reserved for one running suite>
     use only locally:
         LOCAL_INTERPRETER=<path to interpreter to use with run_tests.py>
     """
     CORE_ORG_NAME = "CORE_ORG_NAME"
     CORE_SPACE_NAME = "CORE_SPACE_NAME"
     LOCAL_INTERPRETER = "LOCAL_INTERPRETER"
+    MAX_CONCURRENT_SUITES = "MAX_CONCURRENT_SUITES"
+    MAX_QUEUE_LENGTH = "MAX_QUEUE_LENGTH"
+    SUITE_MEMORY_MB = "SUITE_MEMORY_MB"
     _default_config = {
         "core_org_name": "trustedanalytics",
         "core_space_name": "platform",
         "python_interpreter": "python3",
         "run_tests": "run_tests.py",
         "cwd": "project",
+        "tests_directory": "tests",
         "suite_name": "test_smoke/test_functional.py",
         "max_execution_time": 1800,  # 30 minutes
+        "max_concurrent_suites": 2,
+        "max_queue_length": 20,
+        "suite_memory_mb": 512,
     }
 
     def _parse_environment_variables(self) -> dict:
@@ -137,6 +148,10 @@ class RunnerConfig(_BaseConfig):
         local_interpreter = os.environ.get(self.LOCAL_INTERPRETER)
         if local_interpreter is not None:
             environment_config["python_interpreter"] = os.path.expanduser(local_interpreter)
+        for variable_name in (self.MAX_CONCURRENT_SUITES, self.MAX_QUEUE_LENGTH, self.SUITE_MEMORY_MB):
+            value = os.environ.get(variable_name)
+            if value is not None:
+                environment_config[variable_name.lower()] = int(value)
 
         return environment_config
 
@@ -18,22 +18,23 @@
 
 import json
 
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
 import flask
 import flask_restful
-import pymongo
 
-from config import AppConfig
+from config import AppConfig, RunnerConfig
 from console_authenticator import AuthenticationException, ConsoleAuthenticator
-from model import TestSuiteModel
-from runner import Runner
+from model import DatabaseClient, InvalidCursorException, TestSuiteModel
+from progress import InvalidResumeTokenException, ProgressStream
+from runner import QueueFullException, Runner
 
 
 app = flask.Flask(__name__)
-api = flask_restful.Api(app)
 
 
 app_config = AppConfig()
+runner_config = RunnerConfig()
 
 
 class ExceptionHandlingApi(flask_restful.Api):
@@ -52,33 +53,58 @@ class TestSuite(flask_restful.Resource):
     console_authenticator = ConsoleAuthenticator(tap_domain=app_config.tap_domain)
 
     def get(self):
-        """Return a list of test suites."""
-        all_suites = [s.to_dict() for s in TestSuiteModel.get_list()]
-        return flask.Response(json.dumps(all_suites), mimetype="application/json")
+        """
+        Return a list of test suites, the most recently started first, streamed as a JSON array.
+        Optional query parameters: limit - maximum number of suites, cursor - suiteId of the last suite from
+        the previous page. The cursor for the next page is returned in the X-Next-Cursor header.
+        """
+        limit = flask.request.args.get("limit", type=int)
+        cursor = flask.request.args.get("cursor")
+        if limit is not None and limit <= 0:
+            flask_restful.abort(400, message="Bad request")
+        try:
+            after = ObjectId(cursor) if cursor is not None else None
+            suites = TestSuiteModel.get_list(limit=limit, after=after) if limit is not None \
+                else TestSuiteModel.iter_list(after=after)
+        except (InvalidId, InvalidCursorException):
+            flask_restful.abort(400, message="Invalid cursor")
+        headers = {}
+        if limit is not None and len(suites) == limit:
+            headers["X-Next-Cursor"] = str(suites[-1].id)
+        return flask.Response(self._stream_json_list(suites), mimetype="application/json", headers=headers)
+
+    @staticmethod
+    def _stream_json_list(suites):
+        yield "["
+        for index, suite in enumerate(suites):
+            yield ("," if index > 0 else "") + json.dumps(suite.to_dict())
+        yield "]"
 
     def post(self):
         """
-        Check whether runner is busy
-        if so, return 429
-        else, call Runner.run
-        return suite id from Runner.run
+        Authenticate user, then call Runner.run to queue the requested suite (or the default one)
+        if the queue is full, return 429
+        return queued suite from Runner.run
         """
-        if self.runner.is_busy:
-            flask_restful.abort(429, message="Runner is busy")
-
-        username = password = None
+        username = password = suite_name = None
         try:
             request_body = json.loads(flask.request.data.decode())
             username = request_body["username"]
             password = request_body["password"]
-        except (ValueError, KeyError):
+            suite_name = request_body.get("suite")
+        except (ValueError, KeyError, AttributeError):
             flask_restful.abort(400, message="Bad request")
+        if suite_name is not None and not self.runner.is_suite_available(suite_name):
+            flask_restful.abort(400, message="Unknown suite {}".format(suite_name))
         try:
             self.console_authenticator.authenticate(username, password)
         except AuthenticationException:
             flask_restful.abort(401, message="Incorrect credentials")
 
-        new_suite = self.runner.run(username=username, password=password)
+        try:
+            new_suite = self.runner.run(username=username, password=password, suite_name=suite_name)
+        except QueueFullException:
+            flask_restful.abort(429, message="Runner queue is full")
         return flask.jsonify(new_suite.to_dict())
 
 
@@ -88,14 +114,44 @@ class TestSuiteResults(flask_restful.Resource):
         suite = None
         try:
             suite = TestSuiteModel.get_by_id(suite_id=ObjectId(suite_id))
-        except (pymongo.errors.InvalidId, TypeError):
+        except (InvalidId, TypeError):
             flask_restful.abort(404, message="Not found")
         return flask.jsonify(suite.to_dict())
 
 
-if __name__ == "__main__":
-    api = ExceptionHandlingApi(app, catch_all_404s=True)
-    api.add_resource(TestSuite, "/rest/platform_tests/testsuites")
-    api.add_resource(TestSuiteResults, "/rest/platform_tests/testsuites/<suite_id>/results")
+class TestSuiteEvents(flask_restful.Resource):
+    runner = TestSuite.runner
 
-    app.run(host=app_config.hostname, port=app_config.port, debug=app_config.debug)
+    def get(self, suite_id):
+        """
+        Stream progress of one test suite as server-sent events: new test results and output of the runner.
+        Resume after an event by passing its id in Last-Event-ID header or last_event_id query parameter.
+        """
+        suite = None
+        try:
+            suite_id = ObjectId(suite_id)
+            suite = TestSuiteModel.get_by_id(suite_id=suite_id, with_results=False)
+        except (InvalidId, TypeError):
+            flask_restful.abort(404, message="Not found")
+        resume_token = flask.request.headers.get("Last-Event-ID", flask.request.args.get("last_event_id"))
+        stream = None
+        try:
+            stream = ProgressStream(suite, output_log=self.runner.get_output_log(suite_id), resume_token=resume_token,
+                                    max_duration=runner_config.max_execution_time)
+        except InvalidResumeTokenException:
+            flask_restful.abort(400, message="Invalid resume token")
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return flask.Response(iter(stream), mimetype="text/event-stream", headers=headers)
+
+
+api = ExceptionHandlingApi(app, catch_all_404s=True)
+api.add_resource(TestSuite, "/rest/platform_tests/testsuites")
+api.add_resource(TestSuiteResults, "/rest/platform_tests/testsuites/<suite_id>/results")
+api.add_resource(TestSuiteEvents, "/rest/platform_tests/testsuites/<suite_id>/events")
+
+
+if __name__ == "__main__":
+    # development server, see gunicorn_config.py for production settings
+    DatabaseClient.ensure_indexes()
+    # event streams are long-lived requests
+    app.run(host=app_config.hostname, port=app_config.port, debug=app_config.debug, threaded=True)
@@ -28,9 +28,17 @@ class DatabaseClient(object):
     suite_collection = __database[__config.test_suite_collection]
     test_result_collection = __database[__config.test_result_collection]
 
+    @classmethod
+    def ensure_indexes(cls):
+        """Create indexes used by suite list and suite results queries, if they do not exist yet."""
+        cls.suite_collection.create_index([("start_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+        cls.test_result_collection.create_index([("run_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)])
+
 
 class TestResultModel(object):
     _collection = DatabaseClient.test_result_collection
+    # fields used by to_dict
+    PROJECTION = ["name", "order", "status", "components", "stacktrace"]
 
     def __init__(self, mongo_document: dict):
         """Initialize based on mongo_document dict representation."""
@@ -43,9 +51,20 @@ class TestResultModel(object):
         self.__components = mongo_document.get("components")
         self.__stacktrace = mongo_document.get("stacktrace")
 
+    @property
+    def id(self):
+        return self.__id
+
     @classmethod
-    def get_list_by_suite_id(cls, suite_id: ObjectId):
-        results = cls._collection.find({"run_id": suite_id})
+    def get_list_by_suite_id(cls, suite_id: ObjectId, after: ObjectId=None):
+        """
+        Query database and return results of a suite in order of insertion, optionally only those inserted
+        after result with id after.
+        """
+        query_filter = {"run_id": suite_id}
+        if after is not None:
+            query_filter["_id"] = {"$gt": after}
+        results = cls._collection.find(query_filter, projection=cls.PROJECTION, sort=[("_id", pymongo.ASCENDING)])
         test_results = []
         for test_result_document in results:
             test_results.append(cls(mongo_document=test_result_document))
@@ -67,6 +86,11 @@ class TestResultModel(object):
 class TestSuiteModel(object):
     _collection = DatabaseClient.suite_collection
     INTERRUPTED_KEY = "interrupted"
+    QUEUED_KEY = "queued"
+    FINISHED_KEY = "finished"
+    # fields used by to_dict
+    PROJECTION = ["start_date", "end_date", "status", "total_test_count", "test_count", INTERRUPTED_KEY, QUEUED_KEY]
+    SORT = [("start_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
 
     def __init__(self, mongo_document: dict, test_results: list=None):
         """Initialize based on mongo_document dict representation."""
@@ -87,6 +111,8 @@ class TestSuiteModel(object):
         state = mongo_document.get("status")
         if mongo_document.get("interrupted"):
             suite_state = "FAIL"
+        elif mongo_document.get("queued"):
+            suite_state = "QUEUED"
         elif state is None:
             suite_state = None
         elif mongo_document.get("end_date") is None:
@@ -100,13 +126,36 @@ class TestSuiteModel(object):
         return {"_id": suite_id}
 
     @classmethod
-    def initialize(cls):
+    def initialize(cls, queued=False):
         """
-        Insert new, empty document into suite collection.
+        Insert new, empty document into suite collection, optionally marked as waiting in the runner queue.
         Return TestSuiteModel with newly-inserted object id.
         """
-        suite_id = cls._collection.insert_one({}).inserted_id
-        return cls(mongo_document={"_id": suite_id})
+        suite_document = {cls.QUEUED_KEY: True} if queued else {}
+        suite_id = cls._collection.insert_one(suite_document).inserted_id
+        suite_document["_id"] = suite_id
+        return cls(mongo_document=suite_document)
+
+    def is_queued(self):
+        """
+        Query database. Return True if the test suite is still waiting in the runner queue.
+        """
+        suite_document = self._collection.find_one(self._get_filter(self.id))
+        return suite_document.get(self.QUEUED_KEY) is True
+
+    def is_finished(self):
+        """
+        Query database. Return True if the test suite has ended, or was interrupted.
+        """
+        suite_document = self._collection.find_one(self._get_filter(self.id))
+        return suite_document.get(self.FINISHED_KEY) is True or suite_document.get(self.INTERRUPTED_KEY) is True
+
+    def set_started(self):
+        """
+        Update test suite mongodb document, removing queued flag.
+        """
+        update_field = {"$unset": {self.QUEUED_KEY: ""}}
+        self._collection.update_one(self._get_filter(self.id), update=update_field)
 
     def is_interrupted(self):
         """
@@ -123,24 +172,45 @@ class TestSuiteModel(object):
         self._collection.update_one(self._get_filter(self.id), update=update_field)
 
     @classmethod
-    def get_by_id(cls, suite_id: ObjectId):
+    def get_by_id(cls, suite_id: ObjectId, with_results=True):
         """
-        Query database and return suite with given suite_id together with detailed test results.
+        Query database and return suite with given suite_id, by default together with detailed test results.
         """
-        suite = cls._collection.find_one(cls._get_filter(suite_id))
-        test_results = TestResultModel.get_list_by_suite_id(suite_id)
+        suite = cls._collection.find_one(cls._get_filter(suite_id), projection=cls.PROJECTION)
+        test_results = TestResultModel.get_list_by_suite_id(suite_id) if with_results else None
         return cls(mongo_document=suite, test_results=test_results)
 
     @classmethod
-    def get_list(cls):
+    def _get_page_filter(cls, after: ObjectId):
+        """
+        Filter selecting suites which come after suite with id after, in SORT order.
+        """
+        last_suite = cls._collection.find_one(cls._get_filter(after), projection=["start_date"])
+        if last_suite is None:
+            raise InvalidCursorException(after)
+        start_date = last_suite.get("start_date")
+        same_start_date = {"start_date": start_date, "_id": {"$lt": after}}
+        if start_date is None:
+            return same_start_date
+        return {"$or": [{"start_date": {"$lt": start_date}}, {"start_date": None}, same_start_date]}
+
+    @classmethod
+    def iter_list(cls, limit: int=None, after: ObjectId=None):
         """
-        Query database and return all suites.
+        Query database and return iterator over suites, the most recently started first.
+        Return at most limit suites, starting after suite with id after (suite id is the pagination cursor).
         """
-        suite_documents = cls._collection.find()
-        suites = []
-        for suite_document in suite_documents:
-            suites.append(cls(mongo_document=suite_document))
-        return suites
+        query_filter = {} if after is None else cls._get_page_filter(after)
+        suite_documents = cls._collection.find(query_filter, projection=cls.PROJECTION, sort=cls.SORT,
+                                               limit=limit or 0)
+        return (cls(mongo_document=suite_document) for suite_document in suite_documents)
+
+    @classmethod
+    def get_list(cls, limit: int=None, after: ObjectId=None):
+        """
+        Query database and return suites, the most recently started first.
+        """
+        return list(cls.iter_list(limit=limit, after=after))
 
     def to_dict(self):
         result = {
@@ -155,3 +225,9 @@ class TestSuiteModel(object):
             result["tests"] = [t.to_dict() for t in self.__test_results]
         result = {x: y for x, y in result.items() if y is not None}
         return result
+
+
+class InvalidCursorException(Exception):
+
+    def __init__(self, suite_id):
+        super().__init__("Suite {} does not exist".format(suite_id))
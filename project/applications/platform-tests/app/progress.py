@@ -0,0 +1,197 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import collections
+import json
+import threading
+import time
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+import pymongo
+
+from model import TestResultModel, TestSuiteModel
+
+
+class OutputLog(object):
+    """
+    Output lines of a running suite, shared between the runner slot writing them and streams reading them.
+    Only the last max_lines lines are kept, each line has its number, so that readers can resume.
+    """
+
+    def __init__(self, max_lines=10000):
+        self._lines = collections.deque(maxlen=max_lines)
+        self._line_count = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def closed(self):
+        with self._condition:
+            return self._closed
+
+    def append(self, line):
+        with self._condition:
+            self._line_count += 1
+            self._lines.append((self._line_count, line))
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def get_since(self, line_number, timeout):
+        """Return list of (line number, line) after line_number, waiting up to timeout for new lines."""
+        with self._condition:
+            if self._line_count <= line_number and not self._closed:
+                self._condition.wait(timeout)
+            return [(number, line) for number, line in self._lines if number > line_number]
+
+
+class TestResultFeed(object):
+    """
+    Test results of a suite, in order of insertion. New results are read from a change stream if the database
+    supports it, otherwise by querying for results inserted after the last one seen.
+    """
+
+    def __init__(self, suite_id: ObjectId, after: ObjectId=None):
+        self._suite_id = suite_id
+        self.last_id = after
+        self._change_stream = self._open_change_stream()
+
+    def _open_change_stream(self):
+        pipeline = [{"$match": {"operationType": "insert", "fullDocument.run_id": self._suite_id}}]
+        try:
+            # older pymongo returns sub-collection "watch", which is not callable
+            return TestResultModel._collection.watch(pipeline)
+        except (TypeError, NotImplementedError, pymongo.errors.PyMongoError):
+            return None
+
+    def _query_new(self):
+        return TestResultModel.get_list_by_suite_id(self._suite_id, after=self.last_id)
+
+    def _read_change_stream(self):
+        results = []
+        try:
+            change = self._change_stream.try_next()
+            while change is not None:
+                document = change["fullDocument"]
+                if self.last_id is None or document["_id"] > self.last_id:
+                    results.append(TestResultModel(mongo_document=document))
+                change = self._change_stream.try_next()
+        except pymongo.errors.PyMongoError:
+            self.close()
+            return self._query_new()
+        return results
+
+    def get_new(self):
+        """Return list of results inserted since the previous call."""
+        if self._change_stream is None or self.last_id is None:
+            # results inserted before the stream was opened are not in the stream
+            results = self._query_new()
+        else:
+            results = self._read_change_stream()
+        if len(results) > 0:
+            self.last_id = results[-1].id
+        return results
+
+    def close(self):
+        if self._change_stream is not None:
+            self._change_stream.close()
+            self._change_stream = None
+
+
+class InvalidResumeTokenException(Exception):
+
+    def __init__(self, token):
+        super().__init__("Invalid resume token {}".format(token))
+
+
+class ProgressStream(object):
+    """
+    Server-sent events with progress of a suite: "result" for each new test result, "output" for each
+    new line of runner output and "end" with the suite summary, when the suite is finished.
+    Id of each event is a resume token - pass it in Last-Event-ID header to continue after that event.
+    """
+    HEARTBEAT_INTERVAL = 15
+
+    def __init__(self, suite: TestSuiteModel, output_log: OutputLog=None, resume_token: str=None,
+                 poll_interval=2, max_duration=None):
+        self._suite = suite
+        self._output_log = output_log
+        self._last_result_id, self._last_line = self.parse_resume_token(resume_token)
+        self._poll_interval = poll_interval
+        self._max_duration = max_duration
+
+    @staticmethod
+    def parse_resume_token(token):
+        """Token has form <id of last test result>:<number of last output line>, result id can be empty."""
+        if token is None:
+            return None, 0
+        try:
+            result_id, line_number = token.split(":")
+            return ObjectId(result_id) if result_id != "" else None, int(line_number)
+        except (ValueError, InvalidId):
+            raise InvalidResumeTokenException(token)
+
+    @property
+    def resume_token(self):
+        return "{}:{}".format(self._last_result_id or "", self._last_line)
+
+    def _event(self, event_name, data):
+        return "id: {}\nevent: {}\ndata: {}\n\n".format(self.resume_token, event_name, json.dumps(data))
+
+    def _is_finished(self):
+        """Suite run by this instance is finished when its process ends, otherwise rely on the suite document."""
+        if self._output_log is not None:
+            return self._output_log.closed
+        return self._suite.is_finished()
+
+    def __iter__(self):
+        feed = TestResultFeed(self._suite.id, after=self._last_result_id)
+        start_time = last_event_time = time.time()
+        last_query_time = 0
+        try:
+            while self._max_duration is None or time.time() - start_time < self._max_duration:
+                # check before reading, so that nothing written just before the suite finished is missed
+                is_finished = self._is_finished()
+                events = []
+                # output may come faster than poll interval, do not query the database on each line
+                if is_finished or time.time() - last_query_time >= self._poll_interval:
+                    last_query_time = time.time()
+                    for result in feed.get_new():
+                        self._last_result_id = result.id
+                        events.append(self._event("result", result.to_dict()))
+                if self._output_log is not None:
+                    for line_number, line in self._output_log.get_since(self._last_line, self._poll_interval):
+                        self._last_line = line_number
+                        events.append(self._event("output", {"line": line}))
+                if len(events) == 0 and not is_finished and self._output_log is None:
+                    time.sleep(self._poll_interval)
+                for event in events:
+                    yield event
+                if is_finished:
+                    suite = TestSuiteModel.get_by_id(self._suite.id, with_results=False)
+                    yield self._event("end", suite.to_dict())
+                    return
+                if len(events) > 0:
+                    last_event_time = time.time()
+                elif time.time() - last_event_time > self.HEARTBEAT_INTERVAL:
+                    last_event_time = time.time()
+                    yield ":\n\n"
+        finally:
+            feed.close()
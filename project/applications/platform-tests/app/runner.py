@@ -14,17 +14,17 @@
 # limitations under the License.
 #
 
-import ctypes
+import collections
 import logging
-import multiprocessing
 import os
-import signal
+import queue
 import subprocess
 import sys
-import time
+import threading
 
 from config import RunnerConfig, DatabaseConfig
 from model import TestSuiteModel
+from progress import OutputLog
 
 
 logging.basicConfig(stream=sys.stdout)
@@ -32,10 +32,40 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 
+def _get_available_memory_mb():
+    """Return memory limit of the container, or physical memory if there is no limit."""
+    for limit_path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(limit_path) as limit_file:
+                limit = limit_file.read().strip()
+        except OSError:
+            continue
+        if limit.isdigit() and int(limit) < os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"):
+            return int(limit) // 2 ** 20
+    return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2 ** 20
+
+
+class QueueFullException(Exception):
+    pass
+
+
+class _Job(object):
+    def __init__(self, suite: TestSuiteModel, command: list, output_log: OutputLog):
+        self.suite = suite
+        self.command = command
+        self.output_log = output_log
+
+
 class Runner(object):
+    """
+    Queue of test suites. Suites are run in separate processes, in as many slots as configured, but not more than
+    available cpus and memory allow.
+    """
     _instance = None
     _config = RunnerConfig()
     _db_config = DatabaseConfig()
+    # output of this many most recent suites is kept in memory
+    MAX_OUTPUT_LOGS = 20
 
     def __new__(cls):
         if cls._instance is None:
@@ -43,80 +73,133 @@ class Runner(object):
         return cls._instance
 
     def __init__(self):
-        self._is_busy = multiprocessing.Value(ctypes.c_bool, False)
-        self._pid = multiprocessing.Value(ctypes.c_int, -1)
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
         self._test_cwd = self._config.cwd
-        self._current_suite = None
-        self._username = None
-        self._password = None
-        self._start_time = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_count = 0
+        self._running_count = 0
+        self._output_logs = collections.OrderedDict()
+        self.slot_count = self._get_slot_count()
+        logger.info("Running up to {} suites at the same time".format(self.slot_count))
+        for _ in range(self.slot_count):
+            threading.Thread(target=self._slot_worker, daemon=True).start()
+
+    def _get_slot_count(self):
+        memory_slots = _get_available_memory_mb() // self._config.suite_memory_mb
+        return max(1, min(self._config.max_concurrent_suites, os.cpu_count() or 1, memory_slots))
 
     @property
     def is_busy(self):
-        self._ensure_max_execution_time_not_exceeded()
-        return self._is_busy.value
+        """True if any suite is running or waiting in the queue."""
+        with self._lock:
+            return self._pending_count > 0
 
     @property
-    def command(self):
+    def queue_length(self):
+        with self._lock:
+            return self._pending_count - self._running_count
+
+    def get_output_log(self, suite_id):
+        """Return OutputLog of a suite queued by this runner, None if it is unknown or too old."""
+        with self._lock:
+            return self._output_logs.get(suite_id)
+
+    def is_suite_available(self, suite_name):
+        """Check that suite_name is a path to existing tests, inside tests directory."""
+        if not isinstance(suite_name, str):
+            return False
+        suite_path = os.path.normpath(suite_name)
+        if os.path.isabs(suite_path) or suite_path.split(os.sep)[0] == os.pardir:
+            return False
+        return os.path.exists(os.path.join(self._test_cwd, self._config.tests_directory, suite_path))
+
+    def _get_command(self, suite_id, suite_name, username, password):
         return [
             self._config.python_interpreter,
             self._config.run_tests,
             "-e", self._config.tap_domain,
-            "-s", self._config.suite_name,
-            "--admin-username", self._username,
-            "--admin-password", self._password,
+            "-s", suite_name,
+            "--admin-username", username,
+            "--admin-password", password,
             "--reference-org", self._config.core_org_name,
             "--reference-space", self._config.core_space_name,
             "--database-url", self._db_config.uri,
-            "--test-run-id", str(self._current_suite.id)
+            "--test-run-id", str(suite_id)
         ]
 
-    def run(self, username, password):
+    def run(self, username, password, suite_name=None):
         """
-        Get new suite id, set current_suite_id. Start tests in a separate process.
-        Return suite id.
+        Create new queued suite and put it in the queue. Tests are started as soon as a slot is free.
+        Raise QueueFullException if there are already max_queue_length suites waiting.
+        Return suite.
         """
-        self._username = username
-        self._password = password
-        self._current_suite = TestSuiteModel.initialize()
-        self._is_busy.value = True
-        self._start_time = time.time()
-        multiprocessing.Process(target=self._worker).start()
-        return self._current_suite
-
-    def _ensure_max_execution_time_not_exceeded(self):
-        if self._is_busy.value and time.time() - self._start_time > self._config.max_execution_time:
-            logger.warning("Killing subprocess {}".format(self._pid.value))
-            os.kill(self._pid.value, signal.SIGKILL)
-            self._is_busy.value = False
-
-    def _worker(self):
+        if suite_name is None:
+            suite_name = self._config.suite_name
+        with self._lock:
+            if self._pending_count - self._running_count >= self._config.max_queue_length:
+                raise QueueFullException()
+            self._pending_count += 1
+        suite = TestSuiteModel.initialize(queued=True)
+        command = self._get_command(suite.id, suite_name, username, password)
+        output_log = OutputLog()
+        with self._lock:
+            self._output_logs[suite.id] = output_log
+            while len(self._output_logs) > self.MAX_OUTPUT_LOGS:
+                self._output_logs.popitem(last=False)
+        self._queue.put(_Job(suite=suite, command=command, output_log=output_log))
+        return suite
+
+    def _slot_worker(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._running_count += 1
+            try:
+                self._run_job(job)
+            finally:
+                with self._lock:
+                    self._running_count -= 1
+                    self._pending_count -= 1
+
+    @staticmethod
+    def _kill(process):
+        logger.warning("Killing subprocess {}".format(process.pid))
+        process.kill()
+
+    def _run_job(self, job):
         """
-        Run tests in a subprocess.
+        Run tests in a subprocess, killing it after max_execution_time.
         If the subprocess' exit code is not 0, or the process failed to start,
         set suite status to interrupted.
-        Mark that the runner is not busy.
         """
         try:
-            logger.info("Running command {}".format(" ".join(self.command)))
-            process = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            job.suite.set_started()
+            logger.info("Running command {}".format(" ".join(job.command)))
+            process = subprocess.Popen(job.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                                        universal_newlines=True, cwd=self._test_cwd)
-            self._pid.value = process.pid
-            while True:
-                output = process.stdout.readline().strip()
-                if output == "" and process.poll() is not None:
-                    break
-                if output != "":
-                    logger.info(output)
-                    sys.stdout.flush()
+            timer = threading.Timer(self._config.max_execution_time, self._kill, args=(process,))
+            timer.start()
+            try:
+                while True:
+                    output = process.stdout.readline().strip()
+                    if output == "" and process.poll() is not None:
+                        break
+                    if output != "":
+                        logger.info(output)
+                        sys.stdout.flush()
+                        job.output_log.append(output)
+            finally:
+                timer.cancel()
 
             return_code = process.poll()
             if return_code != 0:
-                self._current_suite.set_interrupted()
+                job.suite.set_interrupted()
                 logger.error("Subprocess failed with exit code {}".format(return_code))
         except:
-            self._current_suite.set_interrupted()
+            job.suite.set_interrupted()
             logger.error(sys.exc_info()[0])
         finally:
-            self._is_busy.value = False
-
+            job.output_log.close()
@@ -0,0 +1,34 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Gunicorn settings for Cloud Foundry.
+Number of workers is WEB_CONCURRENCY, 1 by default. Suite queue and runner output are kept in memory of the process, so
+with more workers each of them would see only its own part. Each worker runs THREADS threads (8 by default).
+"""
+
+import os
+
+
+bind = "0.0.0.0:{}".format(os.environ.get("PORT", os.environ.get("VCAP_APP_PORT", 8080)))
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+threads = int(os.environ.get("THREADS", 8))
+worker_class = "gthread" if threads > 1 else "sync"
+
+
+def post_worker_init(worker):
+    from model import DatabaseClient
+    DatabaseClient.ensure_indexes()
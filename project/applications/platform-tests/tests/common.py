@@ -24,7 +24,7 @@ def set_environment_for_config():
     os.environ["VCAP_APPLICATION"] = json.dumps({"uris": ["dummy.gotapaas.eu"]})
 
 
-def get_example_run_document(status="pass", end_date="2016-04-01T15:42:01.971197", interrupted=False):
+def get_example_run_document(status="pass", end_date="2016-04-01T15:42:01.971197", interrupted=False, queued=False):
     result = {
         "_id": ObjectId(),
         "environment_version": None,
@@ -43,6 +43,8 @@ def get_example_run_document(status="pass", end_date="2016-04-01T15:42:01.971197
     }
     if interrupted:
         result["interrupted"] = True
+    if queued:
+        result["queued"] = True
     return result
 
 def get_example_test_document(run_id, status="pass"):
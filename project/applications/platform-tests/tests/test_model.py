@@ -21,7 +21,7 @@ import mongomock
 import pytest
 
 from . import common
-from app.model import TestSuiteModel, TestResultModel
+from app.model import InvalidCursorException, TestSuiteModel, TestResultModel
 
 
 mock_suite_collection = mongomock.MongoClient().db.collection
@@ -32,7 +32,8 @@ mock_test_collection = mongomock.MongoClient().db.collection
                          [({}, "PASS"),
                           ({"status": "fail"}, "FAIL"),
                           ({"end_date": None}, "IN_PROGRESS"),
-                          ({"interrupted": True}, "FAIL")])
+                          ({"interrupted": True}, "FAIL"),
+                          ({"queued": True}, "QUEUED")])
 def test_test_suite_model_init(document_params, expected_state):
     mock_document = common.get_example_run_document(**document_params)
     test_suite_model_dict = TestSuiteModel(mock_document).to_dict()
@@ -52,6 +53,15 @@ def test_initialize_suite():
     assert len(suite_list) == 1
 
 
+@mock.patch.object(TestSuiteModel, "_collection", mock_suite_collection)
+def test_initialize_queued_suite():
+    suite_model = TestSuiteModel.initialize(queued=True)
+    assert suite_model.to_dict()["state"] == "QUEUED"
+    assert suite_model.is_queued()
+    suite_model.set_started()
+    assert not suite_model.is_queued()
+
+
 @mock.patch.object(TestSuiteModel, "_collection", mock_suite_collection)
 def test_get_list_one_suite(single_suite_document_id):
     suite_list = TestSuiteModel.get_list()
@@ -63,7 +73,33 @@ def test_get_list_one_suite(single_suite_document_id):
 def test_get_list_multiple_suites(five_suite_document_ids):
     suite_list = TestSuiteModel.get_list()
     assert len(suite_list) == len(five_suite_document_ids)
-    assert [s.id for s in suite_list] == five_suite_document_ids
+    assert [s.id for s in suite_list] == five_suite_document_ids[::-1]
+
+
+@mock.patch.object(TestSuiteModel, "_collection", mock_suite_collection)
+def test_get_list_sorted_by_start_date():
+    start_dates = ["2016-04-02T10:00:00", None, "2016-04-03T10:00:00", "2016-04-01T10:00:00"]
+    for start_date in start_dates:
+        run_document = common.get_example_run_document()
+        run_document["start_date"] = start_date
+        mock_suite_collection.insert_one(run_document)
+    suite_list = TestSuiteModel.get_list()
+    assert [s.to_dict().get("startDate") for s in suite_list] == [start_dates[i] for i in (2, 0, 3, 1)]
+
+
+@mock.patch.object(TestSuiteModel, "_collection", mock_suite_collection)
+def test_get_list_pages(five_suite_document_ids):
+    first_page = TestSuiteModel.get_list(limit=2)
+    second_page = TestSuiteModel.get_list(limit=2, after=first_page[-1].id)
+    last_page = TestSuiteModel.get_list(limit=2, after=second_page[-1].id)
+    page_ids = [s.id for s in first_page + second_page + last_page]
+    assert page_ids == five_suite_document_ids[::-1]
+
+
+@mock.patch.object(TestSuiteModel, "_collection", mock_suite_collection)
+def test_get_list_invalid_cursor(five_suite_document_ids):
+    with pytest.raises(InvalidCursorException):
+        TestSuiteModel.get_list(limit=2, after=ObjectId())
 
 
 @mock.patch.object(TestSuiteModel, "_collection", mock_suite_collection)
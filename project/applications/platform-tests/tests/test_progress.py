@@ -0,0 +1,86 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+from unittest import mock
+
+import mongomock
+import pytest
+
+from . import common
+from app.progress import InvalidResumeTokenException, OutputLog, ProgressStream, TestSuiteModel
+
+
+mock_suite_collection = mongomock.MongoClient().db.suite_collection
+mock_test_collection = mongomock.MongoClient().db.test_collection
+
+
+def test_output_log_get_since():
+    output_log = OutputLog(max_lines=2)
+    for line in ["a", "b", "c"]:
+        output_log.append(line)
+    assert output_log.get_since(0, timeout=0) == [(2, "b"), (3, "c")]
+    assert output_log.get_since(2, timeout=0) == [(3, "c")]
+
+
+def test_output_log_waits_for_new_lines():
+    output_log = OutputLog()
+    threading.Timer(0.5, output_log.append, args=("a",)).start()
+    assert output_log.get_since(0, timeout=5) == [(1, "a")]
+
+
+@pytest.mark.parametrize("token, expected", [(None, (None, 0)), (":3", (None, 3))])
+def test_parse_resume_token(token, expected):
+    assert ProgressStream.parse_resume_token(token) == expected
+
+
+@pytest.mark.parametrize("token", ["abc", "abc:1", ":x"])
+def test_parse_invalid_resume_token(token):
+    with pytest.raises(InvalidResumeTokenException):
+        ProgressStream.parse_resume_token(token)
+
+
+@mock.patch("progress.TestSuiteModel._collection", mock_suite_collection)
+@mock.patch("progress.TestResultModel._collection", mock_test_collection)
+def test_progress_stream_of_running_suite(suite):
+    output_log = OutputLog()
+    output_log.append("collected 1 item")
+    mock_test_collection.insert_one(common.get_example_test_document(suite.id))
+    output_log.close()
+    events = list(ProgressStream(suite, output_log=output_log, poll_interval=0))
+    assert [e.split("\n")[1] for e in events] == ["event: result", "event: output", "event: end"]
+
+
+@mock.patch("progress.TestSuiteModel._collection", mock_suite_collection)
+@mock.patch("progress.TestResultModel._collection", mock_test_collection)
+def test_progress_stream_resume(suite):
+    test_documents = [common.get_example_test_document(suite.id) for _ in range(3)]
+    for test_document in test_documents:
+        mock_test_collection.insert_one(test_document)
+    mock_suite_collection.update_one({"_id": suite.id}, {"$set": {"finished": True}})
+    resume_token = "{}:0".format(test_documents[0]["_id"])
+    events = list(ProgressStream(suite, resume_token=resume_token, poll_interval=0))
+    assert [e.split("\n")[0] for e in events[:-1]] == ["id: {}:0".format(d["_id"]) for d in test_documents[1:]]
+
+
+@pytest.fixture(scope="function")
+def suite(request):
+    def fin():
+        mock_suite_collection.delete_many({})
+        mock_test_collection.delete_many({})
+    request.addfinalizer(fin)
+    suite_id = mock_suite_collection.insert_one(common.get_example_run_document(end_date=None)).inserted_id
+    return TestSuiteModel(mongo_document={"_id": suite_id})
@@ -19,26 +19,35 @@ from unittest import mock
 
 from bson.objectid import ObjectId
 import mongomock
+import pytest
 
 from . import common
 
 common.set_environment_for_config()
-from app.runner import Runner
+from app.runner import QueueFullException, Runner
+
+
+@pytest.fixture(scope="function", autouse=True)
+def test_cwd(request, tmpdir):
+    patcher = mock.patch.object(Runner(), "_test_cwd", str(tmpdir))
+    patcher.start()
+    request.addfinalizer(patcher.stop)
+    return str(tmpdir)
 
 
 @mock.patch("runner.TestSuiteModel._collection", mongomock.MongoClient().db.collection)
 def test_runner_run_successful_command():
-    with mock.patch.object(Runner, "command") as mock_command:
-        mock_command.__get__ = mock.Mock(return_value=["pwd"])
-        suite = Runner().run("username", "password")
+    with mock.patch.object(Runner, "_get_command", return_value=["pwd"]):
+        runner = Runner()
+        suite = runner.run("username", "password")
         assert isinstance(suite.id, ObjectId)
+        wait_until_runner_is_not_busy(runner)
         assert suite.is_interrupted() is False
 
 
 @mock.patch("runner.TestSuiteModel._collection", mongomock.MongoClient().db.collection)
 def test_runner_run_unsuccessful_command():
-    with mock.patch.object(Runner, "command") as mock_command:
-        mock_command.__get__ = mock.Mock(return_value=["python", "-c", "[][0]"])
+    with mock.patch.object(Runner, "_get_command", return_value=["python", "-c", "[][0]"]):
         runner = Runner()
         suite = runner.run("username", "password")
         wait_until_runner_is_not_busy(runner)
@@ -48,8 +57,7 @@ def test_runner_run_unsuccessful_command():
 mock_collection = mongomock.MongoClient().db.collection
 @mock.patch("runner.TestSuiteModel._collection", mock_collection)
 def test_runner_run_non_existing_command():
-    with mock.patch.object(Runner, "command") as mock_command:
-        mock_command.__get__ = mock.Mock(return_value=["idontexist"])
+    with mock.patch.object(Runner, "_get_command", return_value=["idontexist"]):
         runner = Runner()
         suite = runner.run("username", "password")
         wait_until_runner_is_not_busy(runner)
@@ -60,8 +68,7 @@ def test_runner_run_non_existing_command():
 @mock.patch("runner.TestSuiteModel._collection", mongomock.MongoClient().db.collection)
 def test_runner_reports_it_is_busy():
     sleep_time = 3
-    with mock.patch.object(Runner, "command") as mock_command:
-        mock_command.__get__ = mock.Mock(return_value=["sleep", str(sleep_time)])
+    with mock.patch.object(Runner, "_get_command", return_value=["sleep", str(sleep_time)]):
         runner = Runner()
         runner.run("username", "password")
         assert runner.is_busy
@@ -69,6 +76,37 @@ def test_runner_reports_it_is_busy():
         assert not runner.is_busy
 
 
+@mock.patch("runner.TestSuiteModel._collection", mongomock.MongoClient().db.collection)
+def test_runner_queues_suites_above_slot_count():
+    runner = Runner()
+    with mock.patch.object(Runner, "_get_command", return_value=["sleep", "2"]):
+        suites = [runner.run("username", "password") for _ in range(runner.slot_count + 1)]
+        time.sleep(1)
+        assert [s.is_queued() for s in suites] == [False] * runner.slot_count + [True]
+        assert runner.queue_length == 1
+        wait_until_runner_is_not_busy(runner, timeout=6)
+        assert not suites[-1].is_queued()
+
+
+@mock.patch("runner.TestSuiteModel._collection", mongomock.MongoClient().db.collection)
+def test_runner_rejects_suites_when_queue_is_full():
+    runner = Runner()
+    max_queue_length = Runner._config.max_queue_length
+    with mock.patch.object(Runner, "_get_command", return_value=["sleep", "1"]), \
+            mock.patch.dict(Runner._config._config, max_queue_length=0):
+        with pytest.raises(QueueFullException):
+            runner.run("username", "password")
+    assert Runner._config.max_queue_length == max_queue_length
+    assert not runner.is_busy
+
+
+@pytest.mark.parametrize("suite_name, expected", [("test_smoke", True), ("../app", False), ("/tmp", False),
+                                                  (None, False), ("not_existing_suite", False)])
+def test_runner_suite_availability(suite_name, expected, tmpdir):
+    tmpdir.mkdir("tests").mkdir("test_smoke")
+    assert Runner().is_suite_available(suite_name) is expected
+
+
 def wait_until_runner_is_not_busy(runner, timeout=3):
     start = time.time()
     while time.time() - start < timeout:
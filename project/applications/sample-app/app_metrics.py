@@ -0,0 +1,161 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Request metrics of a Flask application: per-route request counts, latency histograms and in-flight gauges, exposed
+as json on /metrics. Every sample app is pushed from its own directory, so each of them has a copy of this module -
+keep the copies identical.
+"""
+
+import threading
+import time
+
+import flask
+from werkzeug.wsgi import ClosingIterator
+
+
+ROUTE_ENVIRON_KEY = "app_metrics.route"
+UNMATCHED_ROUTE = "<unmatched>"
+# upper bounds of latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class RouteMetrics(object):
+
+    def __init__(self):
+        self.count = 0
+        self.in_flight = 0
+        self.statuses = {}
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, status, duration):
+        self.count += 1
+        status_class = "{}xx".format(status // 100)
+        self.statuses[status_class] = self.statuses.get(status_class, 0) + 1
+        self.latency_sum += duration
+        self.latency_max = max(self.latency_max, duration)
+        for index, upper_bound in enumerate(LATENCY_BUCKETS):
+            if duration <= upper_bound:
+                self.latency_buckets[index] += 1
+                break
+
+    def to_dict(self):
+        # cumulative counts of requests not slower than the bucket upper bound
+        cumulative_count = 0
+        buckets = {}
+        for upper_bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            cumulative_count += count
+            buckets["+Inf" if upper_bound == float("inf") else str(upper_bound)] = cumulative_count
+        return {
+            "count": self.count,
+            "in_flight": self.in_flight,
+            "statuses": self.statuses,
+            "latency": {"sum": self.latency_sum, "max": self.latency_max, "buckets": buckets}
+        }
+
+
+class Metrics(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._in_flight = 0
+        self._routes = {}
+
+    def _get_route(self, route):
+        if route not in self._routes:
+            self._routes[route] = RouteMetrics()
+        return self._routes[route]
+
+    def request_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def route_started(self, route):
+        with self._lock:
+            self._get_route(route).in_flight += 1
+
+    def request_finished(self, route, status, duration, is_route_started):
+        with self._lock:
+            self._in_flight -= 1
+            route_metrics = self._get_route(route)
+            if is_route_started:
+                route_metrics.in_flight -= 1
+            route_metrics.observe(status, duration)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "uptime": time.time() - self._start_time,
+                "in_flight": self._in_flight,
+                "routes": {route: metrics.to_dict() for route, metrics in self._routes.items()}
+            }
+
+
+class MetricsMiddleware(object):
+    """
+    Wsgi middleware measuring each request until its response body is sent - also for streamed responses.
+    Route of the request is put in the environ by the application, see install.
+    """
+
+    def __init__(self, wsgi_app, metrics, excluded_paths=()):
+        self._wsgi_app = wsgi_app
+        self._metrics = metrics
+        self._excluded_paths = excluded_paths
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") in self._excluded_paths:
+            return self._wsgi_app(environ, start_response)
+        start_time = time.time()
+        status = [500]
+        self._metrics.request_started()
+
+        def _start_response(status_line, headers, exc_info=None):
+            status[0] = int(status_line.split(" ", 1)[0])
+            return start_response(status_line, headers, exc_info)
+
+        def _finish():
+            route = environ.get(ROUTE_ENVIRON_KEY)
+            default_route = "{} {}".format(environ.get("REQUEST_METHOD"), UNMATCHED_ROUTE)
+            self._metrics.request_finished(route or default_route, status[0], time.time() - start_time,
+                                           is_route_started=route is not None)
+
+        try:
+            response = self._wsgi_app(environ, _start_response)
+        except Exception:
+            _finish()
+            raise
+        return ClosingIterator(response, [_finish])
+
+
+def install(app, path="/metrics"):
+    """Measure requests of Flask app and expose the metrics on path. Return Metrics."""
+    metrics = Metrics()
+
+    @app.before_request
+    def _start_route():
+        if flask.request.path == path:
+            return
+        url_rule = flask.request.url_rule
+        route = "{} {}".format(flask.request.method, url_rule.rule if url_rule is not None else UNMATCHED_ROUTE)
+        flask.request.environ[ROUTE_ENVIRON_KEY] = route
+        metrics.route_started(route)
+
+    app.add_url_rule(path, "app_metrics", lambda: flask.jsonify(metrics.to_dict()))
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics, excluded_paths=(path,))
+    return metrics
@@ -19,8 +19,11 @@
 import flask
 import os
 
+import app_metrics
+
 
 app = flask.Flask(__name__)
+app_metrics.install(app)
 
 
 @app.route("/")
@@ -0,0 +1,111 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import sys
+
+import flask
+import pytest
+from werkzeug.test import EnvironBuilder
+
+
+APPLICATIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# each sample app is pushed from its own directory, so each has a copy of app_metrics
+APP_METRICS_PATHS = [os.path.join(APPLICATIONS_DIR, *path) for path in (("sample-app", "app_metrics.py"),
+                                                                         ("mongodb-api", "app", "app_metrics.py"),
+                                                                         ("orientdb-api", "app", "app_metrics.py"))]
+sys.path.insert(0, os.path.dirname(APP_METRICS_PATHS[0]))
+
+import app_metrics  # noqa: E402
+
+
+def test_app_metrics_copies_are_identical():
+    contents = []
+    for path in APP_METRICS_PATHS:
+        with open(path, "rb") as f:
+            contents.append(f.read())
+    assert contents[1:] == contents[:1] * (len(contents) - 1)
+
+
+class TestAppMetrics:
+
+    @pytest.fixture
+    def app(self):
+        app = flask.Flask(__name__)
+
+        @app.route("/items/<int:item_id>")
+        def get_item(item_id):
+            return str(item_id)
+
+        @app.route("/items", methods=["POST"])
+        def add_item():
+            flask.abort(500)
+
+        @app.route("/stream")
+        def stream():
+            return flask.Response(str(i) for i in range(3))
+
+        return app
+
+    @staticmethod
+    def _start_request(app, path):
+        """Call the app directly, so that the response iterator is closed only when the test closes it."""
+        statuses = []
+        response = app.wsgi_app(EnvironBuilder(path=path).get_environ(), lambda status, headers, *args:
+                                statuses.append(status))
+        return response, statuses
+
+    def test_requests_are_counted_by_route_and_status_class(self, app):
+        metrics = app_metrics.install(app)
+        client = app.test_client()
+        # test client closes response iterator, which finishes the request, only when the response is closed
+        for response in (client.get("/items/1"), client.get("/items/2"), client.post("/items"),
+                         client.get("/not/found")):
+            response.close()
+        routes = metrics.to_dict()["routes"]
+        assert sorted(routes) == ["GET /items/<int:item_id>", "GET <unmatched>", "POST /items"]
+        assert routes["GET /items/<int:item_id>"]["count"] == 2
+        assert routes["GET /items/<int:item_id>"]["statuses"] == {"2xx": 2}
+        assert routes["POST /items"]["statuses"] == {"5xx": 1}
+        assert routes["GET <unmatched>"]["statuses"] == {"4xx": 1}
+        assert routes["GET /items/<int:item_id>"]["latency"]["buckets"]["+Inf"] == 2
+        assert all(route["in_flight"] == 0 for route in routes.values())
+        assert metrics.to_dict()["in_flight"] == 0
+
+    def test_streamed_response_is_in_flight_until_closed(self, app):
+        metrics = app_metrics.install(app)
+        response, statuses = self._start_request(app, "/stream")
+        assert next(iter(response)) == b"0"
+        assert statuses == ["200 OK"]
+        assert metrics.to_dict()["in_flight"] == 1
+        assert metrics.to_dict()["routes"]["GET /stream"]["in_flight"] == 1
+        assert metrics.to_dict()["routes"]["GET /stream"]["count"] == 0
+        response.close()
+        route = metrics.to_dict()["routes"]["GET /stream"]
+        assert metrics.to_dict()["in_flight"] == 0
+        assert (route["in_flight"], route["count"], route["statuses"]) == (0, 1, {"2xx": 1})
+
+    def test_metrics_path_is_excluded(self, app):
+        metrics = app_metrics.install(app, path="/custom-metrics")
+        client = app.test_client()
+        client.get("/items/1").close()
+        client.get("/custom-metrics").close()
+        response = client.get("/custom-metrics")
+        response.close()
+        assert response.status_code == 200
+        assert sorted(flask.json.loads(response.get_data(as_text=True))["routes"]) == ["GET /items/<int:item_id>"]
+        assert sorted(metrics.to_dict()["routes"]) == ["GET /items/<int:item_id>"]
+        assert metrics.to_dict()["in_flight"] == 0
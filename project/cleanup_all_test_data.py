@@ -18,30 +18,27 @@ import argparse
 
 from configuration import config
 from modules.hive import Hive
+from modules.sweeper import Sweeper
 from modules.tap_logger import get_logger
 from modules.tap_object_model import DataSet, Invitation, Organization, Transfer, User
 from modules.test_names import is_test_object_name
-from tests.fixtures import fixtures
+from tests.fixtures.resource_pool import ResourcePool
 
 logger = get_logger(__name__)
 
 
-def log_deleted_objects(object_list, object_type_name):
-    if len(object_list) == 0:
-        logger.info("No {}s to delete".format(object_type_name))
-    else:
-        logger.info("Deleting {} {}{}:\n{}".format(len(object_list), object_type_name,
-                                                   "s" if len(object_list) != 1 else "",
-                                                   "\n".join([str(x) for x in object_list])))
+def is_sweepable_name(name):
+    """Test objects, except for members of the resource pool."""
+    return is_test_object_name(name) and not ResourcePool.is_pool_object_name(name)
 
 
-def remove_hive_databases():
+def remove_hive_databases(dry_run=False):
     with Hive() as hive:
-        dbs = hive.exec_query("show databases;").split("\n")
-        dbs = filter(lambda name: is_test_object_name(name), dbs)
-        dbs = list(dbs)
+        dbs = [row[0] for row in hive.iter_rows("show databases;") if is_test_object_name(row[0])]
 
-        if dbs:
+        if dbs and dry_run:
+            logger.info("Dry run - databases to remove:\n{}".format("\n".join(dbs)))
+        elif dbs:
             logger.info("Removing databases:\n{}".format("\n".join(dbs)))
             dbs = map(lambda name: "DROP DATABASE {} CASCADE;".format(name), dbs)
             dbs = "".join(dbs)
@@ -59,33 +56,31 @@ if __name__ == "__main__":
     parser.add_argument("-l", "--logging-level",
                         choices=["DEBUG", "INFO", "WARNING"],
                         default="DEBUG")
+    parser.add_argument("-w", "--workers",
+                        type=int,
+                        default=8,
+                        help="number of objects deleted concurrently")
+    parser.add_argument("-r", "--rate-limit",
+                        type=float,
+                        default=None,
+                        help="maximum number of deletions per second (no limit by default)")
+    parser.add_argument("--checkpoint-file",
+                        default=None,
+                        help="file with already deleted objects - pass the same file again to resume a sweep")
+    parser.add_argument("--dry-run",
+                        action="store_true",
+                        help="only report which objects would be deleted")
     args = parser.parse_args()
     config.update_test_config(domain=args.environment, logging_level=args.logging_level)
 
-    all_data_sets = DataSet.api_get_list()
-    test_data_sets = [x for x in all_data_sets if is_test_object_name(x.title)]
-    log_deleted_objects(test_data_sets, "data set")
-    fixtures.tear_down_test_objects(test_data_sets)
-
-    all_transfers = Transfer.api_get_list()
-    test_transfers = [x for x in all_transfers if is_test_object_name(x.title)]
-    log_deleted_objects(test_transfers, "transfer")
-    fixtures.tear_down_test_objects(test_transfers)
-
-    all_users = User.cf_api_get_all_users()
-    test_users = [x for x in all_users if is_test_object_name(x.username)]
-    log_deleted_objects(test_users, "user")
-    fixtures.tear_down_test_objects(test_users)
-
-    all_pending_invitations = Invitation.api_get_list()
-    test_invitations = [x for x in all_pending_invitations if is_test_object_name(x.username)]
-    log_deleted_objects(test_invitations, "invitation")
-    fixtures.tear_down_test_objects(test_invitations)
-
-    all_orgs = Organization.cf_api_get_list()
-    test_orgs = [x for x in all_orgs if is_test_object_name(x.name)]
-    log_deleted_objects(test_orgs, "organization")
-    fixtures.tear_down_test_objects(test_orgs,)
-
-    remove_hive_databases()
-
+    sweeper = Sweeper(workers=args.workers, rate_limit=args.rate_limit, checkpoint_path=args.checkpoint_file,
+                      dry_run=args.dry_run)
+    sweeper.add_source("data set", DataSet.api_get_list, lambda x: is_sweepable_name(x.title))
+    sweeper.add_source("transfer", Transfer.api_get_list, lambda x: is_sweepable_name(x.title))
+    sweeper.add_source("user", User.cf_api_iter_all_users, lambda x: is_sweepable_name(x.username))
+    sweeper.add_source("invitation", Invitation.api_get_list, lambda x: is_sweepable_name(x.username))
+    # organizations are removed once everything they could contain is gone
+    sweeper.add_source("organization", Organization.cf_api_iter_list, lambda x: is_sweepable_name(x.name), stage=1)
+    sweeper.sweep()
+
+    remove_hive_databases(dry_run=args.dry_run)
@@ -57,6 +57,8 @@ CONFIG = {
     "cf_auth": ("cf", ""),
     "kerberos": False,
     "pushed_app_proxy": None,
+    "resource_pool_size": 0,
+    "resource_pool_top_up": False,
 }
 
 LOGGED_CONFIG_KEYS = ["domain", "admin_username", "client_type", "ssl_validation", "platfom_version", "database_url",
@@ -68,7 +70,8 @@ def update_test_config(domain=None, client_type=None, logged_response_body_lengt
                        test_suite=None, local_appstack=None, admin_username=None, admin_password=None,
                        ref_org_name=None, ref_space_name=None, test_run_id=None, disable_remote_logger=None,
                        remote_logger_retry_count=None, kerberos=None, jumpbox_address=None, kubernetes=None,
-                       pushed_app_proxy=None, elasticsearch_host=None):
+                       pushed_app_proxy=None, elasticsearch_host=None, resource_pool_size=None,
+                       resource_pool_top_up=None, log_format=None):
     defaults = __CONFIG.defaults()
     defaults.update(__SECRETS.defaults())
     CONFIG["platform_version"] = platform_version
@@ -104,6 +107,8 @@ def update_test_config(domain=None, client_type=None, logged_response_body_lengt
         CONFIG["client_type"] = client_type
     if logging_level is not None:
         tap_logger.set_level(logging_level)
+    if log_format is not None:
+        tap_logger.set_format(log_format)
     if repository is not None:
         CONFIG["repository"] = repository
     if database_url is not None:
@@ -116,6 +121,10 @@ def update_test_config(domain=None, client_type=None, logged_response_body_lengt
         CONFIG["remote_logger_retry_count"] = remote_logger_retry_count
     if pushed_app_proxy is not None:
         CONFIG["pushed_app_proxy"] = pushed_app_proxy
+    if resource_pool_size is not None:
+        CONFIG["resource_pool_size"] = int(resource_pool_size)
+    if resource_pool_top_up is not None:
+        CONFIG["resource_pool_top_up"] = ensure_bool(resource_pool_top_up)
     CONFIG["ref_org_name"] = ref_org_name if ref_org_name is not None else "trustedanalytics"
     CONFIG["ref_space_name"] = ref_space_name if ref_space_name is not None else "platform"
     CONFIG["test_run_id"] = test_run_id
@@ -167,7 +176,10 @@ update_test_config(domain=os.environ.get("TEST_ENVIRONMENT"),
                    kerberos=os.environ.get("KERBEROS"),
                    jumpbox_address=os.environ.get("JUMPBOX_ADDRESS"),
                    elasticsearch_host=os.environ.get("ELASTICSEARCH_HOST"),
-                   kubernetes=os.environ.get("KUBERNETES"))
+                   kubernetes=os.environ.get("KUBERNETES"),
+                   resource_pool_size=os.environ.get("RESOURCE_POOL_SIZE"),
+                   resource_pool_top_up=os.environ.get("RESOURCE_POOL_TOP_UP"),
+                   log_format=os.environ.get("LOG_FORMAT"))
 
 
 def parse_arguments():
@@ -216,6 +228,10 @@ def parse_arguments():
     parser.add_argument("-l", "--logging-level",
                         choices=["DEBUG", "INFO", "WARNING"],
                         default="DEBUG")
+    parser.add_argument("--log-format",
+                        choices=["text", "json"],
+                        default=None,
+                        help="format of logged records, json writes one compact JSON object per line")
     parser.add_argument("-d", "--log-file-directory",
                         default="/tmp",
                         help="Change default log file directory.")
@@ -264,4 +280,12 @@ def parse_arguments():
     parser.add_argument("--kubernetes",
                         action='store_true',
                         help="Pass this parameter if environment has kubernetes.")
+    parser.add_argument("--resource-pool-size",
+                        type=int,
+                        default=None,
+                        help="Lease test org, space and users from a pool of pre-provisioned objects and keep the "
+                             "pool at this size (disabled by default)")
+    parser.add_argument("--resource-pool-top-up",
+                        action="store_true",
+                        help="Create missing resource pool entries in background while tests run")
     return parser.parse_args()
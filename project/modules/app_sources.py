@@ -14,9 +14,14 @@
 # limitations under the License.
 #
 
+import atexit
 import base64
+from contextlib import contextmanager
+import fcntl
+import hashlib
 import json
 import os
+import shutil
 import subprocess
 
 from git import Repo
@@ -28,16 +33,51 @@ from .tap_logger import log_command, get_logger, log_http_request, log_http_resp
 
 logger = get_logger(__name__)
 
+# working copies created by this process, removed when it exits
+_working_copies = set()
+
+
+@atexit.register
+def _remove_working_copies():
+    for path in _working_copies:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock held on a lock file, shared by all processes on this machine (e.g. parallel test workers)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 
 class AppSources(object):
 
-    def __init__(self, repo_name: str, repo_owner: str, target_directory: str=None, gh_auth: tuple=None):
+    # Build outputs are cached under a key computed from repository, commit, build command and working directory
+    BUILD_CACHE_DIRECTORY = os.path.join("/tmp", "app_sources_build_cache")
+    MVN_OUTPUT_DIRECTORY = "target"
+    GRADLE_OUTPUT_DIRECTORY = "build"
+
+    def __init__(self, repo_name: str, repo_owner: str, target_directory: str=None, gh_auth: tuple=None,
+                 branch: str=None, depth: int=1):
+        """
+        Sources are cloned shallow (depth commits of one branch), pass depth=None to clone full history.
+        target_directory holds a clone shared by all processes on this machine - each process builds and pushes from
+        its own copy of it, in path.
+        """
         self.repo_name = repo_name
         self.repo_owner = repo_owner
         if target_directory is None:
             target_directory = os.path.join("/tmp", repo_owner, repo_name)
-        self.path = target_directory
+        self.shared_path = target_directory
+        self.path = "{}_{}".format(target_directory, os.getpid())
         self.gh_auth = gh_auth
+        self.branch = branch
+        self.depth = depth
 
     def __get_repo_url(self) -> str:
         if self.gh_auth is not None:
@@ -47,41 +87,79 @@ class AppSources(object):
             clone_url = "https://github.com/{}/{}.git".format(self.repo_owner, self.repo_name)
         return clone_url
 
+    def __get_fetch_options(self) -> dict:
+        return {"depth": self.depth} if self.depth is not None else {}
+
     def __clone(self):
         repo_url = self.__get_repo_url()
-        logger.info("Clone from {} to {}".format(repo_url, self.path))
-        os.makedirs(self.path, exist_ok=True)
-        Repo.clone_from(repo_url, self.path)
+        logger.info("Clone from {} to {}".format(repo_url, self.shared_path))
+        os.makedirs(self.shared_path, exist_ok=True)
+        options = self.__get_fetch_options()
+        if self.depth is not None:
+            options["single_branch"] = True
+        if self.branch is not None:
+            options["branch"] = self.branch
+        Repo.clone_from(repo_url, self.shared_path, **options)
+
+    def __pull(self):
+        logger.info("Pull from {}".format(self.__get_repo_url()))
+        repo = Repo(self.shared_path)
+        repo.git.fetch("origin", self.branch or "HEAD", **self.__get_fetch_options())
+        repo.git.reset("--hard", "FETCH_HEAD")
 
     def clone_or_pull(self) -> str:
-        """Pull changes into repository if repository exists, otherwise clone it"""
-        if os.path.exists(self.path):
-            repo_url = self.__get_repo_url()
-            logger.info("Pull from {}".format(repo_url))
-            repo = Repo(self.path)
-            repo.head.reset("--hard")
-            origin = repo.remotes.origin
-            origin.pull()
-        else:
-            self.__clone()
+        """
+        Pull changes into the shared repository if it exists, otherwise clone it, and copy it to the working copy of
+        this process - concurrent pulls do not change the tree while it is built or pushed. Return path to the copy.
+        """
+        with file_lock("{}.lock".format(self.shared_path)):
+            if os.path.exists(self.shared_path):
+                self.__pull()
+            else:
+                self.__clone()
+            shutil.rmtree(self.path, ignore_errors=True)
+            shutil.copytree(self.shared_path, self.path, symlinks=True)
+        _working_copies.add(self.path)
         return self.path
 
+    def get_commit_id(self) -> str:
+        return Repo(self.path).head.commit.hexsha
+
     def compile_mvn(self, working_directory: str=None):
         logger.info("Compile with maven")
-        self.__compile(["mvn", "clean", "package"], working_directory=working_directory)
+        self.__compile(["mvn", "clean", "package"], self.MVN_OUTPUT_DIRECTORY, working_directory=working_directory)
 
     def compile_gradle(self, working_directory: str=None):
         logger.info("Compile with gradle")
-        self.__compile(["./gradlew", "assemble"], working_directory=working_directory)
+        self.__compile(["./gradlew", "assemble"], self.GRADLE_OUTPUT_DIRECTORY, working_directory=working_directory)
+
+    def __get_build_cache_path(self, command: list, working_directory: str) -> str:
+        key = [self.repo_owner, self.repo_name, self.get_commit_id(), " ".join(command),
+               os.path.relpath(working_directory, self.path)]
+        return os.path.join(self.BUILD_CACHE_DIRECTORY, hashlib.sha256("\n".join(key).encode()).hexdigest())
 
-    def __compile(self, command: list, working_directory: str=None):
+    def __compile(self, command: list, output_directory: str, working_directory: str=None):
+        """Compile sources, or restore build output from cache if these sources were already built with command"""
         if working_directory is None:
             working_directory = self.path
-        current_path = os.getcwd()
-        os.chdir(working_directory)
-        log_command(command)
-        subprocess.call(command)
-        os.chdir(current_path)
+        output_path = os.path.join(working_directory, output_directory)
+        cache_path = self.__get_build_cache_path(command, working_directory)
+        with file_lock("{}.lock".format(cache_path)):
+            if os.path.isdir(cache_path):
+                logger.info("Restore build output from {}".format(cache_path))
+                shutil.rmtree(output_path, ignore_errors=True)
+                shutil.copytree(cache_path, output_path, symlinks=True)
+                return
+            log_command(command)
+            return_code = subprocess.call(command, cwd=working_directory)
+            if return_code != 0:
+                logger.error("Build failed with return code {}, output is not cached".format(return_code))
+            elif os.path.isdir(output_path):
+                logger.info("Store build output in {}".format(cache_path))
+                tmp_cache_path = "{}.tmp".format(cache_path)
+                shutil.rmtree(tmp_cache_path, ignore_errors=True)
+                shutil.copytree(output_path, tmp_cache_path, symlinks=True)
+                os.rename(tmp_cache_path, cache_path)
 
     def checkout_commit(self, commit_id: str):
         """
@@ -89,6 +167,9 @@ class AppSources(object):
         """
         branch_name = "branch_{}".format(commit_id)
         repo = Repo(self.path)
+        if self.depth is not None:
+            logger.info("Fetch commit {}".format(commit_id))
+            repo.git.fetch("origin", commit_id, **self.__get_fetch_options())
         if branch_name not in repo.branches:
             logger.info("Create branch {}".format(branch_name))
             repo.git.checkout(commit_id, b=branch_name)
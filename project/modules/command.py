@@ -14,28 +14,166 @@
 # limitations under the License.
 #
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import signal
 import subprocess
-import sys
+import threading
+import time
 
 from .constants.logger_type import LoggerType
-from .exceptions import CommandExecutionException
+from .exceptions import CommandExecutionException, CommandTimeoutException
 from .tap_logger import get_logger
 
 
-def run(command):
-    """Run specified command in subprocess and log real time output"""
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
-    logger = get_logger(LoggerType.SHELL_COMMAND)
-    while True:
-        output = process.stdout.readline().strip()
-        if output == '' and process.poll() is not None:
-            break
-        if output != '':
-            logger.info(output)
-            sys.stdout.flush()
+logger = get_logger(LoggerType.SHELL_COMMAND)
 
-    return_code = process.poll()
-    if return_code != 0:
-        raise CommandExecutionException(return_code, " ".join(command))
+MAX_OUTPUT_LINES = 1000
 
-    return return_code
+
+class CommandResult(object):
+    """
+    Outcome of a finished command. output holds last lines of stdout and stderr (at most max_output_lines),
+    duration is wall-clock time in seconds.
+    """
+
+    def __init__(self, command, return_code, output, dropped_line_count, start_time, duration, timed_out=False,
+                 cancelled=False):
+        self.command = command
+        self.return_code = return_code
+        self.output = output
+        self.dropped_line_count = dropped_line_count
+        self.start_time = start_time
+        self.duration = duration
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+
+    @property
+    def ok(self):
+        return self.return_code == 0 and not self.timed_out and not self.cancelled
+
+    def __repr__(self):
+        return "{} (command={}, return_code={}, duration={:.2f}s)".format(
+            self.__class__.__name__, " ".join(self.command), self.return_code, self.duration)
+
+
+class RunningCommand(object):
+    """
+    Command running in a subprocess. Its output is read by a background thread, logged and kept in a bounded buffer,
+    so that many commands can run at the same time. Command runs in its own process group - when it does not finish
+    within timeout seconds or is cancelled, it is stopped together with all processes it started.
+    """
+
+    # how long processes get to exit after SIGTERM, before they are killed
+    TERMINATE_TIMEOUT = 5
+    # how long processes started in background by a finished command may keep its output open
+    OUTPUT_CLOSE_TIMEOUT = 5
+
+    def __init__(self, command, env=None, cwd=None, timeout=None, max_output_lines=MAX_OUTPUT_LINES, name=None):
+        self.command = command
+        self._timeout = timeout
+        self._log_prefix = "" if name is None else "[{}] ".format(name)
+        self._output = deque(maxlen=max_output_lines)
+        self._output_lock = threading.Lock()
+        self._line_count = 0
+        self._timed_out = False
+        self._cancelled = False
+        self._result = None
+        self._start_time = time.time()
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                         universal_newlines=True, env=env, cwd=cwd, start_new_session=True)
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        for line in self._process.stdout:
+            line = line.strip()
+            if line != "":
+                with self._output_lock:
+                    self._line_count += 1
+                    self._output.append(line)
+                logger.info("%s%s", self._log_prefix, line)
+        self._process.stdout.close()
+
+    @property
+    def done(self):
+        return self._process.poll() is not None
+
+    def _signal_group(self, signal_number):
+        try:
+            os.killpg(self._process.pid, signal_number)
+        except OSError:
+            pass  # all processes of the group have already exited
+
+    def _stop(self):
+        self._signal_group(signal.SIGTERM)
+        # output is closed when all processes of the group exit
+        self._reader.join(self.TERMINATE_TIMEOUT)
+        if self._reader.is_alive() or self._process.poll() is None:
+            self._signal_group(signal.SIGKILL)
+        self._process.wait()
+
+    def cancel(self):
+        """Stop the command, if it is still running."""
+        if not self.done:
+            self._cancelled = True
+            self._stop()
+
+    def wait(self):
+        """Wait until the command finishes, or stop it after timeout. Return CommandResult."""
+        if self._result is None:
+            try:
+                remaining = None if self._timeout is None else self._start_time + self._timeout - time.time()
+                self._process.wait(timeout=remaining if remaining is None else max(remaining, 0))
+            except subprocess.TimeoutExpired:
+                self._timed_out = True
+                self._stop()
+            self._reader.join(self.OUTPUT_CLOSE_TIMEOUT)
+            if self._reader.is_alive():
+                self._signal_group(signal.SIGKILL)
+                self._reader.join(self.OUTPUT_CLOSE_TIMEOUT)
+            with self._output_lock:
+                output = list(self._output)
+                dropped_line_count = self._line_count - len(output)
+            self._result = CommandResult(self.command, self._process.returncode, output, dropped_line_count,
+                                         self._start_time, time.time() - self._start_time, timed_out=self._timed_out,
+                                         cancelled=self._cancelled)
+        return self._result
+
+
+def start(command, env=None, cwd=None, timeout=None, max_output_lines=MAX_OUTPUT_LINES, name=None):
+    """Start command in a subprocess and return RunningCommand without waiting for it."""
+    return RunningCommand(command, env=env, cwd=cwd, timeout=timeout, max_output_lines=max_output_lines, name=name)
+
+
+def check_result(result):
+    if result.timed_out:
+        raise CommandTimeoutException(result.duration, " ".join(result.command))
+    if not result.ok:
+        raise CommandExecutionException(result.return_code, " ".join(result.command))
+    return result
+
+
+def run(command, env=None, cwd=None, timeout=None, max_output_lines=MAX_OUTPUT_LINES):
+    """
+    Run specified command in subprocess, log real time output and return CommandResult (not the return code).
+    Raise CommandExecutionException if it fails, CommandTimeoutException if it does not finish within timeout.
+    """
+    return check_result(start(command, env=env, cwd=cwd, timeout=timeout, max_output_lines=max_output_lines).wait())
+
+
+def run_concurrently(commands, env_list=None, timeout=None, max_output_lines=MAX_OUTPUT_LINES, max_workers=None):
+    """
+    Run commands at the same time - at most max_workers at once, all by default. env_list holds environment of each
+    command (e.g. with separate CF_HOME for cf cli commands). Return list of CommandResult in order of commands,
+    without raising for failed ones.
+    """
+    env_list = [None] * len(commands) if env_list is None else env_list
+
+    def run_one(index):
+        return start(commands[index], env=env_list[index], timeout=timeout, max_output_lines=max_output_lines,
+                     name=index).wait()
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(commands), 1)) as executor:
+        return list(executor.map(run_one, range(len(commands))))
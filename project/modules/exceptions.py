@@ -39,6 +39,10 @@ class CommandExecutionException(Exception):
     """Local and remote (ssh)"""
 
 
+class CommandTimeoutException(CommandExecutionException):
+    pass
+
+
 class YouMustBeJokingException(Exception):
     pass
 
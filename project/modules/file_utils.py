@@ -14,41 +14,168 @@
 # limitations under the License.
 #
 
+from concurrent.futures import ProcessPoolExecutor
 import csv
 import os
+import random
 import requests
 import zipfile
 import io
 import xml.etree.ElementTree as ElementTree
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 
 TMP_FILE_DIR = "/tmp/test_files"
 TMP_FILE_NAME = "test_file_{}.csv"
 TEST_FILES = []  # list of generated files - used for cleanup
 
+# all generated values have the same width, so that size of generated csv is known up front
+CSV_VALUE_WIDTH = 10
+CSV_BLOCK_ROW_COUNT = 10000
+_RANDOM_STRING_ALPHABET = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
+_RANDOM_STRING_TABLE = bytes(_RANDOM_STRING_ALPHABET[i % len(_RANDOM_STRING_ALPHABET)] for i in range(256))
+_DATE_RANGE_START = date(1970, 1, 1)
+_DATE_RANGE_DAYS = 365 * 100
 
-def generate_csv_file(column_count=10, size=None, row_count=10, file_name=None):
+
+def _generate_text_values(rng, count):
+    return ["0123456789"] * count
+
+
+def _generate_int_values(rng, count):
+    return ["%010d" % rng.randrange(10 ** CSV_VALUE_WIDTH) for _ in range(count)]
+
+
+def _generate_float_values(rng, count):
+    return ["%010.4f" % (rng.random() * 10000) for _ in range(count)]
+
+
+def _generate_string_values(rng, count):
+    length = count * CSV_VALUE_WIDTH
+    chars = rng.getrandbits(length * 8).to_bytes(length, "little").translate(_RANDOM_STRING_TABLE).decode()
+    return [chars[i:i + CSV_VALUE_WIDTH] for i in range(0, length, CSV_VALUE_WIDTH)]
+
+
+def _generate_date_values(rng, count):
+    return [(_DATE_RANGE_START + timedelta(days=rng.randrange(_DATE_RANGE_DAYS))).isoformat()
+            for _ in range(count)]
+
+
+CSV_COLUMN_TYPES = {
+    "text": _generate_text_values,  # the same value in each row
+    "int": _generate_int_values,
+    "float": _generate_float_values,
+    "string": _generate_string_values,
+    "date": _generate_date_values
+}
+
+
+def _get_column_types(column_count, column_types):
+    if column_types is None:
+        column_types = "text"
+    if isinstance(column_types, str):
+        column_types = [column_types] * column_count
+    if len(column_types) != column_count:
+        raise ValueError("Expected {} column types, got {}".format(column_count, len(column_types)))
+    unknown = set(column_types) - set(CSV_COLUMN_TYPES)
+    if unknown:
+        raise ValueError("Unknown column types: {}".format(", ".join(sorted(unknown))))
+    return list(column_types)
+
+
+def _get_csv_header(column_count):
+    return ",".join("COL_{}".format(i) for i in range(column_count)).encode() + b"\n"
+
+
+def get_csv_row_count(column_count, size):
+    """Return number of rows after which a generated csv file reaches size (in bytes)."""
+    remaining = size - len(_get_csv_header(column_count))
+    row_size = column_count * (CSV_VALUE_WIDTH + 1)
+    return max(0, -(-remaining // row_size))
+
+
+def get_csv_size(column_count, row_count):
+    """Return size (in bytes) of a generated csv file."""
+    if column_count == 0:
+        return 0
+    return len(_get_csv_header(column_count)) + row_count * column_count * (CSV_VALUE_WIDTH + 1)
+
+
+def _generate_csv_block(column_types, row_count, seed):
+    if all(column_type == "text" for column_type in column_types):
+        return (",".join(_generate_text_values(None, len(column_types))) + "\n").encode() * row_count
+    rng = random.Random(seed)
+    columns = [CSV_COLUMN_TYPES[column_type](rng, row_count) for column_type in column_types]
+    return "".join(",".join(row) + "\n" for row in zip(*columns)).encode()
+
+
+def _iter_csv_blocks(column_types, row_count, seed, first_block=0, last_block=None):
+    """Yield blocks of rows. Seed of each block is derived from its index, so any range of blocks can be generated."""
+    block_count = -(-row_count // CSV_BLOCK_ROW_COUNT)
+    last_block = block_count if last_block is None else last_block
+    for block_index in range(first_block, last_block):
+        block_row_count = min(CSV_BLOCK_ROW_COUNT, row_count - block_index * CSV_BLOCK_ROW_COUNT)
+        yield _generate_csv_block(column_types, block_row_count, seed * (2 ** 32) + block_index)
+
+
+def _write_csv_blocks(file_path, column_types, row_count, seed, first_block, last_block):
+    """Write range of blocks to their place in an existing file."""
+    block_size = CSV_BLOCK_ROW_COUNT * len(column_types) * (CSV_VALUE_WIDTH + 1)
+    with open(file_path, "r+b") as csv_file:
+        csv_file.seek(len(_get_csv_header(len(column_types))) + first_block * block_size)
+        for block in _iter_csv_blocks(column_types, row_count, seed, first_block, last_block):
+            csv_file.write(block)
+
+
+def iter_csv_blocks(column_count=10, size=None, row_count=10, column_types=None, seed=None):
+    """
+    Yield content of a generated csv file as blocks of bytes, without writing it to disk - e.g. to upload it.
+    Arguments are the same as for generate_csv_file, total size is returned by get_csv_size.
+    """
+    if size == 0 or column_count == 0:
+        return
+    column_types = _get_column_types(column_count, column_types)
+    if size is not None:
+        row_count = get_csv_row_count(column_count, size)
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    yield _get_csv_header(column_count)
+    for block in _iter_csv_blocks(column_types, row_count, seed):
+        yield block
+
+
+def generate_csv_file(column_count=10, size=None, row_count=10, file_name=None, column_types=None, seed=None,
+                      workers=1):
     """
     Return path to the new file.
     Pass row_count or size (in bytes) - if both are passed, size takes precedence.
+    column_types is a type from CSV_COLUMN_TYPES for all columns, or a list of types of each column - by default each
+    value is "0123456789". Random values are generated with the seed, in blocks, so that the content does not depend
+    on the number of workers - processes writing parts of the file in parallel.
     """
     os.makedirs(TMP_FILE_DIR, exist_ok=True)
     file_name = TMP_FILE_NAME.format(datetime.now().strftime('%Y%m%d_%H%M%S_%f')) if file_name is None else file_name
     file_path = os.path.join(TMP_FILE_DIR, file_name)
-    with open(file_path, "w", newline="") as csv_file:
-        if size == 0 or column_count == 0:
-            return _add_generated_file(file_path)
-        csv_writer = csv.writer(csv_file, lineterminator='\n')
-        csv_writer.writerow(["COL_{}".format(i) for i in range(column_count)])
-        row = ["0123456789" for _ in range(column_count)]
-        if size is not None:
-            while csv_file.tell() < size:
-                csv_writer.writerow(row)
-        else:
-            for i in range(row_count):
-                csv_writer.writerow(row)
+    if size is not None and column_count > 0:
+        row_count = get_csv_row_count(column_count, size)
+    if size == 0 or column_count == 0 or row_count == 0 or workers <= 1:
+        with open(file_path, "wb") as csv_file:
+            for block in iter_csv_blocks(column_count, size, row_count, column_types, seed):
+                csv_file.write(block)
+        return _add_generated_file(file_path)
+    column_types = _get_column_types(column_count, column_types)
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    with open(file_path, "wb") as csv_file:
+        csv_file.write(_get_csv_header(column_count))
+        csv_file.truncate(get_csv_size(column_count, row_count))
+    block_count = -(-row_count // CSV_BLOCK_ROW_COUNT)
+    blocks_per_worker = -(-block_count // workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_write_csv_blocks, file_path, column_types, row_count, seed, first_block,
+                                   min(first_block + blocks_per_worker, block_count))
+                   for first_block in range(0, block_count, blocks_per_worker)]
+        for future in futures:
+            future.result()
     return _add_generated_file(file_path)
 
 
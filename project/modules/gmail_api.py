@@ -17,11 +17,12 @@
 import base64
 import os
 import re
+import threading
+import time
 
 from apiclient import discovery
 import httplib2
 import oauth2client
-from retry import retry
 
 from .tap_logger import get_logger
 from configuration import config
@@ -93,32 +94,156 @@ def _get_info_from_headers(headers):
     return {"subject": message_subject, "recipient": recipient, "sender": sender}
 
 
-def get_messages_from_query(query, expected_number=None, user_id=TEST_EMAIL):
-    service = _get_service()
-    message_ids = _retrieve_message_ids_matching_query(service, user_id, query)
+def _parse_message(message):
+    headers = _get_info_from_headers(message['payload']['headers'])
+    msg_str = base64.urlsafe_b64decode(message['payload']['body']['data'].encode('ASCII'))
+    return {"subject": headers["subject"],
+            "content": msg_str.decode("utf-8"),
+            "timestamp": message['internalDate'],
+            "recipient": headers["recipient"],
+            "sender": headers["sender"]}
+
+
+class GmailClient(object):
+    """
+    Gmail API client. The discovery service is built once, messages are fetched in batch requests and cached by id,
+    so that polling a query only downloads messages which were not seen before.
+    """
+
+    BATCH_SIZE = 50
+    # only the parts of a message which are parsed in _parse_message
+    MESSAGE_FIELDS = "id,internalDate,payload(headers,body/data)"
+
+    def __init__(self, user_id=TEST_EMAIL):
+        self.user_id = user_id
+        self._service = None
+        self._messages = {}
+        self._lock = threading.Lock()
+
+    @property
+    def service(self):
+        with self._lock:
+            if self._service is None:
+                self._service = _get_service()
+            return self._service
+
+    def list_message_ids(self, query):
+        return _retrieve_message_ids_matching_query(self.service, self.user_id, query)
+
+    def get_messages(self, message_ids):
+        missing_ids = [i for i in message_ids if i not in self._messages]
+        for chunk_start in range(0, len(missing_ids), self.BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=self._store_message)
+            for message_id in missing_ids[chunk_start:chunk_start + self.BATCH_SIZE]:
+                batch.add(self.service.users().messages().get(userId=self.user_id, id=message_id, format='full',
+                                                              fields=self.MESSAGE_FIELDS))
+            batch.execute()
+        return [self._messages[i] for i in message_ids]
+
+    def _store_message(self, request_id, response, exception):
+        if exception is not None:
+            raise exception
+        self._messages[response["id"]] = _parse_message(response)
+
+    def get_history_id(self):
+        """Return id of the current state of the mailbox, to be passed to has_new_messages."""
+        return self.service.users().getProfile(userId=self.user_id).execute()["historyId"]
+
+    def has_new_messages(self, history_id):
+        """
+        Return tuple: True if any message was added to the mailbox since history_id, and history id for the next call.
+        The caller keeps the history id, so that concurrent callers do not consume each other's changes.
+        """
+        response = self.service.users().history().list(userId=self.user_id, startHistoryId=history_id,
+                                                       historyTypes="messageAdded").execute()
+        return len(response.get("history", [])) > 0, response.get("historyId", history_id)
+
+
+class LocalMailbox(object):
+    """In-memory stand-in for GmailClient. Supports queries built with get_query and get_query_for_list."""
+
+    def __init__(self):
+        self._messages = []
+        self._history_id = 0
+
+    def add_message(self, recipient, subject, content, sender=None):
+        self._history_id += 1
+        self._messages.append({"id": str(len(self._messages)),
+                               "subject": subject,
+                               "content": content,
+                               "timestamp": str(int(time.time() * 1000)),
+                               "recipient": recipient,
+                               "sender": sender})
+
+    @staticmethod
+    def _matches(message, query):
+        for alternative in query.split("|"):
+            alternative = alternative.strip()
+            if alternative == "":
+                continue
+            recipient, _, subject = alternative.partition(" subject:")
+            if message["recipient"] == recipient.replace("to:", "", 1) and \
+                    (subject == "" or subject in (message["subject"] or "")):
+                return True
+        return False
+
+    def list_message_ids(self, query):
+        return [m["id"] for m in reversed(self._messages) if self._matches(m, query)]
+
+    def get_messages(self, message_ids):
+        messages = {m["id"]: m for m in self._messages}
+        return [{k: v for k, v in messages[i].items() if k != "id"} for i in message_ids]
+
+    def get_history_id(self):
+        return self._history_id
+
+    def has_new_messages(self, history_id):
+        return history_id != self._history_id, self._history_id
+
+
+__client = None
+
+
+def get_client():
+    global __client
+    if __client is None:
+        __client = GmailClient()
+    return __client
+
+
+def set_client(client):
+    """Replace the mailbox client, e.g. with LocalMailbox. Pass None to restore the default Gmail client."""
+    global __client
+    __client = client
+
+
+def get_messages_from_query(query, expected_number=None):
+    client = get_client()
+    message_ids = client.list_message_ids(query)
     actual_number = len(message_ids)
     if expected_number is not None:
         assert actual_number == expected_number, "There are {} messages matching query: '{}'. Expected: {}".format(
             actual_number, query, expected_number)
-    messages = []
-    for message_id in message_ids:
-        message = service.users().messages().get(userId=user_id, id=message_id, format='full').execute()
-        timestamp = message['internalDate']
-        headers = _get_info_from_headers(message['payload']['headers'])
-        msg_str = base64.urlsafe_b64decode(message['payload']['body']['data'].encode('ASCII'))
-        message_content = msg_str.decode("utf-8")
-        messages.append({"subject": headers["subject"],
-                         "content": message_content,
-                         "timestamp": timestamp,
-                         "recipient": headers["recipient"],
-                         "sender": headers["sender"]})
-    return messages
-
-
-@retry(AssertionError, tries=30, delay=2)
-def wait_for_messages_matching_query(query, messages_number=1):
-    messages = get_messages_from_query(query, messages_number)
-    return messages
+    return client.get_messages(message_ids)
+
+
+def wait_for_messages_matching_query(query, messages_number=1, tries=30, delay=2):
+    """Poll the mailbox until the query matches messages_number messages. Query is repeated only if mail arrived."""
+    client = get_client()
+    history_id = client.get_history_id()
+    actual_number = None
+    for attempt in range(tries):
+        has_new_messages = attempt == 0
+        if not has_new_messages:
+            has_new_messages, history_id = client.has_new_messages(history_id)
+        if has_new_messages:
+            message_ids = client.list_message_ids(query)
+            actual_number = len(message_ids)
+            if actual_number == messages_number:
+                return client.get_messages(message_ids)
+        time.sleep(delay)
+    raise AssertionError("There are {} messages matching query: '{}'. Expected: {}".format(actual_number, query,
+                                                                                         messages_number))
 
 
 def wait_for_messages_to(recipient, messages_number=1):
@@ -126,11 +251,9 @@ def wait_for_messages_to(recipient, messages_number=1):
     return wait_for_messages_matching_query(query, messages_number=messages_number)
 
 
-def is_there_any_messages_to(recipient, user_id=TEST_EMAIL):
-    service = _get_service()
+def is_there_any_messages_to(recipient):
     query = get_query(recipient)
-    message_ids = _retrieve_message_ids_matching_query(service, user_id, query)
-    return len(message_ids) != 0
+    return len(get_client().list_message_ids(query)) != 0
 
 
 def extract_code_from_message(message):
@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+import bisect
 import json
 
 import requests
@@ -28,6 +29,9 @@ class HbaseClient(object):
 
     API_TABLES_ENDPOINT = "api/tables"
     HBASE_CLIENT_NAME = "Hbase Client"
+    SCAN_PAGE_SIZE = 1000
+    # scan returning fewer requested rows than this part of all returned rows means that requested keys are sparse
+    MIN_SCAN_HIT_RATIO = 0.5
 
     def __init__(self, app_hbase_reader):
         self.app = app_hbase_reader
@@ -58,19 +62,87 @@ class HbaseClient(object):
             endpoint=self.API_TABLES_ENDPOINT,
             username=self.HBASE_CLIENT_NAME,
             message_on_error="Failed get hbase tables")
-        for table in response:
-            self.tables.append(table["tableName"])
+        self.tables = [table["tableName"] for table in response]
         return self.tables
 
-    def get_table_row(self, table_name, row_key):
+    def get_table_row(self, table_name, row_key, logged_body_length=None):
         response = self.request(
             method="GET",
             instance_url=self.app.urls[0],
             endpoint="{}/{}/row/{}".format(self.API_TABLES_ENDPOINT, table_name, row_key),
             username=self.HBASE_CLIENT_NAME,
-            message_on_error="Failed get table row")
+            message_on_error="Failed get table row",
+            logged_body_length=logged_body_length)
         return response
 
+    def _scan(self, table_name, start_row, stop_row, limit, keys_only=False):
+        """Return up to limit rows with keys from start_row (inclusive) to stop_row (exclusive), in key order."""
+        params = {"limit": limit}
+        if start_row is not None:
+            params["startRow"] = start_row
+        if stop_row is not None:
+            params["stopRow"] = stop_row
+        if keys_only:
+            params["keysOnly"] = "true"
+        return self.request(
+            method="GET",
+            instance_url=self.app.urls[0],
+            endpoint="{}/{}/rows".format(self.API_TABLES_ENDPOINT, table_name),
+            username=self.HBASE_CLIENT_NAME,
+            params=params,
+            message_on_error="Failed scan hbase table",
+            logged_body_length=0)
+
+    def get_table_rows(self, table_name, row_keys, page_size=SCAN_PAGE_SIZE):
+        """
+        Return dict of rows by row key, None for keys which do not exist. Keys are read in order, by range scans over
+        windows of consecutive keys, each returning at most as many rows as there are keys in the window. Window grows
+        up to page_size keys while scans return mostly requested rows, and shrinks down to one key where requested keys
+        are sparse, so that few rows which were not asked for are read.
+        """
+        rows = {key: None for key in row_keys}
+        pending_keys = sorted(rows)
+        window_size = page_size
+        index = 0
+        while index < len(pending_keys):
+            window = pending_keys[index:index + window_size]
+            page = self._scan(table_name, window[0], window[-1] + "\x00", len(window))
+            found_count = 0
+            for row in page:
+                if row["rowKey"] in rows:
+                    rows[row["rowKey"]] = row
+                    found_count += 1
+            if len(page) < len(window):
+                # the scan reached the end of the window
+                index += len(window)
+            else:
+                # continue from the first key after the last row read
+                index = bisect.bisect_right(pending_keys, page[-1]["rowKey"], index)
+            if found_count < len(page) * self.MIN_SCAN_HIT_RATIO:
+                window_size = max(1, window_size // 2)
+            else:
+                window_size = min(page_size, window_size * 2)
+        return rows
+
+    def iter_table_rows(self, table_name, start_row=None, stop_row=None, page_size=SCAN_PAGE_SIZE, keys_only=False):
+        """
+        Yield rows with keys from start_row (inclusive) to stop_row (exclusive), requesting them in pages of
+        page_size rows. Each page starts after the last row of the previous one. With keys_only, cell values are not
+        requested.
+        """
+        while True:
+            rows = self._scan(table_name, start_row, stop_row, page_size, keys_only=keys_only)
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            # smallest key greater than the last one
+            start_row = rows[-1]["rowKey"] + "\x00"
+
+    def count_table_rows(self, table_name, start_row=None, stop_row=None, page_size=SCAN_PAGE_SIZE):
+        """Return number of rows in a range. Only row keys are requested, without cell values."""
+        return sum(1 for _ in self.iter_table_rows(table_name, start_row, stop_row, page_size, keys_only=True))
+
     def get_first_rows_from_table(self, table_name):
         table_rows = []
         response = self.request(
@@ -84,7 +156,7 @@ class HbaseClient(object):
         return table_rows
 
     def request(self, method, instance_url, endpoint, username, body=None, data=None, params=None, files=None,
-                message_on_error=""):
+                message_on_error="", logged_body_length=None):
         request = requests.Request(
             method=method,
             url="http://{}/{}".format(instance_url, endpoint),
@@ -96,7 +168,7 @@ class HbaseClient(object):
         request = self.session.prepare_request(request)
         log_http_request(request, username=username)
         response = self.session.send(request)
-        log_http_response(response)
+        log_http_response(response, logged_body_length=logged_body_length)
         if not response.ok:
             raise UnexpectedResponseError(status=response.status_code, error_message=message_on_error)
         try:
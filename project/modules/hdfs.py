@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+import itertools
 import re
 
 from .exceptions import HdfsException
@@ -26,6 +27,8 @@ logger = get_logger(__name__)
 
 class Hdfs(object):
 
+    CHUNK_SIZE = 64 * 1024
+
     def __init__(self):
         self.ssh_client = CdhMasterSshClient()
         self.ssh_client.connect()
@@ -53,7 +56,81 @@ class Hdfs(object):
         output = self._execute(command)
         return output
 
+    def _stream(self, command, chunk_size):
+        """Yield stdout of the command in chunks of bytes, as they arrive over the ssh channel."""
+        ssh_cmd = self.ssh_client.exec_command_interactive(command)
+        try:
+            chunk = ssh_cmd.stdout.read(chunk_size)
+            while chunk:
+                yield chunk
+                chunk = ssh_cmd.stdout.read(chunk_size)
+            if ssh_cmd.get_return_code() != 0:
+                raise HdfsException(ssh_cmd.get_stderr_as_str())
+        finally:
+            # when the reader stops early, closing the channel also stops the remote command
+            ssh_cmd.channel.close()
+
+    def iter_bytes(self, file_path, chunk_size=CHUNK_SIZE):
+        """Iterate over content of a file in hdfs in chunks of bytes, without reading the whole file to memory."""
+        return self._stream(self.hadoop_fs + ["-cat", file_path], chunk_size)
+
+    @staticmethod
+    def _split_lines(chunks, encoding):
+        remainder = b""
+        for chunk in chunks:
+            lines = (remainder + chunk).split(b"\n")
+            remainder = lines.pop()
+            for line in lines:
+                yield line.decode(encoding)
+        if remainder != b"":
+            yield remainder.decode(encoding)
+
+    def iter_lines(self, file_path, encoding="utf-8"):
+        """Iterate over lines of a file in hdfs, without trailing newlines."""
+        return self._split_lines(self.iter_bytes(file_path), encoding)
+
+    def head(self, file_path, line_count):
+        """Return first line_count lines of a file. The rest of the file is not transferred."""
+        lines = self.iter_lines(file_path)
+        try:
+            return list(itertools.islice(lines, line_count))
+        finally:
+            lines.close()
+
+    def tail(self, file_path, line_count):
+        """Return last line_count lines of a file. The file is read on the remote host."""
+        command = self._cat_piped_to(file_path, ["tail", "-n", str(line_count)])
+        return list(self._split_lines(self._stream(command, self.CHUNK_SIZE), "utf-8"))
+
+    def sample(self, file_path, ratio, seed=0):
+        """Iterate over a random sample of lines of a file - each line is selected with probability ratio."""
+        awk_program = "'BEGIN {{srand({})}} rand() < {}'".format(int(seed), float(ratio))
+        command = self._cat_piped_to(file_path, ["awk", awk_program])
+        return self._split_lines(self._stream(command, self.CHUNK_SIZE), "utf-8")
+
+    def count_lines(self, file_path):
+        """Return number of lines in a file, counted on the remote host."""
+        command = self._cat_piped_to(file_path, ["wc", "-l"])
+        return int(self._execute_pipeline(command))
+
+    def checksum(self, file_path):
+        """Return md5 hex digest of file content, computed on the remote host. Compare with hashlib.md5 locally."""
+        command = self._cat_piped_to(file_path, ["md5sum"])
+        return self._execute_pipeline(command).split()[0]
+
+    def _cat_piped_to(self, file_path, program):
+        """Command piping file content to a program on the remote host, which fails if hadoop fs -cat fails."""
+        return ["set", "-o", "pipefail;"] + self.hadoop_fs + ["-cat", file_path, "|"] + program
 
+    def _execute_pipeline(self, command):
+        output = b"".join(self._stream(command, self.CHUNK_SIZE))
+        return output.decode()
 
+    def disconnect(self):
+        self.ssh_client.disconnect()
 
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
@@ -14,6 +14,10 @@
 # limitations under the License.
 #
 
+import csv
+import uuid
+
+from .exceptions import CommandExecutionException
 from .ssh_client import CdhMasterSshClient
 from .tap_logger import get_logger
 from . import kerberos
@@ -22,6 +26,106 @@ from . import kerberos
 logger = get_logger(__name__)
 
 
+def split_statements(script):
+    """Split HiveQL script into statements on semicolons which are not inside quotes."""
+    statements = []
+    current = []
+    quote = None
+    for char in script:
+        if quote is not None:
+            if char == quote and current[-1] != "\\":
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement != ""]
+
+
+class HiveSession(object):
+    """
+    One beeline process which executes statements sent to its standard input, so that start of the JVM and connection
+    to HiveServer2 are paid once for many queries. Output of each batch of statements is followed by a unique end
+    marker, to know where it ends. Beeline stops at the first failed statement - its exit status is checked as for
+    a single query, and a new process is started for the next one. The session is not thread-safe.
+    """
+
+    def __init__(self, ssh_client, url):
+        self._ssh_client = ssh_client
+        self._url = url
+        self._ssh_cmd = None
+        self._pending_marker = None
+
+    def _start(self):
+        # in silent mode, beeline reading statements from a file (here - stdin) does not print prompts
+        command = ("beeline", "-u", "'{}'".format(self._url), "--showHeader=false", "--outputformat=csv2",
+                   "--silent=true", "-f", "/dev/stdin")
+        self._ssh_cmd = self._ssh_client.exec_command_interactive(command)
+
+    def _send(self, statements):
+        if self._ssh_cmd is None:
+            self._start()
+        marker = "end_of_output_{}".format(uuid.uuid4().hex)
+        lines = ["{};\n".format(statement) for statement in statements]
+        lines.append("SELECT '{}';\n".format(marker))
+        self._ssh_cmd.stdin.write("".join(lines))
+        self._ssh_cmd.stdin.flush()
+        self._pending_marker = marker
+
+    def _read_until_marker(self):
+        """Yield output lines of statements sent last, raise if any of them failed."""
+        marker = self._pending_marker
+        line = self._ssh_cmd.stdout.readline()
+        while line != b"":
+            line = line.decode().rstrip("\r\n")
+            if line == marker:
+                self._pending_marker = None
+                self._discard_stderr()
+                return
+            yield line
+            line = self._ssh_cmd.stdout.readline()
+        # beeline exited before the marker - a statement failed
+        ssh_cmd, self._ssh_cmd, self._pending_marker = self._ssh_cmd, None, None
+        try:
+            ssh_cmd.assert_return_code_ok()
+            raise CommandExecutionException("beeline exited before the end of output: {}".format(
+                ssh_cmd.get_stderr_as_str()))
+        finally:
+            ssh_cmd.channel.close()
+
+    def _discard_stderr(self):
+        """Read warnings written so far, so that they do not fill the channel buffer."""
+        channel = self._ssh_cmd.channel
+        while channel.recv_stderr_ready():
+            logger.debug(channel.recv_stderr(4096).decode(errors="replace"))
+
+    def _skip_pending_output(self):
+        """Read the rest of output of a previous query, which was not fully consumed by the caller."""
+        if self._pending_marker is not None:
+            for _ in self._read_until_marker():
+                pass
+
+    def iter_lines(self, script):
+        """Execute all statements of the script and yield csv output lines as they arrive."""
+        self._skip_pending_output()
+        self._send(split_statements(script))
+        return self._read_until_marker()
+
+    def iter_rows(self, script):
+        """Execute all statements of the script and yield output rows as lists of values."""
+        return csv.reader(self.iter_lines(script))
+
+    def close(self):
+        if self._ssh_cmd is not None:
+            self._ssh_cmd.stdin.close()
+            self._ssh_cmd.channel.close()
+            self._ssh_cmd = None
+
+
 class Hive(object):
     __JDBC_URL = "jdbc:hive2://cdh-master-0:10000/default"
     __JDBC_KERBEROS_PARAMS = ";principal=hive/cdh-master-0@CLOUDERA;auth=kerberos"
@@ -34,6 +138,7 @@ class Hive(object):
         self.__url = self.__get_url()
         if self.__is_kerberos:
             kerberos.authenticate(self.__ssh_client)
+        self.__session = HiveSession(self.__ssh_client, self.__url)
 
     def __get_url(self):
         url = self.__JDBC_URL
@@ -41,21 +146,16 @@ class Hive(object):
             url += self.__JDBC_KERBEROS_PARAMS
         return url
 
-    def __ensure_quote(self, query):
-        query = query.strip()
-        if query[0] not in "'\"":
-            query = "'{}'".format(query)
-        return query
-
-    def __get_cmd(self, *params):
-        return ("beeline", "-u", "'{}'".format(self.__url), "--showHeader=false", "--outputformat=csv2") + params
-
     def exec_query(self, query):
-        ssh_cmd = self.__ssh_client.exec_command_interactive(self.__get_cmd("-e", self.__ensure_quote(query)))
-        ssh_cmd.assert_return_code_ok()
-        return ssh_cmd.get_stdout_as_str()
+        """Execute one or more statements separated by semicolons and return their csv output."""
+        return "".join("{}\n".format(line) for line in self.__session.iter_lines(query))
+
+    def iter_rows(self, query):
+        """Execute one or more statements separated by semicolons and yield output rows as lists of values."""
+        return self.__session.iter_rows(query)
 
     def close(self):
+        self.__session.close()
         self.__ssh_client.disconnect()
 
     def __enter__(self):
@@ -14,6 +14,8 @@
 # limitations under the License.
 #
 
+import os
+
 from configuration.config import CONFIG
 from .. import command as cmd
 from ..constants import LoggerType
@@ -28,7 +30,14 @@ from ..http_client.http_client_factory import HttpClientFactory
 cli_logger = get_logger(LoggerType.CF_CLI)
 
 
-def cf_login(organization_name, space_name, credentials=None):
+def _get_env(cf_home):
+    """Environment for cf cli with separate CF_HOME, so that several cf commands can run at the same time."""
+    if cf_home is None:
+        return None
+    return dict(os.environ, CF_HOME=cf_home)
+
+
+def cf_login(organization_name, space_name, credentials=None, cf_home=None):
     if credentials is None:
         username = CONFIG["admin_username"]
         password = CONFIG["admin_password"]
@@ -40,59 +49,93 @@ def cf_login(organization_name, space_name, credentials=None):
     if not CONFIG["ssl_validation"]:
         command.append("--skip-ssl-validation")
     log_command(command, replace=(password, "[SECRET]"))
-    cmd.run(command)
+    cmd.run(command, env=_get_env(cf_home))
 
 
-def cf_push(local_path, local_jar, name=None):
+def _get_push_command(local_path, local_jar, name=None):
     command = ["cf", "push", "-f", local_path, "-p", local_jar]
     if name:
         command.extend(["-n", name])
+    return command
+
+
+def cf_push(local_path, local_jar, name=None, cf_home=None, timeout=None):
+    command = _get_push_command(local_path, local_jar, name)
     log_command(command)
-    return cmd.run(command)
+    return cmd.run(command, env=_get_env(cf_home), timeout=timeout)
 
 
-def cf_create_service(broker_name, plan, instance_name):
+def cf_push_many(push_args, cf_homes, timeout=None):
+    """
+    Push apps at the same time. push_args is a list of (local_path, local_jar, name) tuples, cf_homes - list of CF_HOME
+    directories, each already logged in with cf_login. Return list of CommandResult, raise if any push failed.
+    """
+    commands = [_get_push_command(*args) for args in push_args]
+    for command in commands:
+        log_command(command)
+    results = cmd.run_concurrently(commands, env_list=[_get_env(cf_home) for cf_home in cf_homes], timeout=timeout)
+    for result in results:
+        cmd.check_result(result)
+    return results
+
+
+def cf_create_service(broker_name, plan, instance_name, cf_home=None):
     command = ["cf", "create-service", broker_name, plan, instance_name]
     log_command(command)
-    return cmd.run(command)
+    return cmd.run(command, env=_get_env(cf_home))
 
 
-def cf_delete(app_name):
+def cf_delete(app_name, cf_home=None):
     command = ["cf", "delete", app_name, "-f"]
     log_command(command)
-    cmd.run(command)
+    cmd.run(command, env=_get_env(cf_home))
 
 
-def cf_env(app_name):
+def cf_env(app_name, cf_home=None):
     command = ["cf", "env", app_name]
     log_command(command)
-    return cmd.run(command)
+    return cmd.run(command, env=_get_env(cf_home))
 
 
-def cf_delete_service(service):
+def cf_delete_service(service, cf_home=None):
     command = ["cf", "delete-service", service, "-f"]
     log_command(command)
-    return cmd.run(command)
+    return cmd.run(command, env=_get_env(cf_home))
 
 
 # ====================================================== cf api ====================================================== #
 
+def __get_page(endpoint, page_num, query_params=None, log_msg=""):
+    params = {"results-per-page": 100, "page": page_num}
+    params.update(query_params or {})
+    return HttpClientFactory.get(CloudFoundryConfigurationProvider.get()).request(
+        method=HttpMethod.GET,
+        path=endpoint,
+        params=params,
+        msg="{} page {}".format(log_msg, page_num),
+    )
+
+
+def __iter_all_pages(endpoint, query_params=None, log_msg=""):
+    """
+    For requests which return paginated results - yield resources page by page, as they are retrieved. Pages are read
+    from the last one down (the first page is needed to learn the page count, so it is yielded at the end), so that
+    resources yielded earlier can be deleted without shifting resources on pages which were not read yet.
+    """
+    first_page = __get_page(endpoint, 1, query_params=query_params, log_msg=log_msg)
+    for page_num in range(first_page["total_pages"], 1, -1):
+        yield from __get_page(endpoint, page_num, query_params=query_params, log_msg=log_msg)["resources"]
+    yield from first_page["resources"]
+
+
 def __get_all_pages(endpoint, query_params=None, log_msg=""):
     """For requests which return paginated results"""
-    query_params = query_params or {}
     resources = []
     page_num = 1
     while True:
-        params = {"results-per-page": 100, "page": page_num}
-        params.update(query_params)
-        response = HttpClientFactory.get(CloudFoundryConfigurationProvider.get()).request(
-            method=HttpMethod.GET,
-            path=endpoint,
-            params=params,
-            msg="{} page {}".format(log_msg, page_num),
-        )
+        response = __get_page(endpoint, page_num, query_params=query_params, log_msg=log_msg)
         resources.extend(response["resources"])
-        if page_num == response["total_pages"]:
+        if page_num >= response["total_pages"]:
             break
         page_num += 1
     return resources
@@ -105,6 +148,11 @@ def cf_api_get_orgs():
     return __get_all_pages(endpoint="organizations", log_msg="CF: get all organizations")
 
 
+def cf_api_iter_orgs():
+    """GET /v2/organizations - generator"""
+    return __iter_all_pages(endpoint="organizations", log_msg="CF: get all organizations")
+
+
 def cf_api_delete_org(org_guid):
     """DELETE /v2/organizations/{org_guid}"""
     ref_org_guid, _ = cf_get_ref_org_and_space_guids()
@@ -227,6 +275,11 @@ def cf_api_get_users():
     return __get_all_pages(endpoint="users", log_msg="CF: get all users")
 
 
+def cf_api_iter_users():
+    """GET /v2/users - generator"""
+    return __iter_all_pages(endpoint="users", log_msg="CF: get all users")
+
+
 def cf_api_delete_user(user_guid):
     """DELETE /v2/users/{user_guid}"""
     HttpClientFactory.get(CloudFoundryConfigurationProvider.get()).request(
@@ -15,24 +15,73 @@
 #
 
 import os
+import time
 
 from ...http_client.client_auth.http_method import HttpMethod
 from ...http_client.configuration_provider.console import ConsoleConfigurationProvider
 from ...http_client.http_client_factory import HttpClientFactory
+from ...http_client.multipart_stream import MultipartStream
+from ...tap_logger import get_logger
 
 
-def api_create_transfer_by_file_upload(org_guid, source, category=None, is_public=None, title=None, client=None):
-    """POST /rest/upload/{org_id}"""
+logger = get_logger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _iter_file(file_path):
+    with open(file_path, "rb") as f:
+        chunk = f.read(UPLOAD_CHUNK_SIZE)
+        while chunk:
+            yield chunk
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+
+
+class _ProgressLogger(object):
+    """Log upload progress every 10% and throughput when the upload is complete."""
+
+    def __init__(self, file_name):
+        self._file_name = file_name
+        self._start_time = time.time()
+        self._next_step = 0.1
+
+    def __call__(self, bytes_sent, total):
+        progress = bytes_sent / total
+        if progress < self._next_step and bytes_sent < total:
+            return
+        elapsed = max(time.time() - self._start_time, 1e-6)
+        logger.info("Upload of {}: {:.0%} of {} bytes, {:.2f} MB/s".format(self._file_name, progress, total,
+                                                                            bytes_sent / elapsed / 1024 / 1024))
+        while self._next_step <= progress:
+            self._next_step += 0.1
+
+
+def api_create_transfer_by_file_upload(org_guid, source, category=None, is_public=None, title=None, client=None,
+                                       file_name=None, size=None):
+    """
+    POST /rest/upload/{org_id}
+    source is a file path, or an iterable of bytes (e.g. file_utils.iter_csv_blocks) - then pass its file_name and
+    size. Content is read in chunks while it is sent.
+    """
     body_keys = ["category", "publicRequest", "orgUUID", "title"]
     values = [category, is_public, org_guid, title]
     data = {key: val for key, val in zip(body_keys, values) if val is not None}
-    _, file_name = os.path.split(source)
-    files = {"file": (file_name, open(source, "rb"), "application/vnd.ms-excel")}
+    if isinstance(source, str):
+        _, file_name = os.path.split(source)
+        size = os.path.getsize(source)
+        source = _iter_file(source)
+    elif file_name is None or size is None:
+        raise ValueError("Pass file_name and size of uploaded content")
+    body = MultipartStream(data, "file", file_name, source, size, "application/vnd.ms-excel",
+                           progress_callback=_ProgressLogger(file_name))
     client = client or HttpClientFactory.get(ConsoleConfigurationProvider.get())
-    return client.request(
-        method=HttpMethod.POST,
-        path="/rest/upload/{}".format(org_guid),
-        data=data,
-        files=files,
-        msg="PLATFORM: create a transfer"
-    )
+    try:
+        return client.request(
+            method=HttpMethod.POST,
+            path="/rest/upload/{}".format(org_guid),
+            headers={"Content-Type": body.content_type},
+            data=body,
+            msg="PLATFORM: create a transfer"
+        )
+    finally:
+        body.close()
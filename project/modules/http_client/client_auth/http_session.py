@@ -48,10 +48,10 @@ class HttpSession(object):
         return self._session.cookies
 
     def request(self, method: HttpMethod, url, headers=None, files=None, data=None, params=None, auth=None, body=None,
-                log_message="", raw_response=False):
+                log_message="", raw_response=False, stream=False):
         """Perform request and return response."""
         request = self._request_prepare(method, url, headers, files, data, params, auth, body, log_message)
-        return self._request_perform(request, raw_response)
+        return self._request_perform(request, raw_response, stream)
 
     def _request_prepare(self, method, url, headers, files, data, params, auth, body, log_message):
         """Prepare request to perform."""
@@ -69,10 +69,11 @@ class HttpSession(object):
         log_http_request(prepared_request, self._username, self._password, description=log_message, data=data)
         return prepared_request
 
-    def _request_perform(self, request: Request, raw_response: bool):
+    def _request_perform(self, request: Request, raw_response: bool, stream=False):
         """Perform request and return response."""
-        response = self._session.send(request)
-        log_http_response(response)
+        response = self._session.send(request, stream=stream)
+        # streamed body is left for the caller to read
+        log_http_response(response, logged_body_length=0 if stream else None)
         if raw_response is True:
             return response
         if not response.ok:
@@ -20,29 +20,16 @@ from requests import Request
 
 from ...tap_logger import log_http_response
 from ...constants.http_status import HttpStatus
-from ...ssh_client import SshTunnel, SshTunnelException
-from ...exceptions import RedirectionLimitException, UnexpectedResponseError
+from ...exceptions import UnexpectedResponseError
 from .http_session import HttpSession
 
-ALLOWED_REDIRECTION_LIMIT = 3
-
-
-def counted(func):
-    def counting_calls(*args, **kwargs):
-        counting_calls.calls += 1
-        if counting_calls.calls > ALLOWED_REDIRECTION_LIMIT:
-            raise RedirectionLimitException("Exceeded allowed redirection number")
-        return func(*args, **kwargs)
-    counting_calls.calls = 0
-    return counting_calls
-
 
 class WebhdfsSession(HttpSession):
 
-    def _request_perform(self, request: Request, raw_response: bool):
+    def _request_perform(self, request: Request, raw_response: bool, stream=False):
         """Perform request and return response."""
-        response = self._session.send(request, allow_redirects=False)
-        log_http_response(response)
+        response = self._session.send(request, allow_redirects=False, stream=stream)
+        log_http_response(response, logged_body_length=0 if stream else None)
         if raw_response is True:
             return response
         if response.status_code == HttpStatus.CODE_TEMPORARY_REDIRECT:
@@ -53,28 +40,3 @@ class WebhdfsSession(HttpSession):
             return json.loads(response.text)
         except ValueError:
             return response.text
-
-    @staticmethod
-    @counted
-    def redirection_handler(webhdfs_create, test_port, via_host_username, path_to_key, webhdfs_get_via_hostname,
-                            test_host, method, body=None, params=None, redirection_location=None, hdfs_path=""):
-        ssh_tunnel = None
-        target_host = redirection_location.split("://", 1)[1].split("/", 1)[0]
-        target_port = test_port
-        if ":" in target_host:
-            target_host, target_port = tuple(target_host.split(":"))
-            target_port = int(target_port)
-        new_params = {"namenoderpcaddress": "nameservice1", "offset": 0}
-        params.update(new_params)
-        try:
-            ssh_tunnel = SshTunnel(
-                target_host, via_host_username, path_to_key=path_to_key, port=target_port,
-                via_hostname=webhdfs_get_via_hostname(), local_port=target_port)
-            ssh_tunnel.connect()
-            webhdfs = webhdfs_create(host=test_host, port=target_port)
-            response = webhdfs.request(method, body=body, params=params, path=hdfs_path)
-        except ConnectionError:
-            raise SshTunnelException()
-        finally:
-            ssh_tunnel.disconnect()
-        return response
@@ -45,8 +45,8 @@ class HttpClient(object):
         self._url = url
 
     def request(self, method: HttpMethod, path, headers=None, files=None, params=None, data=None, body=None, msg="",
-                raw_response=False):
-        """Perform request and return response."""
+                raw_response=False, stream=False):
+        """Perform request and return response. With stream=True, response body is not read until accessed."""
         if not self._auth.authenticated:
             self._auth.authenticate()
         return self._auth.session.request(
@@ -59,5 +59,6 @@ class HttpClient(object):
             body=body,
             auth=self._auth.http_auth,
             log_message=msg,
-            raw_response=raw_response
+            raw_response=raw_response,
+            stream=stream
         )
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import uuid
+
+
+class MultipartStream(object):
+    """
+    Body of a multipart/form-data request with a file, which reads file content while it is sent, instead of building
+    the whole body in memory. Pass it as request data, with content_type as Content-Type header.
+    File content is an iterable of bytes - chunks of a file or a generator, file_size is its total length.
+    """
+
+    def __init__(self, fields: dict, file_field, file_name, file_content, file_size, file_content_type,
+                 progress_callback=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary={}".format(self.boundary)
+        self._head = self._get_head(fields, file_field, file_name, file_content_type)
+        self._tail = "\r\n--{}--\r\n".format(self.boundary).encode()
+        self._file_content = file_content
+        self._file_size = file_size
+        self._length = len(self._head) + file_size + len(self._tail)
+        self._progress_callback = progress_callback
+        self._chunks = self._iter_chunks()
+        self._buffer = b""
+        self.bytes_read = 0
+
+    def _get_head(self, fields, file_field, file_name, file_content_type):
+        parts = []
+        for name, value in fields.items():
+            parts.append("--{}\r\nContent-Disposition: form-data; name=\"{}\"\r\n\r\n{}\r\n".format(
+                self.boundary, name, value))
+        parts.append("--{}\r\nContent-Disposition: form-data; name=\"{}\"; filename=\"{}\"\r\n"
+                     "Content-Type: {}\r\n\r\n".format(self.boundary, file_field, file_name, file_content_type))
+        return "".join(parts).encode()
+
+    def _iter_chunks(self):
+        yield self._head
+        size = 0
+        for chunk in self._file_content:
+            size += len(chunk)
+            if size > self._file_size:
+                raise ValueError("File content is longer than declared size {}".format(self._file_size))
+            yield chunk
+        if size != self._file_size:
+            raise ValueError("File content has {} bytes, declared size is {}".format(size, self._file_size))
+        yield self._tail
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        chunk = self.read(64 * 1024)
+        while chunk:
+            yield chunk
+            chunk = self.read(64 * 1024)
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self.bytes_read += len(data)
+        if self._progress_callback is not None and len(data) > 0:
+            self._progress_callback(self.bytes_read, self._length)
+        return data
+
+    def close(self):
+        """Stop reading file content - closes the file if the content is read from one."""
+        self._chunks.close()
+        if hasattr(self._file_content, "close"):
+            self._file_content.close()
@@ -0,0 +1,176 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import bisect
+import threading
+import time
+import uuid
+
+import requests
+
+from .exceptions import UnexpectedResponseError
+from .tap_logger import get_logger
+from .websocket_load import WebsocketLoadDriver, get_percentile
+
+logger = get_logger(__name__)
+
+
+def get_app_consumed_count(app, path="status/stats"):
+    """Return number of messages consumed by an ingestion app, from its stats endpoint."""
+    return app.api_request(path=path)[0]["consumedMessages"]
+
+
+class BenchmarkResult(object):
+    """
+    Measurements of a benchmark run. samples is a list of (time, number of messages consumed by the pipeline app
+    since the start), send_times - time each message was sent (None if sending failed). Latency of a message is time
+    from sending it until the sample in which it was counted as consumed, so its resolution is the sample interval.
+    """
+
+    def __init__(self, load, samples, send_times):
+        self.load = load
+        self.samples = samples
+        self.send_times = send_times
+        self.latencies = self._get_latencies()
+
+    def _get_latencies(self):
+        """Message with index i is consumed in the first sample with count greater than i (pipeline keeps order)."""
+        latencies = []
+        sample_iter = iter(self.samples)
+        sample_time, consumed = next(sample_iter, (None, 0))
+        for index, send_time in enumerate(self.send_times):
+            while sample_time is not None and consumed <= index:
+                sample_time, consumed = next(sample_iter, (None, 0))
+            if sample_time is None:
+                break
+            if send_time is not None:
+                latencies.append(sample_time - send_time)
+        return latencies
+
+    @property
+    def consumed_count(self):
+        return self.samples[-1][1] if len(self.samples) > 0 else 0
+
+    @property
+    def throughput(self):
+        """Messages consumed per second, from the first sample to the last one in which the count grew."""
+        last_growth = None
+        for (sample_time, count), (_, previous_count) in zip(self.samples[1:], self.samples):
+            if count > previous_count:
+                last_growth = (sample_time, count)
+        if last_growth is None:
+            return 0
+        return last_growth[1] / (last_growth[0] - self.samples[0][0])
+
+    @property
+    def lag_samples(self):
+        """List of (time, number of messages sent but not yet consumed)."""
+        send_times = sorted(t for t in self.send_times if t is not None)
+        return [(sample_time, bisect.bisect_right(send_times, sample_time) - consumed)
+                for sample_time, consumed in self.samples]
+
+    @property
+    def max_lag(self):
+        return max([lag for _, lag in self.lag_samples] or [0])
+
+    def get_latency_percentile(self, percentile):
+        return get_percentile(self.latencies, percentile)
+
+    def __repr__(self):
+        return ("{} (sent={}, consumed={}, throughput={:.1f}/s, max lag={}, latency p50={}, p95={}, p99={})").format(
+            self.__class__.__name__, self.load.sent_count, self.consumed_count, self.throughput, self.max_lag,
+            self.get_latency_percentile(50), self.get_latency_percentile(95), self.get_latency_percentile(99))
+
+
+class IngestionBenchmark(object):
+    """
+    Send message_count messages of message_size characters to a websocket ingestion pipeline at rate messages per
+    second, while sampling number of messages which went through the pipeline, returned by get_consumed_count - e.g.
+    get_app_consumed_count of the last app of the pipeline. Each message is "<run id>-<message index>-", padded with
+    dots. Send time of each message is taken by the load driver, when the message is sent.
+    """
+
+    def __init__(self, ws_url, get_consumed_count, message_count=1000, message_size=100, rate=100, connection_count=4,
+                 sample_interval=1, timeout=600, certificate_requirement=None):
+        self.ws_url = ws_url
+        self.get_consumed_count = get_consumed_count
+        self.message_count = message_count
+        self.message_size = message_size
+        self.rate = rate
+        self.connection_count = connection_count
+        self.sample_interval = sample_interval
+        self.timeout = timeout
+        self.certificate_requirement = certificate_requirement
+        self.run_id = uuid.uuid4().hex[:8]
+
+    def _generate_messages(self):
+        for index in range(self.message_count):
+            message = "{}-{}-".format(self.run_id, index)
+            yield message + "." * (self.message_size - len(message))
+
+    def _sample(self, baseline, samples, sending_finished, aborted):
+        """Sample consumed count until all messages are consumed, timeout after sending finished, or abort."""
+        deadline = None
+        while not aborted.is_set():
+            try:
+                samples.append((time.time(), self.get_consumed_count() - baseline))
+            except (UnexpectedResponseError, requests.RequestException) as e:
+                logger.warning("Could not get consumed message count: {}".format(e))
+            if len(samples) > 0 and samples[-1][1] >= self.message_count:
+                return
+            if deadline is None and sending_finished.is_set():
+                deadline = time.time() + self.timeout
+            if deadline is not None and time.time() > deadline:
+                logger.warning("Timeout - not all of {} messages were consumed".format(self.message_count))
+                return
+            aborted.wait(self.sample_interval)
+
+    def run(self):
+        send_times = [None] * self.message_count
+
+        def on_sent(index, send_time):
+            send_times[index] = send_time
+
+        baseline = self.get_consumed_count()
+        samples = []
+        sending_finished = threading.Event()
+        aborted = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(baseline, samples, sending_finished, aborted))
+        sampler.start()
+        try:
+            driver = WebsocketLoadDriver(self.ws_url, connection_count=self.connection_count, rate=self.rate,
+                                         certificate_requirement=self.certificate_requirement, on_sent=on_sent)
+            load = driver.run(self._generate_messages())
+        except BaseException:
+            # sending failed - do not wait for messages which were never sent
+            aborted.set()
+            raise
+        finally:
+            sending_finished.set()
+            sampler.join()
+        result = BenchmarkResult(load, samples, send_times)
+        logger.info(result)
+        return result
+
+    def get_missing_messages(self, stored_messages):
+        """Return sorted indexes of sent messages which are not among stored messages (e.g. lines of hdfs file)."""
+        prefix = "{}-".format(self.run_id)
+        stored = set()
+        for message in stored_messages:
+            if message.startswith(prefix):
+                stored.add(int(message.split("-")[1]))
+        return sorted(set(range(self.message_count)) - stored)
@@ -14,6 +14,11 @@
 # limitations under the License.
 #
 
+import json
+import os
+import tempfile
+import time
+
 from configuration.config import CONFIG
 from .tap_logger import get_logger
 from .file_utils import get_file_as_str_from_zip_archive, get_value_from_core_site_xml
@@ -27,9 +32,40 @@ CORE_SITE_XML = "hive-conf/core-site.xml"
 HADOOP_SECURITY_AUTHENTICATION = "hadoop.security.authentication"
 KERBEROS = "kerberos"
 SERVICE = "HIVE"
+# detection result is kept for the run and in a file shared by runs, for CACHE_TTL seconds
+CACHE_FILE_PATH = os.path.join(tempfile.gettempdir(), "tap_kerberos_environments.json")
+CACHE_TTL = 24 * 60 * 60
+__is_kerberos_by_domain = {}
 
 
-def is_kerberos_environment():
+def _read_cache_file():
+    try:
+        with open(CACHE_FILE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache_file(domain, is_kerberos):
+    cache = _read_cache_file()
+    cache[domain] = {"is_kerberos": is_kerberos, "time": time.time()}
+    temp_path = "{}.{}".format(CACHE_FILE_PATH, os.getpid())
+    try:
+        with open(temp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(temp_path, CACHE_FILE_PATH)
+    except OSError as e:
+        logger.warning("Could not save kerberos detection result: %s", e)
+
+
+def _get_cached(domain):
+    entry = _read_cache_file().get(domain)
+    if entry is None or time.time() - entry["time"] > CACHE_TTL:
+        return None
+    return entry["is_kerberos"]
+
+
+def _check_kerberos_environment():
     with ClouderaClient() as cc:
         xml = get_file_as_str_from_zip_archive(cc.api_client_config(SERVICE), CORE_SITE_XML)
         value = get_value_from_core_site_xml(xml, HADOOP_SECURITY_AUTHENTICATION)
@@ -37,7 +73,33 @@ def is_kerberos_environment():
         return KERBEROS == value
 
 
+def is_kerberos_environment():
+    domain = CONFIG["domain"]
+    if domain not in __is_kerberos_by_domain:
+        is_kerberos = _get_cached(domain)
+        if is_kerberos is None:
+            is_kerberos = _check_kerberos_environment()
+            _write_cache_file(domain, is_kerberos)
+        __is_kerberos_by_domain[domain] = is_kerberos
+    return __is_kerberos_by_domain[domain]
+
+
+def has_valid_ticket(ssh_client, username):
+    """Check that the ticket cache on the remote host has an unexpired ticket of the user."""
+    ssh_cmd = ssh_client.exec_command_interactive(["klist", "-s", "&&", "klist"])
+    if ssh_cmd.get_return_code() != 0:
+        return False
+    for line in ssh_cmd.get_stdout_as_str().splitlines():
+        if line.startswith("Default principal:"):
+            principal = line.split(":", 1)[1].strip()
+            return principal.split("@")[0] == username.split("@")[0]
+    return False
+
+
 def authenticate(ssh_client):
+    if has_valid_ticket(ssh_client, CONFIG["kerberos_username"]):
+        logger.info("Reusing kerberos ticket of %s", CONFIG["kerberos_username"])
+        return
     ssh_cmd = ssh_client.exec_command_interactive(["kinit", CONFIG["kerberos_username"]])
     ssh_cmd.stdin.write(CONFIG["kerberos_password"] + "\n")
     ssh_cmd.assert_return_code_ok()
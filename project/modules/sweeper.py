@@ -0,0 +1,231 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import queue
+import threading
+import time
+
+from .constants import HttpStatus
+from .exceptions import UnexpectedResponseError
+from .tap_logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class SweepStats(object):
+    """Counters collected for one object type during a sweep."""
+
+    def __init__(self, object_type):
+        self.object_type = object_type
+        self.listed = 0
+        self.deleted = 0
+        self.failed = 0
+        self.skipped = 0
+        self.would_delete = []
+        self.start_time = None
+        self.end_time = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "{} ({}: listed={}, deleted={}, failed={}, skipped={}, {:.2f}/s)".format(
+            self.__class__.__name__, self.object_type, self.listed, self.deleted, self.failed, self.skipped,
+            self.throughput)
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def add_would_delete(self, item):
+        with self._lock:
+            self.would_delete.append(item)
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def throughput(self):
+        """Number of objects processed per second."""
+        if self.elapsed == 0:
+            return 0.0
+        return (self.deleted + self.failed + len(self.would_delete)) / self.elapsed
+
+
+class RateLimiter(object):
+    """Limit the rate of operations shared by many threads. Rate is given in operations per second."""
+
+    def __init__(self, rate=None):
+        self._interval = 1.0 / rate if rate else 0
+        self._next_time = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self._interval == 0:
+            return
+        with self._lock:
+            now = time.time()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self._interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class SweepCheckpoint(object):
+    """Append-only file with keys of objects which were already deleted, so that an interrupted sweep can resume."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._keys = set()
+        self._lock = threading.Lock()
+        if os.path.isfile(file_path):
+            with open(file_path) as f:
+                self._keys = {line.rstrip("\n") for line in f if line.strip()}
+            logger.info("Loaded {} keys from checkpoint {}".format(len(self._keys), file_path))
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, key):
+        with self._lock:
+            self._keys.add(key)
+            with open(self.file_path, "a") as f:
+                f.write("{}\n".format(key))
+
+
+class SweepSource(object):
+    def __init__(self, object_type, list_objects, is_test_object, stage=0):
+        self.object_type = object_type
+        self.list_objects = list_objects
+        self.is_test_object = is_test_object
+        self.stage = stage
+
+    def get_key(self, item):
+        return "{}: {}".format(self.object_type, item)
+
+
+class Sweeper(object):
+    """
+    Delete test objects concurrently. Each source is listed in a separate thread and matching objects are handed over
+    to a pool of workers as they are listed. Paginated listings have to be safe to delete from while they are read
+    (e.g. cloud_foundry pages are read from the last page down), otherwise list_objects should return a complete list.
+    Sources with a lower stage are swept completely before sources with a higher stage are listed (e.g. organizations
+    have to be deleted after their users).
+    """
+
+    __SENTINEL = None
+
+    def __init__(self, workers=8, rate_limit=None, checkpoint_path=None, dry_run=False):
+        self.workers = workers
+        self.dry_run = dry_run
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.checkpoint = SweepCheckpoint(checkpoint_path) if checkpoint_path is not None else None
+        self.sources = []
+        self.stats = {}
+
+    def add_source(self, object_type, list_objects, is_test_object, stage=0):
+        """
+        Register object type to sweep. list_objects is a callable returning an iterable of objects which implement
+        cleanup(), is_test_object is a predicate selecting objects to delete.
+        """
+        self.sources.append(SweepSource(object_type, list_objects, is_test_object, stage))
+        self.stats[object_type] = SweepStats(object_type)
+
+    def sweep(self):
+        """Sweep all registered sources stage by stage and return stats for each object type."""
+        for stage in sorted({s.stage for s in self.sources}):
+            self._sweep_stage([s for s in self.sources if s.stage == stage])
+        self.log_report()
+        return self.stats
+
+    def _sweep_stage(self, sources):
+        item_queue = queue.Queue(maxsize=self.workers * 10)
+        listers = [threading.Thread(target=self._list, args=(source, item_queue)) for source in sources]
+        workers = [threading.Thread(target=self._work, args=(item_queue,)) for _ in range(self.workers)]
+        for thread in listers + workers:
+            thread.daemon = True
+            thread.start()
+        for thread in listers:
+            thread.join()
+        for _ in workers:
+            item_queue.put(self.__SENTINEL)
+        for thread in workers:
+            thread.join()
+        for source in sources:
+            self.stats[source.object_type].end_time = time.time()
+
+    def _list(self, source, item_queue):
+        stats = self.stats[source.object_type]
+        stats.start_time = time.time()
+        try:
+            for item in source.list_objects():
+                if not source.is_test_object(item):
+                    continue
+                stats.increment("listed")
+                if self.checkpoint is not None and source.get_key(item) in self.checkpoint:
+                    stats.increment("skipped")
+                    continue
+                item_queue.put((source, item))
+        except Exception as e:
+            logger.error("Error while listing {}s: {}".format(source.object_type, e))
+
+    def _work(self, item_queue):
+        while True:
+            task = item_queue.get()
+            if task is self.__SENTINEL:
+                break
+            source, item = task
+            self._delete(source, item)
+
+    def _delete(self, source, item):
+        stats = self.stats[source.object_type]
+        if self.dry_run:
+            stats.add_would_delete(item)
+            return
+        self.rate_limiter.wait()
+        try:
+            logger.info("Deleting {}".format(item))
+            item.cleanup()
+        except UnexpectedResponseError as e:
+            if e.status != HttpStatus.CODE_NOT_FOUND:
+                logger.warning("Error while deleting {}: {}".format(item, e))
+                stats.increment("failed")
+                return
+        except Exception as e:
+            logger.warning("Error while deleting {}: {}".format(item, e))
+            stats.increment("failed")
+            return
+        stats.increment("deleted")
+        if self.checkpoint is not None:
+            self.checkpoint.add(source.get_key(item))
+
+    def log_report(self):
+        lines = ["{:<16} {:>8} {:>8} {:>8} {:>8} {:>10} {:>10}".format("object type", "listed", "deleted", "failed",
+                                                                         "skipped", "time [s]", "objects/s")]
+        for stats in self.stats.values():
+            lines.append("{:<16} {:>8} {:>8} {:>8} {:>8} {:>10.1f} {:>10.2f}".format(
+                stats.object_type, stats.listed, len(stats.would_delete) if self.dry_run else stats.deleted,
+                stats.failed, stats.skipped, stats.elapsed, stats.throughput))
+        if self.dry_run:
+            lines.insert(0, "Dry run - nothing was deleted")
+            for stats in self.stats.values():
+                if len(stats.would_delete) > 0:
+                    lines.append("{}s to delete:\n{}".format(stats.object_type,
+                                                            "\n".join([str(x) for x in stats.would_delete])))
+        logger.info("Sweep summary:\n{}".format("\n".join(lines)))
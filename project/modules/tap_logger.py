@@ -14,10 +14,13 @@
 # limitations under the License.
 #
 
+import atexit
 from datetime import datetime
 import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 import traceback
 
@@ -29,54 +32,131 @@ from .constants import LoggerType
 
 __LOGGING_LEVEL = logging.NOTSET
 LOGGED_RESPONSE_BODY_LENGTH = 0
+LOGGED_REQUEST_BODY_LENGTH = 5000
 
 
-class StdAndFileHandler(object):
-    def __init__(self, stream, file_handler):
-        self.stream = stream
-        self.file_handler = file_handler
+class JsonLinesFormatter(logging.Formatter):
+    """Compact format - one JSON object per record."""
 
-    def write(self, msg):
-        self.stream.write(msg)
-        self.file_handler.stream.write(msg)
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, separators=(",", ":"))
 
-    def flush(self):
-        self.stream.flush()
-        self.file_handler.stream.flush()
+
+class LazyMessage(object):
+    """Log message which is built only when the record is formatted - by the writer thread."""
+
+    def __init__(self, build, *args):
+        self._build = build
+        self._args = args
+
+    def __str__(self):
+        return self._build(*self._args)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    Put records on a queue consumed by the writer thread, without formatting them. Only the traceback is formatted
+    here, as frames it refers to can change before the record is written.
+    In processes forked from this one, where the writer thread does not run, records are written synchronously.
+    """
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self._pid = os.getpid()
+
+    def emit(self, record):
+        if os.getpid() != self._pid:
+            _listener.handle(record)
+        else:
+            super().emit(record)
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
 
 requests.packages.urllib3.disable_warnings()
 logger_format = "%(asctime)s - %(name)s - %(levelname)s: %(message)s"
+LOG_FORMATTERS = {
+    "text": lambda: logging.Formatter(logger_format),
+    "json": JsonLinesFormatter
+}
+_formatter = LOG_FORMATTERS["text"]()
+
 if is_running_under_teamcity():
-    logging.basicConfig(stream=sys.stdout, format=logger_format)
+    _handlers = [logging.StreamHandler(sys.stdout)]
 else:
     log_file_name = "api_tests_{}.log".format(datetime.now().strftime("%Y%m%d_%H%M%S"))
     default_log_dir = os.path.join("/tmp", log_file_name)
     fh = logging.FileHandler(default_log_dir)
     sh = logging.StreamHandler(sys.stdout)
-    logging.basicConfig(format=logger_format, handlers=[sh, fh])
+    _handlers = [sh, fh]
+for _handler in _handlers:
+    _handler.setFormatter(_formatter)
+
+# records are written to stdout and file by the listener thread, so that logging does not block the caller
+_queue_handler = BackgroundQueueHandler(queue.Queue())
+_queue_handler.setFormatter(_formatter)
+_listener = logging.handlers.QueueListener(_queue_handler.queue, *_handlers)
+_listener.start()
+atexit.register(_listener.stop)
+logging.basicConfig(handlers=[_queue_handler])
 
-    std_and_file_handler = StdAndFileHandler(sys.stdout, fh)
+
+def flush():
+    """Wait until all queued records are written."""
+    _listener.stop()
+    _listener.start()
+
+
+if not is_running_under_teamcity():
     def excepthook(etype, value, tb):
+        flush()
         s = "".join(traceback.format_exception(etype, value, tb))
-        std_and_file_handler.write(s)
+        for handler in _listener.handlers:
+            handler.stream.write(s)
+            handler.flush()
     sys.excepthook = excepthook
 
 
 def change_log_file_path(log_file_dir):
-    logger = logging.getLogger()
+    global fh
     log_dir = os.path.join(log_file_dir, log_file_name)
-    if fh in logger.handlers:
+    _listener.stop()  # write queued records to the old file
+    try:
         fh.close()  # close opened log file
-        logger.removeHandler(fh)
         try:
             os.rename(default_log_dir, log_dir)  # try to move created log file to new directory
         except OSError:
-            logger.exception("Can't move log file '{}' to '{}'.".format(default_log_dir, log_dir))
-    new_file_handler = logging.FileHandler(log_dir)
-    new_file_handler.setFormatter(logging.Formatter(logger_format))
-    std_and_file_handler.file_handler = new_file_handler
-    logger.addHandler(new_file_handler)
+            sys.stderr.write("Can't move log file '{}' to '{}'.\n".format(default_log_dir, log_dir))
+        new_file_handler = logging.FileHandler(log_dir)
+        new_file_handler.setFormatter(_formatter)
+        _listener.handlers = tuple(new_file_handler if h is fh else h for h in _listener.handlers)
+        fh = new_file_handler
+    finally:
+        _listener.start()
+
+
+def set_format(format_name):
+    """Set format of logged records: "text" (default) or "json" for compact JSON lines."""
+    global _formatter
+    flush()  # records already queued keep the previous format
+    _formatter = LOG_FORMATTERS[format_name]()
+    _queue_handler.setFormatter(_formatter)
+    for handler in _listener.handlers:
+        handler.setFormatter(_formatter)
 
 
 def set_level(level_name):
@@ -107,42 +187,73 @@ def log_command(command, replace=None):
 
 
 def log_http_request(prepared_request, username, password=None, description="", data=None):
-    prepared_body = prepared_request.body[:5000] if prepared_request.body else prepared_request.body
-    body = prepared_body if not data else json.dumps(data)
-    if body is None:
+    logger = get_logger(LoggerType.HTTP_REQUEST)
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    # headers can be modified by the caller after the request is sent
+    logger.debug(LazyMessage(_format_http_request, prepared_request.method, prepared_request.url,
+                             dict(prepared_request.headers), prepared_request.body, username, password, description,
+                             data))
+
+
+def _format_http_request(method, url, headers, prepared_body, username, password, description, data):
+    if isinstance(data, (dict, list)) and data:
+        body = json.dumps(data)
+    elif isinstance(prepared_body, (str, bytes)):
+        body = prepared_body[:LOGGED_REQUEST_BODY_LENGTH]
+    elif prepared_body is not None:
+        body = "[stream]"
+    else:
         body = ""
+    if isinstance(body, bytes):
+        body = body.decode(errors="replace")
     if password:
-        body = str(body).replace(password, "[SECRET]")
+        body = body.replace(password, "[SECRET]")
     msg = [
         description,
         "----------------Request------------------",
         "Client name: {}".format(username),
-        "URL: {} {}".format(prepared_request.method, prepared_request.url),
-        "Headers: {}".format(prepared_request.headers),
+        "URL: {} {}".format(method, url),
+        "Headers: {}".format(headers),
         "Body: {}".format(body),
         "-----------------------------------------"
     ]
-    get_logger(LoggerType.HTTP_REQUEST).debug("\n".join(msg))
+    return "\n".join(msg)
 
 
 def log_http_response(response, logged_body_length=None):
     """If logged_body_length < 0, full response body is logged"""
+    logger = get_logger(LoggerType.HTTP_RESPONSE)
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     if logged_body_length is None:
         logged_body_length = LOGGED_RESPONSE_BODY_LENGTH
-    body = response.text
-    if logged_body_length == 0:
+    # body is read here, as the response can be closed by the time the record is written
+    content = response.content if logged_body_length != 0 else None
+    logger.debug(LazyMessage(_format_http_response, response.status_code, response.headers, content,
+                             response.encoding, logged_body_length))
+
+
+def _format_http_response(status_code, headers, content, encoding, logged_body_length):
+    if content is None:
         body = "[...]"
-    elif len(body) > logged_body_length > 0:
+    elif len(content) > logged_body_length > 0:
         half = logged_body_length // 2
-        body = "{} [...] {}".format(body[:half], body[-half:])
+        body = "{} [...] {}".format(_decode(content[:half], encoding), _decode(content[-half:], encoding))
+    else:
+        body = _decode(content, encoding)
     msg = [
         "\n----------------Response------------------",
-        "Status code: {}".format(response.status_code),
-        "Headers: {}".format(response.headers),
+        "Status code: {}".format(status_code),
+        "Headers: {}".format(headers),
         "Content: {}".format(body),
         "-----------------------------------------\n"
     ]
-    get_logger(LoggerType.HTTP_RESPONSE).debug("\n".join(msg))
+    return "\n".join(msg)
+
+
+def _decode(content, encoding):
+    return content.decode(encoding or "utf-8", errors="replace")
 
 
 def step(message):
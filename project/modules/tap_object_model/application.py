@@ -140,6 +140,10 @@ class Application(object):
         except ValueError:
             return response.text
 
+    def api_get_metrics(self):
+        """Get request counts and latencies measured by the application itself - see applications/*/app_metrics.py"""
+        return self.api_request(path="metrics")
+
     @staticmethod
     def _get_details_from_response(response):
         return {
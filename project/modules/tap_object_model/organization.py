@@ -88,6 +88,12 @@ class Organization(object):
             org_list.append(cls(name=org_info["entity"]["name"], guid=org_info["metadata"]["guid"]))
         return org_list
 
+    @classmethod
+    def cf_api_iter_list(cls):
+        """Yield organizations page by page, without waiting for the whole list."""
+        for org_info in cf.cf_api_iter_orgs():
+            yield cls(name=org_info["entity"]["name"], guid=org_info["metadata"]["guid"])
+
     @retry(UnexpectedResponseError, tries=2, delay=5)
     def cf_api_delete(self):
         cf.cf_api_delete_org(self.guid)
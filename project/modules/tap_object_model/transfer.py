@@ -68,10 +68,12 @@ class Transfer(object):
 
     @classmethod
     def api_create_by_file_upload(cls, context, org_guid, file_path, category="other", is_public=False, title=None,
-                                  client=None):
+                                  client=None, file_name=None, size=None):
+        """file_path can also be an iterable of bytes, uploaded as file_name of given size"""
         title = generate_test_object_name() if title is None else title
         hdfs_uploader.api_create_transfer_by_file_upload(org_guid, source=file_path, category=category,
-                                                         is_public=is_public, title=title, client=client)
+                                                         is_public=is_public, title=title, client=client,
+                                                         file_name=file_name, size=size)
         new_transfer = next(t for t in cls.api_get_list(org_guid_list=[org_guid]) if t.title == title)
         context.transfers.append(new_transfer)
         return new_transfer
@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+from concurrent.futures import ThreadPoolExecutor
 import functools
 import random
 import string
@@ -103,6 +104,62 @@ class User(object):
         new_user.password = password
         return new_user
 
+    @classmethod
+    def api_create_many_by_adding_to_organization(cls, context, org_guid, roles_list, usernames=None, passwords=None,
+                                                  inviting_client=None):
+        """
+        Create one user for each element of roles_list. All invitations are sent up front, codes are retrieved with a
+        single mailbox query and users are registered concurrently.
+        """
+        def invite(username, roles):
+            user_management.api_add_organization_user(org_guid, username, roles, client=inviting_client)
+        return cls._api_create_many(context, roles_list, invite,
+                                    lambda: cls.api_get_list_via_organization(org_guid=org_guid), usernames, passwords)
+
+    @classmethod
+    def api_create_many_by_adding_to_space(cls, context, org_guid, space_guid, roles_list, usernames=None,
+                                           passwords=None, inviting_client=None):
+        """
+        Create one user for each element of roles_list. All invitations are sent up front, codes are retrieved with a
+        single mailbox query and users are registered concurrently.
+        """
+        def invite(username, roles):
+            user_management.api_add_space_user(org_guid, space_guid, username, roles, inviting_client)
+        return cls._api_create_many(context, roles_list, invite, lambda: cls.api_get_list_via_space(space_guid),
+                                    usernames, passwords)
+
+    @classmethod
+    def _api_create_many(cls, context, roles_list, invite, get_user_list, usernames=None, passwords=None):
+        if usernames is None:
+            usernames = []
+            while len(usernames) < len(roles_list):
+                username = generate_test_object_name(email=True)
+                if username not in usernames:
+                    usernames.append(username)
+        if passwords is None:
+            passwords = [cls.generate_password() for _ in usernames]
+        for username, roles in zip(usernames, roles_list):
+            invite(username, roles)
+        codes = {k.lower(): v for k, v in gmail_api.get_invitation_codes_for_list(usernames).items()}
+
+        def register(username, password):
+            client = HttpClientFactory.get(ConsoleNoAuthConfigurationProvider.get(username))
+            user_management.api_register_new_user(codes[username.lower()], password, client=client)
+
+        with ThreadPoolExecutor(max_workers=len(usernames)) as executor:
+            for future in [executor.submit(register, u, p) for u, p in zip(usernames, passwords)]:
+                future.result()
+        users = {user.username: user for user in get_user_list()}
+        new_users = []
+        for username, password in zip(usernames, passwords):
+            new_user = users.get(username)
+            if new_user is None:
+                raise AssertionError("New user {} was not found".format(username))
+            context.users.append(new_user)
+            new_user.password = password
+            new_users.append(new_user)
+        return new_users
+
     @classmethod
     def api_get_list_via_organization(cls, org_guid, client=None):
         response = user_management.api_get_organization_users(org_guid, client=client)
@@ -167,19 +224,25 @@ class User(object):
             cls.__ADMIN.password = config.CONFIG["admin_password"]
         return cls.__ADMIN
 
+    @classmethod
+    def _from_cf_api_response(cls, user_data):
+        return cls(username=user_data["entity"].get("username"), guid=user_data["metadata"].get("guid"))
+
     @classmethod
     def _get_user_list_from_cf_api_response(cls, response):
-        users = []
-        for user_data in response:
-            user = cls(username=user_data["entity"].get("username"), guid=user_data["metadata"].get("guid"))
-            users.append(user)
-        return users
+        return [cls._from_cf_api_response(user_data) for user_data in response]
 
     @classmethod
     def cf_api_get_all_users(cls):
         response = cf.cf_api_get_users()
         return cls._get_user_list_from_cf_api_response(response)
 
+    @classmethod
+    def cf_api_iter_all_users(cls):
+        """Yield users page by page, without waiting for the whole list."""
+        for user_data in cf.cf_api_iter_users():
+            yield cls._from_cf_api_response(user_data)
+
     @classmethod
     def cf_api_get_user(cls, username):
         users = User.cf_api_get_all_users()
@@ -0,0 +1,83 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+import time
+
+import pytest
+
+from modules import command
+from modules.exceptions import CommandExecutionException, CommandTimeoutException
+
+
+class TestCommand:
+
+    def test_run_returns_result(self):
+        result = command.run(["sh", "-c", "echo first; echo second"])
+        assert result.ok
+        assert result.return_code == 0
+        assert result.output == ["first", "second"]
+        assert result.dropped_line_count == 0
+        assert result.duration >= 0
+
+    def test_run_raises_on_failure(self):
+        with pytest.raises(CommandExecutionException) as e:
+            command.run(["sh", "-c", "exit 3"])
+        assert e.value.args[0] == 3
+
+    def test_output_is_bounded(self):
+        result = command.run(["seq", "1", "100"], max_output_lines=10)
+        assert result.output == [str(i) for i in range(91, 101)]
+        assert result.dropped_line_count == 90
+
+    def test_run_passes_env_and_cwd(self, tmpdir):
+        env = dict(os.environ, TEST_VARIABLE="value")
+        result = command.run(["sh", "-c", "echo $TEST_VARIABLE; pwd"], env=env, cwd=str(tmpdir))
+        assert result.output == ["value", os.path.realpath(str(tmpdir))]
+
+    def test_timeout_stops_processes_started_by_command(self):
+        start_time = time.time()
+        with pytest.raises(CommandTimeoutException):
+            command.run(["sh", "-c", "sleep 20 & sleep 30"], timeout=0.5)
+        assert time.time() - start_time < 5
+
+    def test_cancel(self):
+        running_command = command.start(["sh", "-c", "sleep 20 & sleep 30"])
+        running_command.cancel()
+        result = running_command.wait()
+        assert result.cancelled
+        assert not result.ok
+        assert result.duration < 5
+
+    def test_wait_returns_the_same_result(self):
+        running_command = command.start(["true"])
+        assert running_command.wait() is running_command.wait()
+        assert running_command.done
+
+    def test_run_concurrently(self):
+        commands = [["sh", "-c", "sleep 1; echo $INDEX"]] * 3
+        env_list = [dict(os.environ, INDEX=str(i)) for i in range(3)]
+        start_time = time.time()
+        results = command.run_concurrently(commands, env_list=env_list)
+        assert time.time() - start_time < 2.5
+        assert [r.output for r in results] == [["0"], ["1"], ["2"]]
+
+    def test_run_concurrently_does_not_raise(self):
+        results = command.run_concurrently([["false"], ["true"]])
+        assert [r.ok for r in results] == [False, True]
+        with pytest.raises(CommandExecutionException):
+            command.check_result(results[0])
@@ -0,0 +1,96 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+
+import pytest
+
+from modules import file_utils
+
+
+@pytest.fixture(autouse=True)
+def tmp_file_dir(monkeypatch, tmpdir):
+    monkeypatch.setattr(file_utils, "TMP_FILE_DIR", str(tmpdir))
+
+
+def _read(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+class TestGenerateCsvFile:
+
+    @pytest.mark.parametrize("column_count,row_count", [(1, 0), (1, 1), (3, 10), (10, 25001)])
+    def test_size_matches_row_count(self, column_count, row_count):
+        file_path = file_utils.generate_csv_file(column_count=column_count, row_count=row_count, column_types="int")
+        assert os.path.getsize(file_path) == file_utils.get_csv_size(column_count, row_count)
+        assert file_utils.get_csv_record_count(file_path) == row_count + 1
+
+    @pytest.mark.parametrize("size", [1, 5, 1000, 12345, 10 ** 6])
+    def test_file_reaches_size(self, size):
+        column_count = 3
+        row_count = file_utils.get_csv_row_count(column_count, size)
+        file_size = os.path.getsize(file_utils.generate_csv_file(column_count=column_count, size=size))
+        assert file_size == file_utils.get_csv_size(column_count, row_count)
+        assert file_size >= size
+        assert row_count == 0 or file_utils.get_csv_size(column_count, row_count - 1) < size
+
+    def test_zero_size_file_is_empty(self):
+        assert os.path.getsize(file_utils.generate_csv_file(size=0, workers=2)) == 0
+
+    @pytest.mark.parametrize("kwargs", [{"row_count": 0}, {"size": 5}])
+    def test_no_rows_with_workers(self, kwargs):
+        file_path = file_utils.generate_csv_file(column_count=2, workers=4, **kwargs)
+        assert _read(file_path) == b"COL_0,COL_1\n"
+
+    def test_default_values(self):
+        file_path = file_utils.generate_csv_file(column_count=2, row_count=2)
+        assert _read(file_path) == b"COL_0,COL_1\n0123456789,0123456789\n0123456789,0123456789\n"
+
+    def test_content_does_not_depend_on_workers(self):
+        column_types = sorted(file_utils.CSV_COLUMN_TYPES)
+        row_count = 3 * file_utils.CSV_BLOCK_ROW_COUNT + 7
+        contents = [_read(file_utils.generate_csv_file(column_count=len(column_types), row_count=row_count,
+                                                       column_types=column_types, seed=42, workers=workers))
+                    for workers in (1, 2, 3)]
+        assert contents[0] == contents[1] == contents[2]
+
+    def test_seed_changes_content(self):
+        contents = [_read(file_utils.generate_csv_file(row_count=10, column_types="string", seed=seed))
+                    for seed in (1, 2)]
+        assert contents[0] != contents[1]
+
+    def test_incorrect_column_types(self):
+        with pytest.raises(ValueError):
+            file_utils.generate_csv_file(column_count=2, column_types=["int"])
+        with pytest.raises(ValueError):
+            file_utils.generate_csv_file(column_count=1, column_types="complex")
+
+
+class TestIterCsvBlocks:
+
+    def test_blocks_match_generated_file(self):
+        row_count = file_utils.CSV_BLOCK_ROW_COUNT + 1
+        blocks = list(file_utils.iter_csv_blocks(column_count=4, row_count=row_count, column_types="float", seed=7))
+        assert len(blocks) == 3
+        file_path = file_utils.generate_csv_file(column_count=4, row_count=row_count, column_types="float", seed=7)
+        assert b"".join(blocks) == _read(file_path)
+        assert len(b"".join(blocks)) == file_utils.get_csv_size(4, row_count)
+
+    def test_no_blocks_for_empty_file(self):
+        assert list(file_utils.iter_csv_blocks(size=0)) == []
+        assert list(file_utils.iter_csv_blocks(column_count=0)) == []
@@ -0,0 +1,96 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import io
+from unittest import mock
+
+import pytest
+
+from modules.http_client import multipart_stream
+from modules.http_client.multipart_stream import MultipartStream
+
+
+EXPECTED_BODY = (b"--b0undary\r\nContent-Disposition: form-data; name=\"orgUUID\"\r\n\r\norg-guid\r\n"
+                 b"--b0undary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"data.csv\"\r\n"
+                 b"Content-Type: text/csv\r\n\r\n"
+                 b"a,b\r\n1,2\r\n"
+                 b"\r\n--b0undary--\r\n")
+
+
+@mock.patch.object(multipart_stream.uuid, "uuid4", lambda: mock.Mock(hex="b0undary"))
+class TestMultipartStream:
+
+    def _get_stream(self, file_content=(b"a,b\r\n", b"1,2\r\n"), file_size=10, **kwargs):
+        return MultipartStream({"orgUUID": "org-guid"}, "file", "data.csv", file_content, file_size, "text/csv",
+                               **kwargs)
+
+    def test_body(self):
+        stream = self._get_stream()
+        assert stream.content_type == "multipart/form-data; boundary=b0undary"
+        assert stream.read() == EXPECTED_BODY
+        assert stream.read() == b""
+
+    def test_length_matches_body(self):
+        stream = self._get_stream()
+        body = b"".join(stream)
+        assert body == EXPECTED_BODY
+        assert len(stream) == len(body)
+        assert stream.bytes_read == len(body)
+
+    def test_read_in_small_chunks(self):
+        progress = []
+        stream = self._get_stream(progress_callback=lambda read, total: progress.append((read, total)))
+        chunks = []
+        chunk = stream.read(7)
+        while chunk:
+            assert len(chunk) <= 7
+            chunks.append(chunk)
+            chunk = stream.read(7)
+        assert b"".join(chunks) == EXPECTED_BODY
+        assert progress[-1] == (len(EXPECTED_BODY), len(EXPECTED_BODY))
+        assert [read for read, _ in progress] == sorted(read for read, _ in progress)
+
+    def test_content_longer_than_declared_size(self):
+        stream = self._get_stream(file_size=9)
+        with pytest.raises(ValueError):
+            stream.read()
+
+    def test_content_shorter_than_declared_size(self):
+        stream = self._get_stream(file_size=11)
+        with pytest.raises(ValueError):
+            stream.read()
+
+    def test_close_closes_file(self):
+        file_content = io.BytesIO(b"a,b\r\n1,2\r\n")
+        stream = self._get_stream(file_content=file_content)
+        stream.read(10)
+        stream.close()
+        assert file_content.closed
+
+    def test_close_stops_generator(self):
+        closed = []
+
+        def file_content():
+            try:
+                yield b"a,b\r\n"
+                yield b"1,2\r\n"
+            finally:
+                closed.append(True)
+
+        stream = self._get_stream(file_content=file_content())
+        stream.read(len(EXPECTED_BODY) - 20)
+        stream.close()
+        assert closed == [True]
@@ -0,0 +1,172 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+import time
+
+from modules.constants import HttpStatus
+from modules.exceptions import UnexpectedResponseError
+from modules.sweeper import RateLimiter, SweepCheckpoint, Sweeper
+
+
+class Item(object):
+
+    def __init__(self, name, deleted_names, error=None):
+        self.name = name
+        self.deleted_names = deleted_names
+        self.error = error
+
+    def __str__(self):
+        return self.name
+
+    def cleanup(self):
+        if self.error is not None:
+            raise self.error
+        self.deleted_names.append(self.name)
+
+
+class TestSweeper:
+
+    def test_deletes_only_test_objects(self):
+        deleted = []
+        items = [Item(name, deleted) for name in ("test_a", "keep", "test_b")]
+        sweeper = Sweeper(workers=2)
+        sweeper.add_source("item", lambda: items, lambda x: x.name.startswith("test_"))
+        stats = sweeper.sweep()["item"]
+        assert sorted(deleted) == ["test_a", "test_b"]
+        assert (stats.listed, stats.deleted, stats.failed, stats.skipped) == (2, 2, 0, 0)
+
+    def test_dry_run_does_not_delete(self):
+        deleted = []
+        items = [Item(name, deleted) for name in ("test_a", "keep")]
+        sweeper = Sweeper(workers=2, dry_run=True)
+        sweeper.add_source("item", lambda: items, lambda x: x.name.startswith("test_"))
+        stats = sweeper.sweep()["item"]
+        assert deleted == []
+        assert [x.name for x in stats.would_delete] == ["test_a"]
+        assert stats.deleted == 0
+
+    def test_not_found_counts_as_deleted(self):
+        deleted = []
+        items = [Item("gone", deleted, error=UnexpectedResponseError(HttpStatus.CODE_NOT_FOUND, "")),
+                 Item("broken", deleted, error=UnexpectedResponseError(HttpStatus.CODE_INTERNAL_SERVER_ERROR, ""))]
+        sweeper = Sweeper(workers=1)
+        sweeper.add_source("item", lambda: items, lambda x: True)
+        stats = sweeper.sweep()["item"]
+        assert (stats.deleted, stats.failed) == (1, 1)
+
+    def test_resume_from_checkpoint(self, tmpdir):
+        checkpoint_path = str(tmpdir.join("checkpoint"))
+        deleted = []
+        items = [Item("test_a", deleted), Item("test_b", deleted, error=RuntimeError("interrupted"))]
+        sweeper = Sweeper(workers=1, checkpoint_path=checkpoint_path)
+        sweeper.add_source("item", lambda: items, lambda x: True)
+        sweeper.sweep()
+        assert deleted == ["test_a"]
+
+        items[1].error = None
+        resumed_sweeper = Sweeper(workers=1, checkpoint_path=checkpoint_path)
+        resumed_sweeper.add_source("item", lambda: items, lambda x: True)
+        stats = resumed_sweeper.sweep()["item"]
+        assert deleted == ["test_a", "test_b"]
+        assert (stats.listed, stats.deleted, stats.skipped) == (2, 1, 1)
+
+    def test_stages_are_swept_in_order(self):
+        deleted = []
+        users = [Item("user_{}".format(i), deleted) for i in range(20)]
+        orgs = [Item("org_{}".format(i), deleted) for i in range(5)]
+        sweeper = Sweeper(workers=4)
+        # register the later stage first, to check that order of sources does not matter
+        sweeper.add_source("organization", lambda: orgs, lambda x: True, stage=1)
+        sweeper.add_source("user", lambda: users, lambda x: True)
+        sweeper.sweep()
+        assert sorted(deleted[:20]) == sorted(x.name for x in users)
+        assert sorted(deleted[20:]) == sorted(x.name for x in orgs)
+
+    def test_objects_are_deleted_while_listing(self):
+        deleted = []
+        first_item_deleted = threading.Event()
+
+        class SignallingItem(Item):
+            def cleanup(self):
+                super().cleanup()
+                first_item_deleted.set()
+
+        def list_objects():
+            yield SignallingItem("test_a", deleted)
+            # the second item is listed only after the first one was deleted
+            assert first_item_deleted.wait(5)
+            yield Item("test_b", deleted)
+
+        sweeper = Sweeper(workers=1)
+        sweeper.add_source("item", list_objects, lambda x: True)
+        stats = sweeper.sweep()["item"]
+        assert deleted == ["test_a", "test_b"]
+        assert stats.deleted == 2
+
+    def test_listing_error_is_logged(self):
+        def list_objects():
+            raise RuntimeError("listing failed")
+
+        sweeper = Sweeper(workers=1)
+        sweeper.add_source("item", list_objects, lambda x: True)
+        stats = sweeper.sweep()["item"]
+        assert stats.listed == 0
+
+
+class TestRateLimiter:
+
+    def test_no_limit(self):
+        rate_limiter = RateLimiter()
+        start_time = time.time()
+        for _ in range(100):
+            rate_limiter.wait()
+        assert time.time() - start_time < 0.1
+
+    def test_operations_are_spaced(self):
+        rate_limiter = RateLimiter(rate=20)
+        times = []
+        lock = threading.Lock()
+
+        def wait():
+            rate_limiter.wait()
+            with lock:
+                times.append(time.time())
+
+        threads = [threading.Thread(target=wait) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        times.sort()
+        intervals = [later - earlier for earlier, later in zip(times, times[1:])]
+        assert min(intervals) >= 0.04
+        assert times[-1] - times[0] >= 0.2
+
+
+class TestSweepCheckpoint:
+
+    def test_keys_are_persisted(self, tmpdir):
+        checkpoint_path = str(tmpdir.join("checkpoint"))
+        checkpoint = SweepCheckpoint(checkpoint_path)
+        checkpoint.add("user: a")
+        checkpoint.add("organization: b")
+        assert "user: a" in checkpoint
+
+        loaded_checkpoint = SweepCheckpoint(checkpoint_path)
+        assert "user: a" in loaded_checkpoint
+        assert "organization: b" in loaded_checkpoint
+        assert "user: b" not in loaded_checkpoint
@@ -0,0 +1,95 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import asyncio
+
+import pytest
+
+from modules.websocket_load import LoadResult, WebsocketLoadDriver, generate_messages, get_percentile
+
+
+class TestGetPercentile:
+
+    def test_no_values(self):
+        assert get_percentile([], 50) is None
+
+    def test_percentiles(self):
+        values = list(range(100, 0, -1))
+        assert get_percentile(values, 0) == 1
+        assert get_percentile(values, 50) == 51
+        assert get_percentile(values, 99) == 100
+        assert get_percentile(values, 100) == 100
+
+
+class TestLoadResult:
+
+    def test_empty_result(self):
+        result = LoadResult()
+        assert result.messages_per_second == 0
+        assert result.get_send_duration_percentile(50) is None
+
+    def test_messages_per_second(self):
+        result = LoadResult()
+        result.sent_count = 300
+        result.duration = 2
+        result.send_durations = [0.3, 0.1, 0.2]
+        assert result.messages_per_second == 150
+        assert result.get_send_duration_percentile(50) == 0.2
+
+
+class TestGenerateMessages:
+
+    def test_messages(self):
+        assert list(generate_messages(3)) == ["Test-0", "Test-1", "Test-2"]
+
+    def test_padded_messages(self):
+        messages = list(generate_messages(2, size=10, prefix="abc"))
+        assert messages == ["abc-0.....", "abc-1....."]
+
+
+class TestRateScheduling:
+
+    @pytest.fixture
+    def loop(self):
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+
+    def _get_send_times(self, loop, rate, message_count):
+        driver = WebsocketLoadDriver("ws://localhost:1234/test", rate=rate)
+        start_time = loop.time()
+        send_times = []
+
+        @asyncio.coroutine
+        def send_all():
+            for index in range(message_count):
+                yield from driver._wait_for_turn(loop, start_time, index)
+                send_times.append(loop.time() - start_time)
+
+        loop.run_until_complete(send_all())
+        return send_times
+
+    def test_messages_are_spread_at_rate(self, loop):
+        rate = 50
+        send_times = self._get_send_times(loop, rate, 10)
+        for index, send_time in enumerate(send_times):
+            assert send_time >= index / rate - 0.005
+        assert send_times[-1] < 9 / rate + 0.1
+
+    def test_no_rate_limit(self, loop):
+        send_times = self._get_send_times(loop, None, 100)
+        assert send_times[-1] < 0.1
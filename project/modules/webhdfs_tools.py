@@ -14,16 +14,21 @@
 # limitations under the License.
 #
 
+import atexit
 import os
+import socket
+import threading
+from urllib.parse import parse_qsl, urlsplit
 
 from enum import Enum
 
 from modules.constants.http_status import HttpStatus
 from configuration.config import CONFIG
+from modules.exceptions import RedirectionLimitException, UnexpectedResponseError
 from modules.http_client.http_client_factory import HttpClientFactory, HttpClientConfiguration, HttpClientType
-from modules.http_client.client_auth.webhdfs_session import WebhdfsSession
 from modules.http_client.client_auth.http_method import HttpMethod
 from modules.http_client.http_client import HttpClient
+from modules.ssh_client import SshTunnel, SshTunnelException
 
 
 class WebhdfsOperation(Enum):
@@ -41,6 +46,10 @@ class WebhdfsTools(object):
     DEFAULT_USER = "hdfs"
     VIA_HOST_USERNAME = "ubuntu"
     PATH_TO_KEY = os.path.expanduser(CONFIG["cdh_key_path"])
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    # tunnels to datanodes, by (datanode host, datanode port), reused by all redirects to the same datanode
+    _datanode_tunnels = {}
+    _datanode_tunnels_lock = threading.Lock()
 
     @staticmethod
     def get_params(operation):
@@ -52,16 +61,55 @@ class WebhdfsTools(object):
         return client.request(method=HttpMethod.GET, path=path, params=params)
 
     @staticmethod
-    def open_and_read(client: HttpClient, path):
+    def _get_open_params(offset, length):
         params = WebhdfsTools.get_params(WebhdfsOperation.open.value)
+        if offset is not None:
+            params["offset"] = offset
+        if length is not None:
+            params["length"] = length
+        return params
+
+    @staticmethod
+    def open_and_read(client: HttpClient, path, offset=None, length=None):
+        """Return content of a file. Pass offset and length (in bytes) to read only part of it."""
+        params = WebhdfsTools._get_open_params(offset, length)
         response = client.request(method=HttpMethod.GET, params=params, path=path)
         if response.status_code == HttpStatus.CODE_TEMPORARY_REDIRECT:
-            return WebhdfsSession.redirection_handler(
-                WebhdfsTools.create_client, WebhdfsTools.TEST_PORT, WebhdfsTools.VIA_HOST_USERNAME,
-                WebhdfsTools.PATH_TO_KEY, WebhdfsTools.get_via_hostname, WebhdfsTools.TEST_HOST, method=HttpMethod.GET,
-                params=params, redirection_location=response.headers._store["location"][1], hdfs_path=path)
+            datanode_client, datanode_path, datanode_params = WebhdfsTools._follow_redirect(response)
+            return datanode_client.request(method=HttpMethod.GET, params=datanode_params, path=datanode_path)
         return response
 
+    @staticmethod
+    def iter_content(client: HttpClient, path, offset=None, length=None, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        """Iterate over content of a file in chunks of bytes, without reading the whole file to memory."""
+        params = WebhdfsTools._get_open_params(offset, length)
+        response = client.request(method=HttpMethod.GET, params=params, path=path, raw_response=True, stream=True)
+        if response.status_code == HttpStatus.CODE_TEMPORARY_REDIRECT:
+            response.close()
+            datanode_client, datanode_path, datanode_params = WebhdfsTools._follow_redirect(response)
+            response = datanode_client.request(method=HttpMethod.GET, params=datanode_params, path=datanode_path,
+                                               raw_response=True, stream=True)
+        try:
+            if response.status_code == HttpStatus.CODE_TEMPORARY_REDIRECT:
+                raise RedirectionLimitException("Datanode redirected the request to {}".format(
+                    response.headers["Location"]))
+            if not response.ok:
+                raise UnexpectedResponseError(response.status_code, response.text)
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                yield chunk
+        finally:
+            response.close()
+
+    @staticmethod
+    def download(client: HttpClient, path, local_path, offset=None, length=None):
+        """Write content of a file to a local file as it is received. Return number of bytes written."""
+        size = 0
+        with open(local_path, "wb") as local_file:
+            for chunk in WebhdfsTools.iter_content(client, path, offset=offset, length=length):
+                local_file.write(chunk)
+                size += len(chunk)
+        return size
+
     @staticmethod
     def get_file_status(client: HttpClient, path):
         params = WebhdfsTools.get_params(WebhdfsOperation.get_file_status.value)
@@ -72,6 +120,23 @@ class WebhdfsTools(object):
         params = WebhdfsTools.get_params(WebhdfsOperation.list_status.value)
         return client.request(method=HttpMethod.GET, params=params, path=path)
 
+    @staticmethod
+    def list_directory_recursive(client: HttpClient, path):
+        """
+        Iterate over statuses of all files in a directory tree. Each status has additional key "path" - path of the
+        file relative to the client url.
+        """
+        directories = [path.rstrip("/")]
+        while len(directories) > 0:
+            directory = directories.pop()
+            statuses = WebhdfsTools.list_directory(client, directory)["FileStatuses"]["FileStatus"]
+            for status in statuses:
+                status["path"] = "{}/{}".format(directory, status["pathSuffix"])
+                if status["type"] == "DIRECTORY":
+                    directories.append(status["path"])
+                else:
+                    yield status
+
     @staticmethod
     def get_via_hostname():
         return "jump.{}".format(CONFIG["domain"])
@@ -85,3 +150,47 @@ class WebhdfsTools(object):
         if "webhdfs" not in client.url:
             client.url = "http://{}/webhdfs/v1/".format(client.url)
         return client
+
+    @classmethod
+    def _follow_redirect(cls, response):
+        """
+        Return client, path and params for the datanode the response redirects to. Location of the redirect contains
+        all params for the datanode, including offset and length.
+        """
+        location = urlsplit(response.headers["Location"])
+        tunnel = cls._get_datanode_tunnel(location.hostname, location.port or cls.TEST_PORT)
+        client = cls.create_client(host=cls.TEST_HOST, port=tunnel.local_port)
+        path = location.path.split("/webhdfs/v1/", 1)[-1]
+        return client, path, dict(parse_qsl(location.query))
+
+    @classmethod
+    def _get_datanode_tunnel(cls, host, port):
+        with cls._datanode_tunnels_lock:
+            tunnel = cls._datanode_tunnels.get((host, port))
+            if tunnel is None:
+                tunnel = SshTunnel(host, cls.VIA_HOST_USERNAME, path_to_key=cls.PATH_TO_KEY, port=port,
+                                   via_hostname=cls.get_via_hostname(), local_port=cls._get_free_port())
+                try:
+                    tunnel.connect()
+                except ConnectionError:
+                    raise SshTunnelException()
+                cls._datanode_tunnels[(host, port)] = tunnel
+            return tunnel
+
+    @staticmethod
+    def _get_free_port():
+        # each datanode listens on the same port, so tunnels need different local ports
+        with socket.socket() as s:
+            s.bind((WebhdfsTools.TEST_HOST, 0))
+            return s.getsockname()[1]
+
+    @classmethod
+    def close_tunnels(cls):
+        """Close tunnels to datanodes opened by previous reads."""
+        with cls._datanode_tunnels_lock:
+            for tunnel in cls._datanode_tunnels.values():
+                tunnel.disconnect()
+            cls._datanode_tunnels.clear()
+
+
+atexit.register(WebhdfsTools.close_tunnels)
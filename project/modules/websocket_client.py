@@ -29,7 +29,11 @@ class WebsocketClient:
     WSS = "wss"
 
     def __init__(self, url, origin=None, headers=None, certificate_requirement=None):
+        ws_connection_params = self.get_connection_params(url, origin, headers, certificate_requirement)
+        self.ws = asyncio.get_event_loop().run_until_complete(self._create_ws_connection(ws_connection_params))
 
+    @staticmethod
+    def get_connection_params(url, origin=None, headers=None, certificate_requirement=None):
         ws_connection_params = {
             "uri": url
         }
@@ -41,7 +45,7 @@ class WebsocketClient:
             ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
             ssl_context.verify_mode = certificate_requirement
             ws_connection_params.update({"ssl": ssl_context})
-        self.ws = asyncio.get_event_loop().run_until_complete(self._create_ws_connection(ws_connection_params))
+        return ws_connection_params
 
     @asyncio.coroutine
     def _create_ws_connection(self, ws_params):
@@ -60,9 +64,18 @@ class WebsocketClient:
         yield from asyncio.wait_for(self.ws.send(msg), timeout=self.WS_TIMEOUT)
 
     @asyncio.coroutine
-    def _recieve(self):
+    def _send_many(self, messages):
+        # messages are written one after another, timeout applies to the whole batch
+        @asyncio.coroutine
+        def send_all():
+            for msg in messages:
+                yield from self.ws.send(msg)
+        yield from asyncio.wait_for(send_all(), timeout=self.WS_TIMEOUT * max(1, len(messages) // 1000))
+
+    @asyncio.coroutine
+    def _recieve(self, expected_count=None):
         output = []
-        while True:
+        while expected_count is None or len(output) < expected_count:
             try:
                 msg = yield from asyncio.wait_for(self.ws.recv(), timeout=self.WS_TIMEOUT)
                 logger.info(msg)
@@ -78,5 +91,10 @@ class WebsocketClient:
     def send(self, msg):
         asyncio.get_event_loop().run_until_complete(self._send(msg))
 
-    def recieve(self):
-        return asyncio.get_event_loop().run_until_complete(self._recieve())
+    def send_many(self, messages):
+        messages = list(messages)
+        asyncio.get_event_loop().run_until_complete(self._send_many(messages))
+
+    def recieve(self, expected_count=None):
+        """Return received messages - stop after expected_count messages or WS_TIMEOUT without a message."""
+        return asyncio.get_event_loop().run_until_complete(self._recieve(expected_count))
@@ -0,0 +1,150 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import random
+import time
+
+import websockets
+
+from .tap_logger import get_logger
+from .websocket_client import WebsocketClient
+
+logger = get_logger(__name__)
+
+
+def get_percentile(values, percentile):
+    """Return value below which given percent of values are, None for no values."""
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+class LoadResult(object):
+    """
+    Outcome of a load run: counts of sent and failed messages, duration and sampled send durations (seconds) - time
+    ws.send took to write a message to the connection, not time until the message was delivered.
+    """
+
+    def __init__(self):
+        self.sent_count = 0
+        self.failed_count = 0
+        self.duration = 0
+        self.send_durations = []
+
+    @property
+    def messages_per_second(self):
+        return self.sent_count / self.duration if self.duration > 0 else 0
+
+    def get_send_duration_percentile(self, percentile):
+        return get_percentile(self.send_durations, percentile)
+
+    def __repr__(self):
+        return "{} (sent={}, failed={}, duration={:.2f}s, rate={:.1f}/s, send p50={}, p99={})".format(
+            self.__class__.__name__, self.sent_count, self.failed_count, self.duration, self.messages_per_second,
+            self.get_send_duration_percentile(50), self.get_send_duration_percentile(99))
+
+
+class WebsocketLoadDriver(object):
+    """
+    Send messages over many websocket connections concurrently. Each connection sends its next message without
+    waiting for anything but the previous write, messages are scheduled so that the total rate does not exceed rate
+    (messages per second, no limit if None). Send duration of a sample of messages is recorded. on_sent, if passed, is
+    called with index of each sent message and the time (time.time()) it was sent.
+    """
+
+    SEND_TIMEOUT = WebsocketClient.WS_TIMEOUT
+
+    def __init__(self, url, connection_count=10, rate=None, send_duration_sample_ratio=0.01, origin=None,
+                 headers=None, certificate_requirement=None, on_sent=None):
+        self.connection_params = WebsocketClient.get_connection_params(url, origin, headers, certificate_requirement)
+        self.connection_count = connection_count
+        self.rate = rate
+        self.send_duration_sample_ratio = send_duration_sample_ratio
+        self.on_sent = on_sent
+
+    @asyncio.coroutine
+    def _connect(self):
+        ws = yield from websockets.connect(**self.connection_params)
+        return ws
+
+    @asyncio.coroutine
+    def _close(self, ws):
+        try:
+            yield from asyncio.wait_for(ws.close(), timeout=self.SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+    @asyncio.coroutine
+    def _wait_for_turn(self, loop, start_time, index):
+        if self.rate is not None:
+            delay = start_time + index / self.rate - loop.time()
+            if delay > 0:
+                yield from asyncio.sleep(delay)
+
+    @asyncio.coroutine
+    def _run_connection(self, loop, start_time, messages, result):
+        """Send messages taken from the shared iterator until it is exhausted - reconnect after a failed send."""
+        ws = yield from self._connect()
+        try:
+            # the loop runs one coroutine at a time, so messages are taken from the iterator one by one
+            for index, message in messages:
+                yield from self._wait_for_turn(loop, start_time, index)
+                send_start = time.perf_counter()
+                try:
+                    yield from asyncio.wait_for(ws.send(message), timeout=self.SEND_TIMEOUT)
+                except (websockets.exceptions.ConnectionClosed, asyncio.TimeoutError, OSError) as e:
+                    logger.warning("Sending message {} failed: {}".format(index, e))
+                    result.failed_count += 1
+                    yield from self._close(ws)
+                    ws = yield from self._connect()
+                    continue
+                result.sent_count += 1
+                if self.on_sent is not None:
+                    self.on_sent(index, time.time())
+                if random.random() < self.send_duration_sample_ratio:
+                    result.send_durations.append(time.perf_counter() - send_start)
+        finally:
+            yield from self._close(ws)
+
+    @asyncio.coroutine
+    def _run(self, messages):
+        loop = asyncio.get_event_loop()
+        result = LoadResult()
+        messages = enumerate(messages)
+        start_time = loop.time()
+        connections = [self._run_connection(loop, start_time, messages, result) for _ in range(self.connection_count)]
+        yield from asyncio.gather(*connections)
+        result.duration = loop.time() - start_time
+        return result
+
+    def run(self, messages):
+        """Send all messages (an iterable of str or bytes, e.g. a generator) and return LoadResult."""
+        logger.info("Sending messages to {} over {} connections, rate {}".format(
+            self.connection_params["uri"], self.connection_count, self.rate or "unlimited"))
+        result = asyncio.get_event_loop().run_until_complete(self._run(messages))
+        logger.info(result)
+        return result
+
+
+def generate_messages(count, size=None, prefix="Test"):
+    """Yield count messages "<prefix>-<number>", padded to size characters."""
+    for number in range(count):
+        message = "{}-{}".format(prefix, number)
+        if size is not None:
+            message += "." * (size - len(message))
+        yield message
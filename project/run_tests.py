@@ -56,6 +56,7 @@ if __name__ == "__main__":
                               domain=args.environment,
                               logged_response_body_length=args.logged_response_body_length,
                               logging_level=args.logging_level,
+                              log_format=args.log_format,
                               platform_version=args.platform_version,
                               repository=args.repository,
                               database_url=args.database_url,
@@ -72,7 +73,9 @@ if __name__ == "__main__":
                               jumpbox_address=args.jumpbox_address,
                               elasticsearch_host=args.elasticsearch_host,
                               pushed_app_proxy=args.pushed_app_proxy,
-                              kubernetes=args.kubernetes)
+                              kubernetes=args.kubernetes,
+                              resource_pool_size=args.resource_pool_size,
+                              resource_pool_top_up=args.resource_pool_top_up)
 
     for key in config.LOGGED_CONFIG_KEYS:
         logger.info("{}={}".format(key, config.CONFIG.get(key)))
@@ -33,6 +33,7 @@ from modules.tap_logger import log_fixture, log_finalizer
 from modules.tap_object_model import Organization, ServiceType, Space, User, Application, ServiceInstance
 from modules.test_names import generate_test_object_name
 from .context import Context
+from .resource_pool import ResourcePool
 from .test_data import TestData
 
 
@@ -40,9 +41,33 @@ from .test_data import TestData
 # TODO logger in fixtures should have special format
 
 
+@pytest.fixture(scope="session")
+def resource_pool_entry(request):
+    """Entry leased from the resource pool, None if the pool is disabled or empty."""
+    if not CONFIG["resource_pool_size"]:
+        return None
+    pool = ResourcePool(size=CONFIG["resource_pool_size"])
+    log_fixture("resource_pool_entry: Lease test objects from resource pool")
+    entry = pool.lease()
+    if CONFIG["resource_pool_top_up"]:
+        pool.top_up_async()
+
+    def fin():
+        if entry is not None:
+            log_finalizer("resource_pool_entry: Return test objects to resource pool")
+            pool.release(entry)
+        pool.wait()
+
+    request.addfinalizer(fin)
+    return entry
+
+
 @pytest.fixture(scope="session")
 @retry(UnexpectedResponseError, tries=3, delay=15)
-def test_org(request):
+def test_org(request, resource_pool_entry):
+    if resource_pool_entry is not None:
+        TestData.test_org = resource_pool_entry.org
+        return TestData.test_org
     context = Context()
     log_fixture("test_org: Create test organization")
     test_org = Organization.api_create(context)
@@ -58,14 +83,20 @@ def test_org(request):
 
 
 @pytest.fixture(scope="session")
-def test_space(request, test_org):
+def test_space(request, test_org, resource_pool_entry):
+    if resource_pool_entry is not None:
+        TestData.test_space = resource_pool_entry.space
+        return TestData.test_space
     log_fixture("test_space: Create test space")
     TestData.test_space = Space.api_create(test_org)
     return TestData.test_space
 
 
 @pytest.fixture(scope="session")
-def test_org_manager(request, test_org):
+def test_org_manager(request, test_org, resource_pool_entry):
+    if resource_pool_entry is not None:
+        TestData.test_org_manager = resource_pool_entry.org_manager
+        return TestData.test_org_manager
     context = Context()
     log_fixture("test_org_manager: Add org manager to test org")
     test_org_manager = User.api_create_by_adding_to_organization(context, org_guid=test_org.guid)
@@ -141,13 +172,18 @@ def admin_client():
 
 
 @pytest.fixture(scope="session")
-def space_users_clients(request, test_org, test_space, admin_client):
+def space_users_clients(request, test_org, test_space, admin_client, resource_pool_entry):
+    if resource_pool_entry is not None:
+        log_fixture("clients: Login as resource pool users")
+        _clients = {role: user.login() for role, user in resource_pool_entry.space_users.items()}
+        _clients["admin"] = admin_client
+        return _clients
     context = Context()
     log_fixture("clients: Create clients")
-    _clients = {}
-    for role, value in User.SPACE_ROLES.items():
-        _clients[role] = User.api_create_by_adding_to_space(context, org_guid=test_org.guid, space_guid=test_space.guid,
-                                                            roles=value).login()
+    roles = list(User.SPACE_ROLES.keys())
+    users = User.api_create_many_by_adding_to_space(context, org_guid=test_org.guid, space_guid=test_space.guid,
+                                                    roles_list=[User.SPACE_ROLES[role] for role in roles])
+    _clients = {role: user.login() for role, user in zip(roles, users)}
     _clients["admin"] = admin_client
 
     def fin():
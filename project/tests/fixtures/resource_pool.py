@@ -0,0 +1,247 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from datetime import datetime, timedelta
+import hashlib
+import hmac
+import threading
+
+from configuration.config import CONFIG
+from modules.exceptions import UnexpectedResponseError
+from modules.tap_logger import get_logger
+from modules.tap_object_model import DataSet, Organization, Space, Transfer, User
+from modules.test_names import generate_test_object_name
+from .context import Context
+
+
+logger = get_logger(__name__)
+
+
+class PoolEntry(object):
+    """Ready-to-use set of test objects: organization, space, org manager and a user for each space role."""
+
+    def __init__(self, entry_id, org, space, org_manager, space_users):
+        self.entry_id = entry_id
+        self.org = org
+        self.space = space
+        self.org_manager = org_manager
+        self.space_users = space_users
+
+    def __repr__(self):
+        return "{} (id={}, org={})".format(self.__class__.__name__, self.entry_id, self.org)
+
+    @property
+    def users(self):
+        return [self.org_manager] + list(self.space_users.values())
+
+
+class ResourcePool(object):
+    """
+    Pool of pre-provisioned test objects kept on the environment between runs. Pool state is stored in object names:
+    free organizations are named pool_free_<id>, leased ones pool_leased_<lease time>_<id>. Passwords of pool users are
+    derived from their usernames, so that any run can log in as them.
+    To lease an entry, a run creates organization pool_lock_<id> - organization names are unique, so only one run can
+    create it. The lock is removed when the entry is returned to the pool.
+    """
+
+    FREE_PREFIX = "pool_free_"
+    LEASED_PREFIX = "pool_leased_"
+    CREATING_PREFIX = "pool_creating_"
+    LOCK_PREFIX = "pool_lock_"
+    USER_PREFIX = "pool_"
+    ORG_MANAGER_TAG = "org_manager"
+    SPACE_ROLE_TAG = "space_{}"
+    LEASE_TIME_FORMAT = "%Y%m%d%H%M%S%f"
+    # leases older than this are considered abandoned by a crashed run and are reclaimed
+    MAX_LEASE_AGE = timedelta(hours=12)
+
+    def __init__(self, size):
+        self.size = size
+        self._top_up_thread = None
+
+    @classmethod
+    def is_pool_object_name(cls, name):
+        """Return True for names of free and leased pool organizations and pool users."""
+        if name is None:
+            return False
+        return name.startswith(cls.FREE_PREFIX) or name.startswith(cls.LEASED_PREFIX) or \
+            name.startswith(cls.LOCK_PREFIX) or "+{}".format(cls.USER_PREFIX) in name
+
+    @staticmethod
+    def get_password(username):
+        key = CONFIG["admin_password"].encode()
+        return hmac.new(key, username.encode(), hashlib.sha256).hexdigest()[:20]
+
+    @classmethod
+    def _get_username(cls, tag):
+        return generate_test_object_name(email=True, prefix="{}{}".format(cls.USER_PREFIX, tag))
+
+    @classmethod
+    def _has_tag(cls, user, tag):
+        return "+{}{}_".format(cls.USER_PREFIX, tag) in user.username
+
+    def _list_orgs(self, prefix):
+        return [o for o in Organization.cf_api_get_list() if o.name.startswith(prefix)]
+
+    # -------------------------------- lease -------------------------------- #
+
+    def _lock(self, entry_id):
+        """Return True if this run created the lock of the entry, False if another run holds it."""
+        try:
+            # lock created by another run must not be deleted on failure
+            Organization.api_create(Context(), name="{}{}".format(self.LOCK_PREFIX, entry_id), delete_on_fail=False)
+        except UnexpectedResponseError:
+            return False
+        return True
+
+    def _unlock(self, entry_id):
+        for org in self._list_orgs("{}{}".format(self.LOCK_PREFIX, entry_id)):
+            try:
+                org.cleanup()
+            except UnexpectedResponseError as e:
+                logger.warning("Could not remove lock {}: {}".format(org, e))
+
+    def lease(self):
+        """Take a free entry from the pool. Return None if the pool is empty."""
+        for org in self._list_orgs(self.FREE_PREFIX):
+            entry_id = org.name[len(self.FREE_PREFIX):]
+            if not self._lock(entry_id):
+                logger.info("{} was leased by another run".format(org))
+                continue
+            lease_name = "{}{}_{}".format(self.LEASED_PREFIX, datetime.now().strftime(self.LEASE_TIME_FORMAT), entry_id)
+            try:
+                org.rename(lease_name)
+            except UnexpectedResponseError as e:
+                logger.warning("Could not lease {}: {}".format(org, e))
+                self._unlock(entry_id)
+                continue
+            try:
+                entry = self._get_entry(entry_id, org)
+            except (StopIteration, IndexError) as e:
+                logger.warning("Incomplete pool entry {}, deleting it: {}".format(org, e))
+                org.cleanup()
+                self._unlock(entry_id)
+                continue
+            logger.info("Leased {}".format(entry))
+            return entry
+        logger.info("Resource pool is empty")
+        return None
+
+    def _get_entry(self, entry_id, org):
+        space = Space.cf_api_get_list_in_org(org.guid)[0]
+        org_manager = next(u for u in User.api_get_list_via_organization(org.guid)
+                           if self._has_tag(u, self.ORG_MANAGER_TAG))
+        space_users = {}
+        for user in User.api_get_list_via_space(space.guid):
+            for role in User.SPACE_ROLES:
+                if self._has_tag(user, self.SPACE_ROLE_TAG.format(role)):
+                    space_users[role] = user
+        for user in [org_manager] + list(space_users.values()):
+            user.password = self.get_password(user.username)
+        return PoolEntry(entry_id, org, space, org_manager, space_users)
+
+    def release(self, entry):
+        """Scrub leased entry and return it to the pool. Entry which cannot be scrubbed is deleted."""
+        try:
+            self._scrub(entry)
+            entry.org.rename("{}{}".format(self.FREE_PREFIX, entry.entry_id))
+            logger.info("Returned {} to the pool".format(entry))
+        except UnexpectedResponseError as e:
+            logger.warning("Could not scrub {}, deleting it: {}".format(entry, e))
+            self._delete(entry)
+        self._unlock(entry.entry_id)
+
+    def _scrub(self, entry):
+        """Remove everything tests could have added to the entry and restore user roles."""
+        data_sets = DataSet.api_get_list(org_list=[entry.org])
+        transfers = Transfer.api_get_list(org_guid_list=[entry.org.guid])
+        for item in data_sets + transfers:
+            item.cleanup()
+        for space in Space.cf_api_get_list_in_org(entry.org.guid):
+            space.cleanup()
+        pool_guids = {user.guid for user in entry.users}
+        for user in User.api_get_list_via_organization(entry.org.guid):
+            if user.guid not in pool_guids:
+                user.api_delete_from_organization(entry.org.guid)
+        entry.org_manager.api_update_org_roles(entry.org.guid, new_roles=User.ORG_ROLES["manager"])
+        entry.space = Space.api_create(entry.org)
+        for role, user in entry.space_users.items():
+            user.api_add_to_space(entry.space.guid, entry.org.guid, roles=User.SPACE_ROLES[role])
+
+    def _delete(self, entry):
+        for item in entry.users + [entry.org]:
+            try:
+                item.cleanup()
+            except UnexpectedResponseError as e:
+                logger.warning("Error while deleting {}: {}".format(item, e))
+
+    # -------------------------------- top up -------------------------------- #
+
+    def create_entry(self):
+        entry_id = generate_test_object_name()
+        context = Context()
+        try:
+            org = Organization.api_create(context, name="{}{}".format(self.CREATING_PREFIX, entry_id))
+            space = Space.api_create(org)
+            org_manager_name = self._get_username(self.ORG_MANAGER_TAG)
+            org_manager = User.api_create_many_by_adding_to_organization(
+                context, org.guid, roles_list=[User.ORG_ROLES["manager"]], usernames=[org_manager_name],
+                passwords=[self.get_password(org_manager_name)])[0]
+            roles = sorted(User.SPACE_ROLES)
+            usernames = [self._get_username(self.SPACE_ROLE_TAG.format(role)) for role in roles]
+            users = User.api_create_many_by_adding_to_space(
+                context, org.guid, space.guid, roles_list=[User.SPACE_ROLES[role] for role in roles],
+                usernames=usernames, passwords=[self.get_password(name) for name in usernames])
+            org.rename("{}{}".format(self.FREE_PREFIX, entry_id))
+        except Exception:
+            context.cleanup()
+            raise
+        entry = PoolEntry(entry_id, org, space, org_manager, dict(zip(roles, users)))
+        logger.info("Added {} to the pool".format(entry))
+        return entry
+
+    def reclaim_abandoned(self):
+        """Return to the pool entries whose lease is older than MAX_LEASE_AGE."""
+        for org in self._list_orgs(self.LEASED_PREFIX):
+            lease_time, _, entry_id = org.name[len(self.LEASED_PREFIX):].partition("_")
+            try:
+                lease_time = datetime.strptime(lease_time, self.LEASE_TIME_FORMAT)
+            except ValueError:
+                continue
+            if datetime.now() - lease_time > self.MAX_LEASE_AGE:
+                logger.info("Reclaiming abandoned {}".format(org))
+                self.release(self._get_entry(entry_id, org))
+
+    def top_up(self):
+        self.reclaim_abandoned()
+        missing = self.size - len(self._list_orgs(self.FREE_PREFIX))
+        for _ in range(missing):
+            try:
+                self.create_entry()
+            except Exception as e:
+                logger.warning("Could not add entry to the pool: {}".format(e))
+
+    def top_up_async(self):
+        """
+        Top up the pool in a background thread. Call wait() before the end of the run. Objects are created while tests
+        run, so this is used only if enabled with --resource-pool-top-up.
+        """
+        self._top_up_thread = threading.Thread(target=self.top_up)
+        self._top_up_thread.start()
+
+    def wait(self):
+        if self._top_up_thread is not None:
+            self._top_up_thread.join()
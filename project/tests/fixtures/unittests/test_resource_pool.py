@@ -0,0 +1,205 @@
+#
+# Copyright (c) 2016 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+from modules.exceptions import UnexpectedResponseError
+from tests.fixtures import resource_pool
+from tests.fixtures.resource_pool import ResourcePool
+
+
+def make_org(name):
+    org = mock.Mock()
+    org.name = name
+    org.guid = "{}_guid".format(name)
+    return org
+
+
+def make_user(tag):
+    user = mock.Mock()
+    user.username = "admin+pool_{}_20160101_000000_000000@example.com".format(tag)
+    user.guid = "{}_guid".format(tag)
+    return user
+
+
+@pytest.fixture
+def pool_objects(request):
+    """Mock platform objects used by the resource pool. Orgs listed on the platform are kept in Organization.orgs."""
+    patchers = [mock.patch.object(resource_pool, "CONFIG", {"admin_password": "secret"})]
+    patchers += [mock.patch.object(resource_pool, name) for name in ("Organization", "Space", "User", "DataSet",
+                                                                      "Transfer")]
+    for patcher in patchers:
+        request.addfinalizer(patcher.stop)
+    _, organization, space, user, data_set, transfer = [patcher.start() for patcher in patchers]
+    organization.orgs = []
+    organization.cf_api_get_list.side_effect = lambda: list(organization.orgs)
+    space.cf_api_get_list_in_org.return_value = [mock.Mock()]
+    user.SPACE_ROLES = {"developer": ["developers"]}
+    user.ORG_ROLES = {"manager": ["managers"]}
+    user.api_get_list_via_organization.return_value = [make_user("org_manager")]
+    user.api_get_list_via_space.return_value = [make_user("space_developer")]
+    data_set.api_get_list.return_value = []
+    transfer.api_get_list.return_value = []
+    return organization, space, user, data_set
+
+
+class TestLease:
+
+    def test_lease_skips_entry_locked_by_another_run(self, pool_objects):
+        organization, _, _, _ = pool_objects
+        free_a, free_b = make_org("pool_free_a"), make_org("pool_free_b")
+        organization.orgs = [free_a, free_b]
+        organization.api_create.side_effect = [UnexpectedResponseError(400, "name taken"), mock.Mock()]
+        entry = ResourcePool(size=2).lease()
+        assert [c[1]["name"] for c in organization.api_create.call_args_list] == ["pool_lock_a", "pool_lock_b"]
+        assert all(c[1]["delete_on_fail"] is False for c in organization.api_create.call_args_list)
+        assert free_a.rename.call_count == 0
+        lease_name = free_b.rename.call_args[0][0]
+        assert lease_name.startswith(ResourcePool.LEASED_PREFIX) and lease_name.endswith("_b")
+        assert entry.entry_id == "b"
+        assert entry.org is free_b
+        assert entry.org_manager.password == ResourcePool.get_password(entry.org_manager.username)
+        assert list(entry.space_users) == ["developer"]
+
+    def test_lease_returns_none_if_all_entries_are_locked(self, pool_objects):
+        organization, _, _, _ = pool_objects
+        organization.orgs = [make_org("pool_free_a")]
+        organization.api_create.side_effect = UnexpectedResponseError(400, "name taken")
+        assert ResourcePool(size=1).lease() is None
+
+    def test_lease_deletes_incomplete_entry(self, pool_objects):
+        organization, space, _, _ = pool_objects
+        free_a, free_b, lock_a = make_org("pool_free_a"), make_org("pool_free_b"), make_org("pool_lock_a")
+        organization.orgs = [free_a, free_b, lock_a]
+        # entry a has no space
+        space.cf_api_get_list_in_org.side_effect = [[], [mock.Mock()]]
+        entry = ResourcePool(size=2).lease()
+        assert free_a.cleanup.call_count == 1
+        assert lock_a.cleanup.call_count == 1
+        assert entry.entry_id == "b"
+
+    def test_lease_deletes_entry_without_org_manager(self, pool_objects):
+        organization, _, user, _ = pool_objects
+        free_a, lock_a = make_org("pool_free_a"), make_org("pool_lock_a")
+        organization.orgs = [free_a, lock_a]
+        user.api_get_list_via_organization.return_value = []
+        assert ResourcePool(size=1).lease() is None
+        assert free_a.cleanup.call_count == 1
+        assert lock_a.cleanup.call_count == 1
+
+    def test_lease_unlocks_entry_which_cannot_be_renamed(self, pool_objects):
+        organization, _, _, _ = pool_objects
+        free_a, lock_a = make_org("pool_free_a"), make_org("pool_lock_a")
+        organization.orgs = [free_a, lock_a]
+        free_a.rename.side_effect = UnexpectedResponseError(404, "not found")
+        assert ResourcePool(size=1).lease() is None
+        assert free_a.cleanup.call_count == 0
+        assert lock_a.cleanup.call_count == 1
+
+
+class TestRelease:
+
+    def _lease(self, organization, entry_id="a"):
+        org = make_org("{}{}".format(ResourcePool.FREE_PREFIX, entry_id))
+        lock = make_org("{}{}".format(ResourcePool.LOCK_PREFIX, entry_id))
+        organization.orgs = [org, lock]
+        entry = ResourcePool(size=1).lease()
+        org.rename.reset_mock()
+        return entry, lock
+
+    def test_release_returns_entry_to_the_pool(self, pool_objects):
+        organization, _, _, _ = pool_objects
+        entry, lock = self._lease(organization)
+        ResourcePool(size=1).release(entry)
+        entry.org.rename.assert_called_once_with("pool_free_a")
+        assert entry.org.cleanup.call_count == 0
+        assert lock.cleanup.call_count == 1
+
+    def test_failed_scrub_deletes_entry(self, pool_objects):
+        organization, _, _, data_set = pool_objects
+        entry, lock = self._lease(organization)
+        data_set.api_get_list.side_effect = UnexpectedResponseError(500, "error")
+        ResourcePool(size=1).release(entry)
+        assert entry.org.rename.call_count == 0
+        for item in entry.users + [entry.org]:
+            assert item.cleanup.call_count == 1
+        assert lock.cleanup.call_count == 1
+
+    def test_failed_rename_deletes_entry(self, pool_objects):
+        organization, _, _, _ = pool_objects
+        entry, lock = self._lease(organization)
+        entry.org.rename.side_effect = UnexpectedResponseError(500, "error")
+        entry.org_manager.cleanup.side_effect = UnexpectedResponseError(404, "not found")
+        ResourcePool(size=1).release(entry)
+        for item in entry.users + [entry.org]:
+            assert item.cleanup.call_count == 1
+        assert lock.cleanup.call_count == 1
+
+
+class TestReclaimAbandoned:
+
+    def test_only_expired_leases_are_released(self, pool_objects):
+        organization, _, _, _ = pool_objects
+        old_lease_time = datetime.now() - ResourcePool.MAX_LEASE_AGE - timedelta(minutes=1)
+        organization.orgs = [
+            make_org("pool_leased_{}_a".format(old_lease_time.strftime(ResourcePool.LEASE_TIME_FORMAT))),
+            make_org("pool_leased_{}_b".format(datetime.now().strftime(ResourcePool.LEASE_TIME_FORMAT))),
+            make_org("pool_leased_not_a_time_c"),
+        ]
+        pool = ResourcePool(size=3)
+        with mock.patch.object(pool, "release") as release:
+            pool.reclaim_abandoned()
+        assert [c[0][0].entry_id for c in release.call_args_list] == ["a"]
+        assert release.call_args[0][0].org is organization.orgs[0]
+
+
+class TestCreateEntry:
+
+    def test_create_entry(self, pool_objects):
+        organization, _, user, _ = pool_objects
+        org = make_org("pool_creating_x")
+        organization.api_create.return_value = org
+        user.api_create_many_by_adding_to_organization.return_value = [make_user("org_manager")]
+        user.api_create_many_by_adding_to_space.return_value = [make_user("space_developer")]
+        with mock.patch.object(resource_pool, "Context") as context:
+            entry = ResourcePool(size=1).create_entry()
+        assert organization.api_create.call_args[1]["name"].startswith(ResourcePool.CREATING_PREFIX)
+        org.rename.assert_called_once_with("{}{}".format(ResourcePool.FREE_PREFIX, entry.entry_id))
+        assert list(entry.space_users) == ["developer"]
+        assert context.return_value.cleanup.call_count == 0
+
+    def test_incomplete_entry_is_cleaned_up(self, pool_objects):
+        organization, _, user, _ = pool_objects
+        org = make_org("pool_creating_x")
+        organization.api_create.return_value = org
+        user.api_create_many_by_adding_to_space.side_effect = UnexpectedResponseError(500, "error")
+        with mock.patch.object(resource_pool, "Context") as context:
+            with pytest.raises(UnexpectedResponseError):
+                ResourcePool(size=1).create_entry()
+        # entry stays pool_creating_, so that it is never leased, and test objects created so far are removed
+        assert org.rename.call_count == 0
+        assert context.return_value.cleanup.call_count == 1
+
+    def test_top_up_continues_after_failed_entry(self, pool_objects):
+        organization, _, _, _ = pool_objects
+        organization.orgs = [make_org("pool_free_a")]
+        pool = ResourcePool(size=3)
+        with mock.patch.object(pool, "create_entry", side_effect=[UnexpectedResponseError(500, "error"), None]):
+            pool.top_up()
+            assert pool.create_entry.call_count == 2
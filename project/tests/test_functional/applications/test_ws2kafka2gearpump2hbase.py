@@ -25,7 +25,8 @@ from modules.app_sources import AppSources
 from modules.constants import TapComponent as TAP, ServiceLabels, Urls, TapGitHub, ServicePlan
 from modules.file_utils import download_file
 from modules.hbase_client import HbaseClient
-from modules.markers import components, incremental, priority
+from modules.ingestion_benchmark import IngestionBenchmark
+from modules.markers import components, incremental, long, priority
 from modules.service_tools.gearpump import Gearpump
 from modules.tap_logger import step
 from modules.tap_object_model import Application, ServiceInstance
@@ -52,6 +53,11 @@ class TestWs2kafka2gearpump2hbase:
     ONE_WORKER_PLAN_NAME = ServicePlan.WORKER_1
     SHARED_PLAN_NAME = ServicePlan.SHARED
     BARE_PLAN_NAME = ServicePlan.BARE
+    BENCHMARK_MESSAGE_COUNT = 10000
+    BENCHMARK_MESSAGE_SIZE = 1024
+    BENCHMARK_RATE = 200
+    # counting hbase rows takes a scan of the table
+    BENCHMARK_SAMPLE_INTERVAL = 5
     hbase_namespace = None
     db_and_table_name = None
 
@@ -103,18 +109,20 @@ class TestWs2kafka2gearpump2hbase:
 
         request.addfinalizer(lambda: fixtures.tear_down_test_objects(pushed_apps))
 
-    def _send_messages(self, connection_string):
-        step("Send messages to {}".format(connection_string))
+    def _get_ws_url(self, connection_string):
         cert_requirement = None
         ws_protocol = WebsocketClient.WS
         if config.CONFIG["ssl_validation"]:
             cert_requirement = ssl.CERT_NONE
             ws_protocol = WebsocketClient.WSS
-        url = "{}://{}".format(ws_protocol, connection_string)
+        return "{}://{}".format(ws_protocol, connection_string), cert_requirement
+
+    def _send_messages(self, connection_string):
+        step("Send messages to {}".format(connection_string))
+        url, cert_requirement = self._get_ws_url(connection_string)
         messages = ["Test-{}".format(n) for n in range(2)]
         ws = WebsocketClient(url, certificate_requirement=cert_requirement)
-        for message in messages:
-            ws.send(message)
+        ws.send_many(messages)
         ws.close()
 
     def test_0_create_gearpump_instance(self, test_org, test_space):
@@ -162,3 +170,19 @@ class TestWs2kafka2gearpump2hbase:
         pipeline_rows = self.hbase_reader.get_first_rows_from_table(self.db_and_table_name)
         step("Check that messages from kafka were sent to hbase")
         assert self.MESSAGES[0][::-1] in pipeline_rows and self.MESSAGES[1][::-1] in pipeline_rows is True,"No messages in hbase"
+
+    @long
+    @unittest.skip("DPNG-6031")
+    def test_step_7_benchmark(self):
+        connection_string = "{}/{}".format(self.app_ws2kafka.urls[0], self.TOPIC_NAME)
+        url, cert_requirement = self._get_ws_url(connection_string)
+        step("Send {} messages at {}/s and sample number of rows in hbase".format(self.BENCHMARK_MESSAGE_COUNT,
+                                                                                   self.BENCHMARK_RATE))
+        benchmark = IngestionBenchmark(url, lambda: self.hbase_reader.count_table_rows(self.db_and_table_name),
+                                       message_count=self.BENCHMARK_MESSAGE_COUNT,
+                                       message_size=self.BENCHMARK_MESSAGE_SIZE, rate=self.BENCHMARK_RATE,
+                                       sample_interval=self.BENCHMARK_SAMPLE_INTERVAL,
+                                       certificate_requirement=cert_requirement)
+        result = benchmark.run()
+        step("Check that all messages were stored in hbase")
+        assert result.consumed_count == self.BENCHMARK_MESSAGE_COUNT, result
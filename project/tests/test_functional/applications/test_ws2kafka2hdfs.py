@@ -25,7 +25,8 @@ from configuration import config
 from modules.app_sources import AppSources
 from modules.constants import ServiceLabels, TapComponent as TAP, TapGitHub
 from modules.hdfs import Hdfs
-from modules.markers import components, incremental, priority
+from modules.ingestion_benchmark import IngestionBenchmark, get_app_consumed_count
+from modules.markers import components, incremental, long, priority
 from modules.tap_logger import step
 from modules.tap_object_model import Application, ServiceInstance, Upsi
 from tests.fixtures import fixtures
@@ -48,6 +49,9 @@ class TestWs2kafka2hdfs:
     KAFKA_INSTANCE_NAME = "kafka-inst"
     ZOOKEEPER_INSTANCE_NAME = "zookeeper-inst"
     HDFS_INSTANCE_NAME = "hdfs-inst"
+    BENCHMARK_MESSAGE_COUNT = 10000
+    BENCHMARK_MESSAGE_SIZE = 1024
+    BENCHMARK_RATE = 200
     messages = ["Test-{}".format(n) for n in range(MESSAGE_COUNT)]
     app_ws2kafka = None
     app_kafka2hdfs = None
@@ -138,27 +142,49 @@ class TestWs2kafka2hdfs:
 
     @pytest.mark.bugs("DPNG-5173 Cannot access hdfs directories using ec2-user")
     def test_step_2_check_messages_in_hdfs(self):
-        step("Get details of broker guid")
-        broker_guid = self.app_kafka2hdfs.get_credentials("hdfs")["uri"].split("/", 3)[3]
         step("Get messages from hdfs")
-        hdfs_messages = self._get_messages_from_hdfs("/" + os.path.join(broker_guid, "from_kafka", self.topic_name))
+        hdfs_messages = self._get_messages_from_hdfs(self._get_hdfs_path())
         step("Check that all sent messages are on hdfs")
         assert sorted(hdfs_messages) == sorted(self.messages)
 
-    def _send_ws_messages(self, connection_string):
-        step("Send messages to {}".format(connection_string))
+    @long
+    @pytest.mark.bugs("DPNG-5173 Cannot access hdfs directories using ec2-user")
+    def test_step_3_benchmark(self):
+        connection_string = "{}/{}".format(self.app_ws2kafka.urls[0], self.topic_name)
+        url, cert_requirement = self._get_ws_url(connection_string)
+        step("Send {} messages at {}/s and sample consumed message count".format(self.BENCHMARK_MESSAGE_COUNT,
+                                                                                   self.BENCHMARK_RATE))
+        benchmark = IngestionBenchmark(url, lambda: get_app_consumed_count(self.app_kafka2hdfs),
+                                       message_count=self.BENCHMARK_MESSAGE_COUNT,
+                                       message_size=self.BENCHMARK_MESSAGE_SIZE, rate=self.BENCHMARK_RATE,
+                                       certificate_requirement=cert_requirement)
+        result = benchmark.run()
+        step("Check that all messages were consumed")
+        assert result.consumed_count == self.BENCHMARK_MESSAGE_COUNT, result
+        step("Check that all messages are on hdfs")
+        with Hdfs() as hdfs:
+            missing = benchmark.get_missing_messages(hdfs.iter_lines(self._get_hdfs_path()))
+        assert missing == [], "{} messages missing on hdfs".format(len(missing))
+
+    def _get_hdfs_path(self):
+        broker_guid = self.app_kafka2hdfs.get_credentials("hdfs")["uri"].split("/", 3)[3]
+        return "/" + os.path.join(broker_guid, "from_kafka", self.topic_name)
+
+    def _get_ws_url(self, connection_string):
         cert_requirement = None
         ws_protocol = WebsocketClient.WS
         if config.CONFIG["ssl_validation"]:
             cert_requirement = ssl.CERT_NONE
             ws_protocol = WebsocketClient.WSS
-        url = "{}://{}".format(ws_protocol, connection_string)
+        return "{}://{}".format(ws_protocol, connection_string), cert_requirement
+
+    def _send_ws_messages(self, connection_string):
+        step("Send messages to {}".format(connection_string))
+        url, cert_requirement = self._get_ws_url(connection_string)
         ws = WebsocketClient(url, certificate_requirement=cert_requirement)
-        for message in self.messages:
-            ws.send(message)
+        ws.send_many(self.messages)
         ws.close()
 
     def _get_messages_from_hdfs(self, hdfs_path):
-        hdfs = Hdfs()
-        topic_content = hdfs.cat(hdfs_path)
-        return [m for m in topic_content.split("\n")[:-1]]
+        with Hdfs() as hdfs:
+            return list(hdfs.iter_lines(hdfs_path))
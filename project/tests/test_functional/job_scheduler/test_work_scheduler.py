@@ -102,6 +102,7 @@ class TestJobScheduler:
     def cleanup_test(cls, request):
         def fin():
             cls.SSH_TUNNEL.disconnect()
+            WebhdfsTools.close_tunnels()
             for table in PsqlTable.TABLES:
                 table.delete()
         request.addfinalizer(fin)
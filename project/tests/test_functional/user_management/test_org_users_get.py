@@ -33,13 +33,12 @@ class GetOrganizationUsers(TapTestCase):
     @pytest.fixture(scope="class", autouse=True)
     def users(cls, request, test_org, class_context):
         cls.step("Create test users")
-        manager = User.api_create_by_adding_to_organization(class_context, org_guid=test_org.guid)
+        manager, auditor, billing_manager = User.api_create_many_by_adding_to_organization(
+            class_context, org_guid=test_org.guid,
+            roles_list=[User.ORG_ROLES["manager"], User.ORG_ROLES["auditor"], User.ORG_ROLES["billing_manager"]]
+        )
         cls.manager_client = manager.login()
-        auditor = User.api_create_by_adding_to_organization(class_context, org_guid=test_org.guid,
-                                                            roles=User.ORG_ROLES["auditor"])
         cls.auditor_client = auditor.login()
-        billing_manager = User.api_create_by_adding_to_organization(class_context, org_guid=test_org.guid,
-                                                                    roles=User.ORG_ROLES["billing_manager"])
         cls.billing_manager_client = billing_manager.login()
 
     @pytest.fixture(scope="function")
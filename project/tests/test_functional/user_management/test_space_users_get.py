@@ -33,8 +33,8 @@ class GetSpaceUsers(TapTestCase):
     @pytest.fixture(scope="class", autouse=True)
     def space_and_users(cls, request, test_org, class_context):
         cls.test_space = Space.api_create(org=test_org)
-        cls.test_users = [User.api_create_by_adding_to_organization(class_context, org_guid=test_org.guid)
-                          for _ in range(2)]
+        cls.test_users = User.api_create_many_by_adding_to_organization(
+            class_context, org_guid=test_org.guid, roles_list=[User.ORG_ROLES["manager"]] * 2)
 
     def test_get_user_list_from_space(self):
         self.step("Check that space is empty")